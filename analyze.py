@@ -0,0 +1,388 @@
+import argparse
+import json
+import os
+import matplotlib.pyplot as plt
+import cal_ch
+import cal_ch_words
+import cal_en_letters
+import cal_en_words
+from cal_scale import METRICS, METRIC_NAMES
+from ch_top10 import plot_top_chars
+from corpus_cache import load_variants
+from en_top10 import plot_top_words
+from entropy_estimators import ESTIMATORS, entropy_bands, estimate_entropies
+from entropy_utils import ngram_entropies
+from profiling import profile_run, profiler
+from render import batch, render_chart
+from stats_store import StoredCorpus, load_stored
+from zipf import plot_zipf_law_log_scale
+from zipf_fit import zipf_summary
+
+# 统一的分析入口：每个语料文件夹只加载一次（缓存未命中的文件只读取一次），
+# 同一份分词结果分发给所有请求的分析，图表与 JSON 结果写入同一个输出目录
+
+CHINESE_FOLDERS = ['renminwang', 'xinhuawang']
+ENGLISH_FOLDERS = ['english.news', 'en.people']
+SCALE_FOLDERS = ['en.people', 'english.news', 'renminwang', 'xinhuawang']
+
+# 各分析在每个文件夹上需要的分词方式
+SCALE_VARIANTS = ['doc_stats', 'cjk_chars', 'letters', 'words']
+TOPK_VARIANTS = {'cjk_chars': CHINESE_FOLDERS, 'lower_words': ENGLISH_FOLDERS}
+ZIPF_FOLDERS = ENGLISH_FOLDERS
+# 齐夫拟合：分词方式 -> 文件夹（--zh-words 时由 enable_zh_words 加入中文词语）
+ZIPF_VARIANTS = {'lower_words': ZIPF_FOLDERS}
+
+# Top-K：分词方式 -> (绘图函数, 单位, 各文件夹的图片名后缀, 合并数据的图片名)
+TOPK_PLOTS = {
+    'cjk_chars': (plot_top_chars, '中文汉字', '_top10.png', 'combined_top10.png'),
+    'lower_words': (plot_top_words, '英文单词', '_top10.png', 'combined_en_top10.png'),
+    'zh_words': (plot_top_words, '中文词语', '_words_top10.png', 'combined_words_top10.png'),
+}
+
+# 熵分析：分词方式 -> 原脚本模块、各文件夹（标题前缀、规模、图片名）与合并数据的设置
+ENTROPY_TASKS = {
+    'cjk_chars': {
+        'module': cal_ch,
+        'folders': {
+            'renminwang': ('人民网', [i * 100000 for i in range(1, 11)], 'renminwang_entropy.png'),
+            'xinhuawang': ('新华网', [i * 100000 for i in range(1, 11)], 'xinhuawang_entropy.png'),
+        },
+        'combined': ('人民网+新华网合并信息熵随样本规模变化',
+                     [i * 200000 for i in range(1, 11)], 'combined_entropy.png'),
+    },
+    'letters': {
+        'module': cal_en_letters,
+        'folders': {
+            'english.news': ('新华网英文版', [i * 300000 for i in range(1, 6)], 'english.news_entropy.png'),
+            'en.people': ('人民网英文版', [i * 300000 for i in range(1, 6)], 'en.people_entropy.png'),
+        },
+        'combined': ('人民网+新华网英文版合并信息熵随样本规模变化',
+                     [i * 500000 for i in range(1, 9)], 'combined_english_entropy.png'),
+    },
+    'words': {
+        'module': cal_en_words,
+        'folders': {
+            'english.news': ('新华网英文版（单词）', [i * 50000 for i in range(1, 8)],
+                             'english.news_words_entropy.png'),
+            'en.people': ('人民网英文版（单词）', [i * 50000 for i in range(1, 8)],
+                          'en.people_words_entropy.png'),
+        },
+        'combined': ('人民网+新华网英文版合并信息熵（单词）随样本规模变化',
+                     [i * 50000 for i in range(1, 16)], 'combined_english_words_entropy.png'),
+    },
+}
+
+ZH_WORDS_ENTROPY_TASK = {
+    'module': cal_ch_words,
+    'folders': {
+        'renminwang': ('人民网（词语）', [i * 50000 for i in range(1, 11)], 'renminwang_words_entropy.png'),
+        'xinhuawang': ('新华网（词语）', [i * 50000 for i in range(1, 11)], 'xinhuawang_words_entropy.png'),
+    },
+    'combined': ('人民网+新华网合并信息熵（词语）随样本规模变化',
+                 [i * 100000 for i in range(1, 13)], 'combined_words_entropy.png'),
+}
+
+ANALYSES = ['scale', 'top-k', 'entropy', 'zipf']
+
+
+def enable_zh_words():
+    """把中文词语（segmenter.py 分词）加入 Top-K、熵和齐夫分析，与英文单词使用同样的分析"""
+    TOPK_VARIANTS['zh_words'] = CHINESE_FOLDERS
+    ENTROPY_TASKS['zh_words'] = ZH_WORDS_ENTROPY_TASK
+    ZIPF_VARIANTS['zh_words'] = CHINESE_FOLDERS
+
+
+def required_variants(analyses):
+    """汇总所请求的分析在每个文件夹上需要的分词方式：{文件夹: [分词方式, ...]}"""
+    needed = {}
+
+    def need(folder, variant):
+        variants = needed.setdefault(folder, [])
+        if variant not in variants:
+            variants.append(variant)
+
+    if 'scale' in analyses:
+        for folder in SCALE_FOLDERS:
+            for variant in SCALE_VARIANTS:
+                need(folder, variant)
+    if 'top-k' in analyses:
+        for variant, folders in TOPK_VARIANTS.items():
+            for folder in folders:
+                need(folder, variant)
+    if 'entropy' in analyses:
+        for variant, task in ENTROPY_TASKS.items():
+            for folder in task['folders']:
+                need(folder, variant)
+    if 'zipf' in analyses:
+        for variant, folders in ZIPF_VARIANTS.items():
+            for folder in folders:
+                need(folder, variant)
+    return needed
+
+
+def load_corpora(analyses, use_cache=True, incremental=False):
+    """每个文件夹只加载一次，返回 {文件夹: {分词方式: EncodedCorpus 或统计字典}}
+
+    incremental 为 True 时改从统计库（stats_store.py）读取，只处理新增、修改和删除的文档，
+    得到的是 StoredCorpus（只有计数，没有完整的编号序列）。
+    """
+    corpora = {}
+    for folder, variants in required_variants(analyses).items():
+        if not os.path.exists(folder):
+            print(f"文件夹 {folder} 不存在")
+            continue
+        print(f"正在加载 {folder}: {', '.join(variants)}")
+        with profiler.stage("load"):
+            if incremental:
+                corpora[folder] = load_stored(folder, variants)
+            else:
+                corpora[folder] = load_variants(folder, variants, use_cache)
+    return corpora
+
+
+def run_scale(corpora, output_dir):
+    results = {}
+    for folder in SCALE_FOLDERS:
+        if folder not in corpora:
+            continue
+        data = corpora[folder]
+        stats = dict(data['doc_stats'])
+        stats['chinese_chars'] = len(data['cjk_chars'])
+        stats['english_letters'] = len(data['letters'])
+        stats['english_words'] = len(data['words'])
+        print(f"{folder}:")
+        for metric in METRICS:
+            print(f"{METRIC_NAMES[metric]}: {stats[metric]}")
+        results[folder] = stats
+    return results
+
+
+def run_top_k(corpora, output_dir, top=10):
+    results = {}
+    for variant, folders in TOPK_VARIANTS.items():
+        plot, unit, suffix, combined_filename = TOPK_PLOTS[variant]
+        loaded = [folder for folder in folders if folder in corpora]
+        results[variant] = {}
+        combined = None
+        for folder in loaded:
+            corpus = corpora[folder][variant]
+            combined = corpus if combined is None else combined + corpus
+            results[variant][folder] = _print_top(corpus, f"{folder} 文件夹中", unit, top)
+            plot(corpus, f'{folder}文件夹中出现频率最高的{top}个{unit}',
+                 os.path.join(output_dir, f"{folder.replace('.', '_')}{suffix}"))
+        if len(loaded) > 1:
+            results[variant]['combined'] = _print_top(combined, "合并后", unit, top)
+            plot(combined, f'合并后出现频率最高的{top}个{unit}', os.path.join(output_dir, combined_filename))
+    return results
+
+
+def _print_top(corpus, prefix, unit, top):
+    top_items = corpus.most_common(top)
+    print(f"\n{prefix}出现频率最高的{top}个{unit}:")
+    for i, (token, count) in enumerate(top_items, 1):
+        print(f"{i:2d}. {token:<15} : {count:>6} 次")
+    return top_items
+
+
+def run_entropy(corpora, output_dir, max_n=1, estimator='plugin', n_rep=0, band_mode='bootstrap'):
+    results = {}
+    for variant, task in ENTROPY_TASKS.items():
+        module = task['module']
+        results[variant] = {}
+        combined = None
+        for folder, (title_prefix, scales, filename) in task['folders'].items():
+            if folder not in corpora:
+                continue
+            corpus = corpora[folder][variant]
+            combined = corpus if combined is None else combined + corpus
+            print(f"\n正在处理 {folder}（{variant}），共 {len(corpus)} 个符号")
+            results[variant][folder] = _entropy_sweep(
+                module, corpus, scales, f'{title_prefix}信息熵随样本规模变化',
+                os.path.join(output_dir, filename), max_n, estimator, n_rep, band_mode)
+        if combined is not None and len(results[variant]) > 1:
+            title, scales, filename = task['combined']
+            print(f"\n正在处理合并后的数据（{variant}），共 {len(combined)} 个符号")
+            results[variant]['combined'] = _entropy_sweep(
+                module, combined, scales, title, os.path.join(output_dir, filename),
+                max_n, estimator, n_rep, band_mode)
+    return results
+
+
+def _entropy_sweep(module, corpus, scales, title, filename, max_n, estimator='plugin', n_rep=0,
+                   band_mode='bootstrap'):
+    """各规模下的信息熵；max_n > 1 时另外计算 n = 1..max_n 的条件熵，
+    指定修正估计量或重抽样次数时另外给出修正后的熵及置信带，均单独出图"""
+    # 统计库中的语料没有完整序列，由其自身按文档计数向量计算熵曲线
+    sequence = corpus if isinstance(corpus, StoredCorpus) else corpus.ids
+    valid_scales, entropies = module.calculate_entropy_curve(sequence, scales)
+    result = {'scales': list(valid_scales), 'entropies': [float(h) for h in entropies]}
+    if not valid_scales:
+        return result
+    module.plot_entropy_vs_scale(valid_scales, entropies, title, filename)
+    if max_n > 1:
+        conditional = ngram_entropies(corpus.ids, valid_scales, max_n, len(corpus.vocab))
+        for n, hs in conditional.items():
+            print(f"n = {n}: " + ", ".join(f"{h:.4f}" for h in hs))
+        result['conditional'] = {str(n): [float(h) for h in hs] for n, hs in conditional.items()}
+        curves = [(n, [float(h) for h in hs]) for n, hs in conditional.items()]
+        render_chart(draw_ngram_entropy, filename.replace('.png', '_ngram.png'),
+                     valid_scales, curves, title.replace('信息熵', 'n 元条件熵'))
+    if n_rep:
+        point, low, high = entropy_bands(corpus.ids, valid_scales, estimator, band_mode, n_rep,
+                                         vocab_size=len(corpus.vocab))
+        for scale, h, lo, hi in zip(valid_scales, point, low, high):
+            print(f"规模 {scale}: {estimator} = {h:.4f}（95% 区间 {lo:.4f} ~ {hi:.4f}）")
+        result['estimator'] = estimator
+        result['corrected'] = point
+        result['band'] = {'mode': band_mode, 'replicates': n_rep, 'low': low, 'high': high}
+        render_chart(draw_entropy_band, filename.replace('.png', '_band.png'), valid_scales,
+                     [float(h) for h in entropies], point, low, high, estimator,
+                     title.replace('信息熵', f'信息熵（{estimator}）'))
+    elif estimator != 'plugin':
+        corrected = estimate_entropies(corpus.ids, valid_scales, estimator, len(corpus.vocab))
+        for scale, h in zip(valid_scales, corrected):
+            print(f"规模 {scale}: {estimator} = {h:.4f}")
+        result['estimator'] = estimator
+        result['corrected'] = corrected
+    return result
+
+
+def draw_entropy_band(scales, plugin, point, low, high, estimator, title):
+    """绘制修正后的熵估计及其置信带，并与直接代入的估计对比"""
+    plt.figure(figsize=(10, 6))
+    plt.plot(scales, plugin, marker='o', label='plugin')
+    plt.plot(scales, point, marker='s', label=estimator)
+    plt.fill_between(scales, low, high, alpha=0.3, label='95% 区间')
+    plt.xlabel('样本规模 (符号数)')
+    plt.ylabel('信息熵 (比特/符号)')
+    plt.title(title)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+
+
+def draw_ngram_entropy(scales, curves, title):
+    """绘制 n = 1..max_n 的条件熵 H(X_n | X_1..X_{n-1}) 随样本规模变化的曲线"""
+    plt.figure(figsize=(10, 6))
+    for n, entropies in curves:
+        plt.plot(scales, entropies, marker='o', label=f'n = {n}')
+    plt.xlabel('样本规模 (符号数)')
+    plt.ylabel('条件熵 (比特/符号)')
+    plt.title(title)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+
+
+def run_zipf(corpora, output_dir, n_boot=0):
+    """英文单词的结果按文件夹放在顶层（与原 zipf.py 一致），其他分词方式放在 results[分词方式] 下"""
+    results = {}
+    for variant, folders in ZIPF_VARIANTS.items():
+        fits = _zipf_variant(corpora, output_dir, variant, folders, n_boot)
+        if variant == 'lower_words':
+            results.update(fits)
+        else:
+            results[variant] = fits
+    return results
+
+
+def _zipf_variant(corpora, output_dir, variant, folders, n_boot):
+    results = {}
+    combined = None
+    # 英文单词沿用原脚本的图片名，其他分词方式在图片名中加上分词方式
+    tag = '' if variant == 'lower_words' else f'_{variant}'
+    for folder in folders:
+        if folder not in corpora:
+            continue
+        words = corpora[folder][variant]
+        combined = words if combined is None else combined + words
+        results[folder] = _zipf_result(words, folder, f'{folder} 齐夫定律验证 (对数坐标)',
+                                       os.path.join(output_dir,
+                                                    f"{folder.replace('.', '_')}{tag}_zipf_log.png"),
+                                       n_boot)
+    if len(results) > 1:
+        results['combined'] = _zipf_result(combined, '合并数据', '合并数据齐夫定律验证 (对数坐标)',
+                                           os.path.join(output_dir, f'combined{tag}_zipf_log.png'),
+                                           n_boot)
+    return results
+
+
+def _zipf_result(words, name, title, filename, n_boot):
+    slope = plot_zipf_law_log_scale(words.most_common(1000), title, filename)
+    summary = zipf_summary(words.counts(), n_boot=n_boot)
+    print(f"\n{name} 斜率: {slope:.2f}，全词表极大似然指数 s = {summary['mle_s']:.3f}，"
+          f"齐夫-曼德布罗特 s = {summary['mandelbrot_s']:.3f}, q = {summary['mandelbrot_q']:.2f}")
+    return summary
+
+
+RUNNERS = {
+    'scale': run_scale,
+    'top-k': run_top_k,
+    'entropy': run_entropy,
+    'zipf': run_zipf,
+}
+
+
+def write_results(output_dir, analysis, results):
+    """把分析结果写为 JSON（与图表放在同一目录）"""
+    path = os.path.join(output_dir, f"{analysis.replace('-', '_')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="语料统计分析：一次加载语料，完成所有请求的分析")
+    parser.add_argument('command', choices=ANALYSES + ['all'], help="要运行的分析")
+    parser.add_argument('--output-dir', default='images', help="图表与 JSON 结果的输出目录")
+    parser.add_argument('--no-cache', action='store_true', help="不使用分词缓存")
+    parser.add_argument('--force', action='store_true', help="输入未变时也重新渲染图表")
+    parser.add_argument('--max-n', type=int, default=1,
+                        help="entropy 同时计算 n = 1..MAX_N 的 n 元条件熵（默认 1，即只算单符号熵）")
+    parser.add_argument('--estimator', choices=list(ESTIMATORS), default='plugin',
+                        help="entropy 额外给出的修正估计量（默认 plugin，即不修正）")
+    parser.add_argument('--bands', type=int, default=0, metavar='N',
+                        help="entropy 用 N 次重抽样计算置信带（默认 0，不计算）")
+    parser.add_argument('--band-mode', choices=['bootstrap', 'subsample'], default='bootstrap',
+                        help="置信带的重抽样方式：前缀上有放回重抽样，或整个语料中无放回随机抽样")
+    parser.add_argument('--zipf-bootstrap', type=int, default=0, metavar='N',
+                        help="zipf 用 N 次自助重抽样计算极大似然指数的置信区间（默认 0，不计算）")
+    parser.add_argument('--incremental', action='store_true',
+                        help="从增量统计库读取（只处理新增/修改/删除的文档）；entropy 只支持单符号 plugin 熵")
+    parser.add_argument('--zh-words', action='store_true',
+                        help="另外对中文语料分词（segmenter.py），中文词语也做 top-k、entropy 与 zipf 分析")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="同时用 cProfile 记录函数级耗时，保存为 profiles/analyze_<命令>.prof")
+    args = parser.parse_args(argv)
+    if args.incremental and (args.max_n > 1 or args.estimator != 'plugin' or args.bands):
+        parser.error("--incremental 只保存计数，不支持 --max-n、--estimator 和 --bands")
+
+    if args.zh_words:
+        enable_zh_words()
+
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
+    plt.rcParams['axes.unicode_minus'] = False
+
+    analyses = ANALYSES if args.command == 'all' else [args.command]
+    os.makedirs(args.output_dir, exist_ok=True)
+    # 每次运行结束时把各阶段（加载、分词、各项分析、渲染）的耗时、吞吐和峰值内存
+    # 写入 profiles/analyze_<命令>.json / .csv
+    with profile_run(f"analyze_{args.command}", cprofile=args.cprofile or None):
+        corpora = load_corpora(analyses, use_cache=not args.no_cache, incremental=args.incremental)
+        # 所有图表在最后统一用进程池渲染
+        with batch(force=args.force):
+            for analysis in analyses:
+                print(f"\n===== {analysis} =====")
+                with profiler.stage(f"analysis.{analysis}"):
+                    if analysis == 'entropy':
+                        results = run_entropy(corpora, args.output_dir, args.max_n, args.estimator,
+                                              args.bands, args.band_mode)
+                    elif analysis == 'zipf':
+                        results = run_zipf(corpora, args.output_dir, args.zipf_bootstrap)
+                    else:
+                        results = RUNNERS[analysis](corpora, args.output_dir)
+                write_results(args.output_dir, analysis, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import corpus_cache
+from cal_ch import calculate_entropy_for_subset
+from corpus_cache import load_encoded
+from entropy_utils import prefix_entropies
+from topk import stream_counts
+from zipf_fit import zipf_summary
+
+# 性能基准：用确定性的合成语料（词频服从齐夫分布的中文/英文文本）测量分析热点路径，
+# 规模为现有语料的 1x / 10x / 100x，记录各阶段耗时与内存峰值，并与保存的基线比较
+
+DATA_DIR = 'bench_data'
+BASELINE_PATH = 'bench_baseline.json'
+
+# 1x 对应现有语料：每个文件夹 1000 个文件，人民网每个文件约 1300 个汉字，人民网英文版约 430 个单词
+FILES_PER_SCALE = 1000
+CHINESE_CHARS_PER_FILE = 1300
+ENGLISH_WORDS_PER_FILE = 430
+# 词表大小与齐夫指数（与现有语料的不同汉字/单词数和拟合结果同一量级）
+CHINESE_VOCAB = 5000
+ENGLISH_VOCAB = 30000
+CHINESE_EXPONENT = 1.0
+ENGLISH_EXPONENT = 1.1
+
+# 耗时差小于该值（秒）时不算退步，避免毫秒级阶段的计时抖动被误报
+NOISE_SECONDS = 0.01
+
+STAGES = ['extract_cold', 'extract_warm', 'entropy_curve', 'entropy_subset', 'most_common',
+          'counter_most_common', 'stream_count', 'zipf_fit']
+
+
+def _zipf_cdf(vocab_size, exponent):
+    weights = np.arange(1, vocab_size + 1, dtype=np.float64) ** -exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def _chinese_vocab(rng):
+    """从 一-龥 中随机选出的汉字，排在前面的为高频字"""
+    return rng.choice(np.arange(0x4e00, 0x9fa6, dtype=np.uint32), CHINESE_VOCAB, replace=False)
+
+
+def _english_vocab(rng):
+    """随机拼出的不重复小写单词（长度 1～12，约 2% 带 's），排在前面的为高频词"""
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    words = []
+    seen = set()
+    while len(words) < ENGLISH_VOCAB:
+        length = min(12, 1 + rng.geometric(0.25))
+        word = ''.join(rng.choice(letters, length))
+        if rng.random() < 0.02:
+            word += "'s"
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    # 短词更常见：按长度稳定排序后作为排名
+    words.sort(key=len)
+    return np.array(words, dtype=object)
+
+
+def _chinese_text(rng, vocab, cdf, n_chars):
+    codes = vocab[np.searchsorted(cdf, rng.random(n_chars))]
+    # 按一定比例把汉字替换为标点，保证分词时有需要跳过的字符
+    marks = rng.random(n_chars)
+    codes = np.where(marks < 0.03, ord('。'), np.where(marks < 0.08, ord('，'), codes)).astype('<u4')
+    return codes.tobytes().decode('utf-32-le') + '\n'
+
+
+def _english_text(rng, vocab, cdf, n_words):
+    words = vocab[np.searchsorted(cdf, rng.random(n_words))].tolist()
+    # 约每 18 个词一句：句末加句号，下一句首字母大写
+    for i in np.flatnonzero(rng.random(n_words) < 1 / 18):
+        words[i] += '.'
+        if i + 1 < n_words:
+            words[i + 1] = words[i + 1].capitalize()
+    return ' '.join(words) + '\n'
+
+
+def generate_corpus(folder, lang, scale, seed=0):
+    """在 folder 中生成确定性的合成语料（已按相同参数生成过则直接复用），返回文件数
+
+    同一 seed 下每个文件的内容只由 (语言, 文件序号) 决定，不同规模的语料前缀相同。
+    """
+    n_files = FILES_PER_SCALE * scale
+    meta = {'lang': lang, 'files': n_files, 'seed': seed}
+    meta_path = os.path.join(folder, '.bench_meta.json')
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) == meta:
+                return n_files
+    except (FileNotFoundError, ValueError):
+        pass
+
+    os.makedirs(folder, exist_ok=True)
+    lang_code = 0 if lang == 'zh' else 1
+    vocab_rng = np.random.default_rng([seed, lang_code])
+    if lang == 'zh':
+        vocab, cdf = _chinese_vocab(vocab_rng), _zipf_cdf(CHINESE_VOCAB, CHINESE_EXPONENT)
+    else:
+        vocab, cdf = _english_vocab(vocab_rng), _zipf_cdf(ENGLISH_VOCAB, ENGLISH_EXPONENT)
+    for i in range(n_files):
+        rng = np.random.default_rng([seed, lang_code, i + 1])
+        if lang == 'zh':
+            text = _chinese_text(rng, vocab, cdf, CHINESE_CHARS_PER_FILE)
+        else:
+            text = _english_text(rng, vocab, cdf, ENGLISH_WORDS_PER_FILE)
+        with open(os.path.join(folder, f'{lang}_{i + 1}.txt'), 'w', encoding='utf-8') as f:
+            f.write(text)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return n_files
+
+
+def _stage_functions(folder, lang):
+    """各阶段的 (名称, 函数)；函数返回处理的符号数
+
+    先加载一次两种分词结果（同时建立缓存），extract_warm 测的是缓存命中的情形，
+    其余阶段都复用这里加载的语料。
+    """
+    entropy_variant = 'cjk_chars' if lang == 'zh' else 'words'
+    count_variant = 'cjk_chars' if lang == 'zh' else 'lower_words'
+    state = {'corpus': load_encoded(folder, entropy_variant),
+             'counted': load_encoded(folder, count_variant)}
+
+    def extract_cold():
+        return len(load_encoded(folder, entropy_variant, use_cache=False))
+
+    def extract_warm():
+        return len(load_encoded(folder, entropy_variant))
+
+    def entropy_curve():
+        ids = state['corpus'].ids
+        prefix_entropies(ids, [len(ids) * k // 10 for k in range(1, 11)])
+        return len(ids)
+
+    def entropy_subset():
+        ids = state['corpus'].ids
+        calculate_entropy_for_subset(ids, len(ids) // 2)
+        return len(ids) // 2
+
+    def most_common():
+        state['counted'].most_common(10)
+        return len(state['counted'])
+
+    def counter_most_common():
+        state['counted'].to_counter().most_common(10)
+        return len(state['counted'])
+
+    def stream_count():
+        return sum(stream_counts(folder, count_variant).values())
+
+    def zipf_fit():
+        if lang != 'en':
+            return None
+        return zipf_summary(state['counted'].counts())['tokens']
+
+    stages = dict(extract_cold=extract_cold, extract_warm=extract_warm, entropy_curve=entropy_curve,
+                  entropy_subset=entropy_subset, most_common=most_common,
+                  counter_most_common=counter_most_common, stream_count=stream_count,
+                  zipf_fit=zipf_fit)
+    return [(name, stages[name]) for name in STAGES]
+
+
+def _measure(func, repeat, memory):
+    """取 repeat 次中最快的耗时；memory 为 True 时再用 tracemalloc 单独运行一次测内存峰值
+
+    计时与测内存分开进行，tracemalloc 的开销不会计入耗时。多进程分词时只统计主进程的分配。
+    """
+    best = None
+    items = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak_mb = None
+    if memory and items is not None:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        finally:
+            tracemalloc.stop()
+    return best, peak_mb, items
+
+
+def run_benchmarks(langs, scales, data_dir=DATA_DIR, repeat=3, memory=True, seed=0):
+    """生成（或复用）合成语料并测量各阶段，返回 {'<语言>/<规模>x/<阶段>': {...}}"""
+    # 基准语料的分词缓存与真实语料分开存放
+    corpus_cache.CACHE_DIR = os.path.join(data_dir, '.corpus_cache')
+    results = {}
+    for lang in langs:
+        for scale in scales:
+            folder = os.path.join(data_dir, f'{lang}_{scale}x')
+            start = time.perf_counter()
+            n_files = generate_corpus(folder, lang, scale, seed)
+            print(f"\n{folder}: {n_files} 个文件（准备用时 {time.perf_counter() - start:.1f} 秒）")
+            for name, func in _stage_functions(folder, lang):
+                seconds, peak_mb, items = _measure(func, repeat, memory)
+                if items is None:
+                    continue
+                key = f'{lang}/{scale}x/{name}'
+                results[key] = {'seconds': seconds, 'peak_mb': peak_mb, 'items': items,
+                                'items_per_sec': items / seconds if seconds > 0 else None}
+                memory_text = f"，内存峰值 {peak_mb:8.1f} MB" if peak_mb is not None else ""
+                print(f"  {name:<20} {seconds:8.3f} 秒，{items / max(seconds, 1e-9):14,.0f} 符号/秒"
+                      + memory_text)
+    return results
+
+
+def environment():
+    return {'python': sys.version.split()[0], 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'corpus_workers': corpus_cache.WORKERS}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """与基线比较，打印耗时和内存的倍数；超过 1 + tolerance 的记为退步（耗时还需差出 NOISE_SECONDS），
+    返回退步项列表"""
+    regressions = []
+    print(f"\n与基线比较（超过 {1 + tolerance:.2f} 倍记为退步）:")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            print(f"  {key:<36} 基线中没有此项")
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else None
+        mem_ratio = (result['peak_mb'] / base['peak_mb']
+                     if result.get('peak_mb') and base.get('peak_mb') else None)
+        flags = []
+        if (time_ratio is not None and time_ratio > 1 + tolerance
+                and result['seconds'] - base['seconds'] > NOISE_SECONDS):
+            flags.append('耗时')
+        if mem_ratio is not None and mem_ratio > 1 + tolerance:
+            flags.append('内存')
+        # 基线耗时为 0（计时精度以下）时没有倍数
+        time_text = f"{time_ratio:5.2f}x" if time_ratio is not None else "    -"
+        mem_text = f"，内存 {mem_ratio:5.2f}x" if mem_ratio is not None else ""
+        mark = f"  <- {'、'.join(flags)}退步" if flags else ""
+        print(f"  {key:<36} 耗时 {time_text}{mem_text}{mark}")
+        if flags:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分析热点路径的性能基准（合成齐夫分布语料）")
+    parser.add_argument('--lang', nargs='+', choices=['zh', 'en'], default=['zh', 'en'],
+                        help="合成语料的语言")
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10],
+                        help="相对现有语料的规模倍数（默认 1 10，可加 100）")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="合成语料及其缓存的目录")
+    parser.add_argument('--repeat', type=int, default=3, help="每个阶段计时的次数（取最快一次）")
+    parser.add_argument('--no-memory', action='store_true', help="不单独测量内存峰值")
+    parser.add_argument('--seed', type=int, default=0, help="合成语料的随机种子")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="基线文件")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="允许的相对退步幅度（默认 0.2，即慢 20%% 以内不报告）")
+    parser.add_argument('--output', help="把本次结果另存为 JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.lang, args.scales, args.data_dir, args.repeat,
+                             not args.no_memory, args.seed)
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        # 与已有基线合并，只覆盖本次测过的项目
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                previous = json.load(f).get('results', {})
+        report['results'] = {**previous, **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已写入 {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != report['environment']:
+            print("\n注意：基线是在不同环境下测得的，倍数仅供参考")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        return 1 if regressions else 0
+    print(f"\n没有基线文件 {args.baseline}，可用 --save-baseline 保存本次结果")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,50 @@
-import os
-import re
-import math
-from collections import Counter
+import argparse
 import matplotlib.pyplot as plt
+from corpus_cache import iter_file_tokens, load_encoded
+from entropy_utils import prefix_entropies
+from profiling import profile_run
+from render import batch, render_chart
+from sketch import sketch_prefix_entropies
 
 def extract_chinese_chars_from_folder(folder_path):
     """从指定文件夹中提取所有txt文件的中文字符"""
-    all_chinese_chars = []
-    
-    # 获取所有txt文件
-    txt_files = [f for f in os.listdir(folder_path) if f.endswith(".txt")]
-    
-    for filename in txt_files:
-        filepath = os.path.join(folder_path, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                text = f.read()
-                # 只保留中文汉字（\u4e00-\u9fa5）
-                chinese_chars = re.findall(r'[\u4e00-\u9fa5]', text)
-                all_chinese_chars.extend(chinese_chars)
-        except Exception as e:
-            print(f"⚠️ 读取文件 {filepath} 时出错：{e}")
-    
-    return all_chinese_chars
+    # 分词结果按文件缓存，并编码为整数数组（EncodedCorpus），避免逐符号的 str 对象
+    return load_encoded(folder_path, 'cjk_chars')
 
 def calculate_entropy_for_subset(chars, subset_size):
     """计算指定大小子集的信息熵"""
-    if len(chars) < subset_size:
-        subset = chars
-    else:
-        subset = chars[:subset_size]
-    
-    # 统计每个汉字的频次
-    char_counts = Counter(subset)
-    total = sum(char_counts.values())
+    return prefix_entropies(chars, [subset_size])[0]
+
+def calculate_entropy_curve(chars, scales):
+    """一次遍历计算各规模下的信息熵，返回有效规模及对应的熵"""
+    valid_scales = []
+    for scale in scales:
+        if scale > len(chars):
+            break
+        valid_scales.append(scale)
     
-    # 计算信息熵
-    entropy = 0.0
-    for count in char_counts.values():
-        p = count / total
-        entropy -= p * math.log2(p)
+    # 各规模共用同一次前缀遍历，检查点再多也只统计一遍
+    entropies = prefix_entropies(chars, valid_scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/字")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际字符总数 {len(chars)}")
     
-    return entropy
+    return valid_scales, entropies
 
-def plot_entropy_vs_scale(scales, entropies, title, filename):
+def calculate_sketch_entropy_curve(folder_paths, scales):
+    """sketch 模式：按顺序流式读取各文件夹，用熵 sketch 估计各规模下的熵（内存固定，不加载完整序列）"""
+    token_lists = (tokens for folder_path in folder_paths
+                   for _, tokens in iter_file_tokens(folder_path, 'cjk_chars'))
+    valid_scales, entropies = sketch_prefix_entropies(token_lists, scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 ≈ {entropy:.4f} 比特/字（sketch 估计）")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际字符总数")
+    
+    return valid_scales, entropies
+
+def draw_entropy_vs_scale(scales, entropies, title):
     """绘制熵随样本规模变化的图表"""
     plt.figure(figsize=(10, 6))
     plt.plot(scales, entropies, marker='o')
@@ -52,30 +53,25 @@ def plot_entropy_vs_scale(scales, entropies, title, filename):
     plt.title(title)
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(filename)
-    plt.show()
 
-def process_single_folder(folder_path, scales, title_prefix):
-    """处理单个文件夹并生成图表"""
+def plot_entropy_vs_scale(scales, entropies, title, filename):
+    """保存熵随样本规模变化的图表（非交互渲染，输入未变时跳过）"""
+    render_chart(draw_entropy_vs_scale, filename, scales, entropies, title)
+
+def process_single_folder(folder_path, scales, title_prefix, sketch=False):
+    """处理单个文件夹并生成图表；sketch=True 时流式估计，返回 None"""
     print(f"正在处理文件夹: {folder_path}")
     
-    # 提取所有中文字符
-    all_chars = extract_chinese_chars_from_folder(folder_path)
-    print(f"总共提取到 {len(all_chars)} 个中文字符")
-    
-    # 计算不同规模下的信息熵
-    entropies = []
-    valid_scales = []
-    
-    for scale in scales:
-        if scale <= len(all_chars):
-            entropy = calculate_entropy_for_subset(all_chars, scale)
-            entropies.append(entropy)
-            valid_scales.append(scale)
-            print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/字")
-        else:
-            print(f"警告: 请求规模 {scale} 超过了实际字符总数 {len(all_chars)}")
-            break
+    if sketch:
+        all_chars = None
+        valid_scales, entropies = calculate_sketch_entropy_curve([folder_path], scales)
+    else:
+        # 提取所有中文字符
+        all_chars = extract_chinese_chars_from_folder(folder_path)
+        print(f"总共提取到 {len(all_chars)} 个中文字符")
+        
+        # 计算不同规模下的信息熵
+        valid_scales, entropies = calculate_entropy_curve(all_chars.ids, scales)
     
     # 绘制图表
     if valid_scales:
@@ -88,7 +84,7 @@ def process_single_folder(folder_path, scales, title_prefix):
     
     return all_chars
 
-def main():
+def main(sketch=False):
     # 设置中文字体
     plt.rcParams['font.sans-serif'] = ['SimHei']
     plt.rcParams['axes.unicode_minus'] = False
@@ -98,7 +94,8 @@ def main():
     renminwang_chars = process_single_folder(
         "renminwang", 
         renminwang_scales, 
-        "人民网"
+        "人民网",
+        sketch
     )
     
     # 处理 xinhuawang 文件夹 (10w, 20w, ..., 100w)
@@ -106,27 +103,23 @@ def main():
     xinhuawang_chars = process_single_folder(
         "xinhuawang", 
         xinhuawang_scales, 
-        "新华网"
+        "新华网",
+        sketch
     )
     
     # 合并两个文件夹的内容并处理 (20w, 40w, ..., 200w)
-    combined_chars = renminwang_chars + xinhuawang_chars
-    print(f"\n合并后总字符数: {len(combined_chars)}")
-    
     combined_scales = [i * 200000 for i in range(1, 11)]  # 20万, 40万, ..., 200万
-    combined_entropies = []
-    combined_valid_scales = []
     
-    print("\n正在处理合并后的数据:")
-    for scale in combined_scales:
-        if scale <= len(combined_chars):
-            entropy = calculate_entropy_for_subset(combined_chars, scale)
-            combined_entropies.append(entropy)
-            combined_valid_scales.append(scale)
-            print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/字")
-        else:
-            print(f"警告: 请求规模 {scale} 超过了实际字符总数 {len(combined_chars)}")
-            break
+    if sketch:
+        print("\n正在处理合并后的数据:")
+        # 按与拼接相同的顺序流式读取两个文件夹
+        combined_valid_scales, combined_entropies = calculate_sketch_entropy_curve(
+            ["renminwang", "xinhuawang"], combined_scales)
+    else:
+        combined_chars = renminwang_chars + xinhuawang_chars
+        print(f"\n合并后总字符数: {len(combined_chars)}")
+        print("\n正在处理合并后的数据:")
+        combined_valid_scales, combined_entropies = calculate_entropy_curve(combined_chars.ids, combined_scales)
     
     # 绘制合并数据的图表
     if combined_valid_scales:
@@ -138,4 +131,10 @@ def main():
         )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sketch', action='store_true',
+                        help="逐个文件流式读取、用熵 sketch 估计（内存固定，适合放不进内存的语料）")
+    args = parser.parse_args()
+    # 所有图表在最后统一用进程池渲染；结束时把各阶段耗时写入 profiles/cal_ch.json / .csv
+    with profile_run("cal_ch"), batch():
+        main(sketch=args.sketch)
\ No newline at end of file
@@ -0,0 +1,141 @@
+import argparse
+import matplotlib.pyplot as plt
+from corpus_cache import iter_file_tokens, load_encoded
+from entropy_utils import prefix_entropies
+from profiling import profile_run
+from render import batch, render_chart
+from sketch import sketch_prefix_entropies
+
+def extract_chinese_words_from_folder(folder_path):
+    """从指定文件夹中提取所有txt文件的中文词语"""
+    # 用 segmenter.py 的语料词典分词（词典不存在时先由人民网、新华网语料建立），
+    # 分词结果按文件缓存，并编码为整数数组（EncodedCorpus）
+    return load_encoded(folder_path, 'zh_words')
+
+def calculate_entropy_for_subset(words, subset_size):
+    """计算指定大小子集的信息熵"""
+    return prefix_entropies(words, [subset_size])[0]
+
+def calculate_entropy_curve(words, scales):
+    """一次遍历计算各规模下的信息熵，返回有效规模及对应的熵"""
+    valid_scales = []
+    for scale in scales:
+        if scale > len(words):
+            break
+        valid_scales.append(scale)
+
+    # 各规模共用同一次前缀遍历，检查点再多也只统计一遍
+    entropies = prefix_entropies(words, valid_scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/词")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际词语总数 {len(words)}")
+
+    return valid_scales, entropies
+
+def calculate_sketch_entropy_curve(folder_paths, scales):
+    """sketch 模式：按顺序流式读取各文件夹，用熵 sketch 估计各规模下的熵（内存固定，不加载完整序列）"""
+    token_lists = (tokens for folder_path in folder_paths
+                   for _, tokens in iter_file_tokens(folder_path, 'zh_words'))
+    valid_scales, entropies = sketch_prefix_entropies(token_lists, scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 ≈ {entropy:.4f} 比特/词（sketch 估计）")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际词语总数")
+
+    return valid_scales, entropies
+
+def draw_entropy_vs_scale(scales, entropies, title):
+    """绘制熵随样本规模变化的图表"""
+    plt.figure(figsize=(10, 6))
+    plt.plot(scales, entropies, marker='o')
+    plt.xlabel('样本规模 (词数)')
+    plt.ylabel('信息熵 (比特/词)')
+    plt.title(title)
+    plt.grid(True)
+    plt.tight_layout()
+
+def plot_entropy_vs_scale(scales, entropies, title, filename):
+    """保存熵随样本规模变化的图表（非交互渲染，输入未变时跳过）"""
+    render_chart(draw_entropy_vs_scale, filename, scales, entropies, title)
+
+def process_single_folder(folder_path, scales, title_prefix, sketch=False):
+    """处理单个文件夹并生成图表；sketch=True 时流式估计，返回 None"""
+    print(f"正在处理文件夹: {folder_path}")
+
+    if sketch:
+        all_words = None
+        valid_scales, entropies = calculate_sketch_entropy_curve([folder_path], scales)
+    else:
+        # 提取所有中文词语
+        all_words = extract_chinese_words_from_folder(folder_path)
+        print(f"总共提取到 {len(all_words)} 个中文词语")
+
+        # 计算不同规模下的信息熵
+        valid_scales, entropies = calculate_entropy_curve(all_words.ids, scales)
+
+    # 绘制图表
+    if valid_scales:
+        plot_entropy_vs_scale(
+            valid_scales,
+            entropies,
+            f'{title_prefix}信息熵随样本规模变化',
+            f'{folder_path}_words_entropy.png'
+        )
+
+    return all_words
+
+def main(sketch=False):
+    # 设置中文字体
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
+    plt.rcParams['axes.unicode_minus'] = False
+
+    # 处理 renminwang 文件夹 (5w, 10w, ..., 50w)
+    renminwang_scales = [i * 50000 for i in range(1, 11)]  # 5万, 10万, ..., 50万
+    renminwang_words = process_single_folder(
+        "renminwang",
+        renminwang_scales,
+        "人民网（词语）",
+        sketch
+    )
+
+    # 处理 xinhuawang 文件夹 (5w, 10w, ..., 50w)
+    xinhuawang_scales = [i * 50000 for i in range(1, 11)]  # 5万, 10万, ..., 50万
+    xinhuawang_words = process_single_folder(
+        "xinhuawang",
+        xinhuawang_scales,
+        "新华网（词语）",
+        sketch
+    )
+
+    # 合并两个文件夹的内容并处理 (10w, 20w, ..., 120w)
+    combined_scales = [i * 100000 for i in range(1, 13)]  # 10万, 20万, ..., 120万
+
+    if sketch:
+        print("\n正在处理合并后的数据:")
+        # 按与拼接相同的顺序流式读取两个文件夹
+        combined_valid_scales, combined_entropies = calculate_sketch_entropy_curve(
+            ["renminwang", "xinhuawang"], combined_scales)
+    else:
+        combined_words = renminwang_words + xinhuawang_words
+        print(f"\n合并后总词语数: {len(combined_words)}")
+        print("\n正在处理合并后的数据:")
+        combined_valid_scales, combined_entropies = calculate_entropy_curve(combined_words.ids, combined_scales)
+
+    # 绘制合并数据的图表
+    if combined_valid_scales:
+        plot_entropy_vs_scale(
+            combined_valid_scales,
+            combined_entropies,
+            '人民网+新华网合并信息熵（词语）随样本规模变化',
+            'combined_words_entropy.png'
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sketch', action='store_true',
+                        help="逐个文件流式读取、用熵 sketch 估计（内存固定，适合放不进内存的语料）")
+    args = parser.parse_args()
+    # 所有图表在最后统一用进程池渲染；结束时把各阶段耗时写入 profiles/cal_ch_words.json / .csv
+    with profile_run("cal_ch_words"), batch():
+        main(sketch=args.sketch)
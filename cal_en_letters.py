@@ -1,51 +1,50 @@
-import os
-import re
-import math
-from collections import Counter
+import argparse
 import matplotlib.pyplot as plt
+from corpus_cache import iter_file_tokens, load_encoded
+from entropy_utils import prefix_entropies
+from profiling import profile_run
+from render import batch, render_chart
+from sketch import sketch_prefix_entropies
 
 def extract_english_letters_from_folder(folder_path):
     """从指定文件夹中提取所有txt文件的英文字母"""
-    all_english_letters = []
-    
-    # 获取所有txt文件
-    txt_files = [f for f in os.listdir(folder_path) if f.endswith(".txt")]
-    
-    for filename in txt_files:
-        filepath = os.path.join(folder_path, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                text = f.read()
-                # 只保留英文字母（a-z, A-Z）
-                english_letters = re.findall(r'[a-zA-Z]', text)
-                # 转换为小写统一处理
-                english_letters = [letter.lower() for letter in english_letters]
-                all_english_letters.extend(english_letters)
-        except Exception as e:
-            print(f"⚠️ 读取文件 {filepath} 时出错：{e}")
-    
-    return all_english_letters
+    # 分词结果按文件缓存，并编码为整数数组（EncodedCorpus），避免逐符号的 str 对象
+    return load_encoded(folder_path, 'letters')
 
 def calculate_entropy_for_subset(letters, subset_size):
     """计算指定大小子集的信息熵"""
-    if len(letters) < subset_size:
-        subset = letters
-    else:
-        subset = letters[:subset_size]
-    
-    # 统计每个英文字母的频次
-    letter_counts = Counter(subset)
-    total = sum(letter_counts.values())
+    return prefix_entropies(letters, [subset_size])[0]
+
+def calculate_entropy_curve(letters, scales):
+    """一次遍历计算各规模下的信息熵，返回有效规模及对应的熵"""
+    valid_scales = []
+    for scale in scales:
+        if scale > len(letters):
+            break
+        valid_scales.append(scale)
     
-    # 计算信息熵
-    entropy = 0.0
-    for count in letter_counts.values():
-        p = count / total
-        entropy -= p * math.log2(p)
+    # 各规模共用同一次前缀遍历，检查点再多也只统计一遍
+    entropies = prefix_entropies(letters, valid_scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/字母")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际字母总数 {len(letters)}")
     
-    return entropy
+    return valid_scales, entropies
 
-def plot_entropy_vs_scale(scales, entropies, title, filename):
+def calculate_sketch_entropy_curve(folder_paths, scales):
+    """sketch 模式：按顺序流式读取各文件夹，用熵 sketch 估计各规模下的熵（内存固定，不加载完整序列）"""
+    token_lists = (tokens for folder_path in folder_paths
+                   for _, tokens in iter_file_tokens(folder_path, 'letters'))
+    valid_scales, entropies = sketch_prefix_entropies(token_lists, scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 ≈ {entropy:.4f} 比特/字母（sketch 估计）")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际字母总数")
+    
+    return valid_scales, entropies
+
+def draw_entropy_vs_scale(scales, entropies, title):
     """绘制熵随样本规模变化的图表"""
     plt.figure(figsize=(10, 6))
     plt.plot(scales, entropies, marker='o')
@@ -54,30 +53,25 @@ def plot_entropy_vs_scale(scales, entropies, title, filename):
     plt.title(title)
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(filename)
-    plt.show()
 
-def process_single_folder(folder_path, scales, title_prefix):
-    """处理单个文件夹并生成图表"""
+def plot_entropy_vs_scale(scales, entropies, title, filename):
+    """保存熵随样本规模变化的图表（非交互渲染，输入未变时跳过）"""
+    render_chart(draw_entropy_vs_scale, filename, scales, entropies, title)
+
+def process_single_folder(folder_path, scales, title_prefix, sketch=False):
+    """处理单个文件夹并生成图表；sketch=True 时流式估计，返回 None"""
     print(f"正在处理文件夹: {folder_path}")
     
-    # 提取所有英文字母
-    all_letters = extract_english_letters_from_folder(folder_path)
-    print(f"总共提取到 {len(all_letters)} 个英文字母")
-    
-    # 计算不同规模下的信息熵
-    entropies = []
-    valid_scales = []
-    
-    for scale in scales:
-        if scale <= len(all_letters):
-            entropy = calculate_entropy_for_subset(all_letters, scale)
-            entropies.append(entropy)
-            valid_scales.append(scale)
-            print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/字母")
-        else:
-            print(f"警告: 请求规模 {scale} 超过了实际字母总数 {len(all_letters)}")
-            break
+    if sketch:
+        all_letters = None
+        valid_scales, entropies = calculate_sketch_entropy_curve([folder_path], scales)
+    else:
+        # 提取所有英文字母
+        all_letters = extract_english_letters_from_folder(folder_path)
+        print(f"总共提取到 {len(all_letters)} 个英文字母")
+        
+        # 计算不同规模下的信息熵
+        valid_scales, entropies = calculate_entropy_curve(all_letters.ids, scales)
     
     # 绘制图表
     if valid_scales:
@@ -90,7 +84,7 @@ def process_single_folder(folder_path, scales, title_prefix):
     
     return all_letters
 
-def main():
+def main(sketch=False):
     # 设置中文字体
     plt.rcParams['font.sans-serif'] = ['SimHei']
     plt.rcParams['axes.unicode_minus'] = False
@@ -100,7 +94,8 @@ def main():
     english_news_letters = process_single_folder(
         "english.news", 
         english_news_scales, 
-        "新华网英文版"
+        "新华网英文版",
+        sketch
     )
     
     # 处理 en.people 文件夹 (30w, 60w, ..., 150w)
@@ -108,27 +103,23 @@ def main():
     en_people_letters = process_single_folder(
         "en.people", 
         en_people_scales, 
-        "人民网英文版"
+        "人民网英文版",
+        sketch
     )
     
     # 合并两个文件夹的内容并处理 (50w, 100w, 150w, ..., 400w)
-    combined_letters = english_news_letters + en_people_letters
-    print(f"\n合并后总字母数: {len(combined_letters)}")
-    
     combined_scales = [i * 500000 for i in range(1, 9)]  # 50万, 100万, ..., 400万
-    combined_entropies = []
-    combined_valid_scales = []
     
-    print("\n正在处理合并后的数据:")
-    for scale in combined_scales:
-        if scale <= len(combined_letters):
-            entropy = calculate_entropy_for_subset(combined_letters, scale)
-            combined_entropies.append(entropy)
-            combined_valid_scales.append(scale)
-            print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/字母")
-        else:
-            print(f"警告: 请求规模 {scale} 超过了实际字母总数 {len(combined_letters)}")
-            break
+    if sketch:
+        print("\n正在处理合并后的数据:")
+        # 按与拼接相同的顺序流式读取两个文件夹
+        combined_valid_scales, combined_entropies = calculate_sketch_entropy_curve(
+            ["english.news", "en.people"], combined_scales)
+    else:
+        combined_letters = english_news_letters + en_people_letters
+        print(f"\n合并后总字母数: {len(combined_letters)}")
+        print("\n正在处理合并后的数据:")
+        combined_valid_scales, combined_entropies = calculate_entropy_curve(combined_letters.ids, combined_scales)
     
     # 绘制合并数据的图表
     if combined_valid_scales:
@@ -140,4 +131,10 @@ def main():
         )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sketch', action='store_true',
+                        help="逐个文件流式读取、用熵 sketch 估计（内存固定，适合放不进内存的语料）")
+    args = parser.parse_args()
+    # 所有图表在最后统一用进程池渲染；结束时把各阶段耗时写入 profiles/cal_en_letters.json / .csv
+    with profile_run("cal_en_letters"), batch():
+        main(sketch=args.sketch)
\ No newline at end of file
@@ -1,50 +1,50 @@
-import os
-import re
-import math
-from collections import Counter
+import argparse
 import matplotlib.pyplot as plt
+from corpus_cache import iter_file_tokens, load_encoded
+from entropy_utils import prefix_entropies
+from profiling import profile_run
+from render import batch, render_chart
+from sketch import sketch_prefix_entropies
 
 def extract_english_words_from_folder(folder_path):
     """从指定文件夹中提取所有txt文件的英文单词"""
-    all_english_words = []
-    
-    # 获取所有txt文件
-    txt_files = [f for f in os.listdir(folder_path) if f.endswith(".txt")]
-    
-    for filename in txt_files:
-        filepath = os.path.join(folder_path, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                text = f.read()
-                # 使用更精确的正则表达式提取英文单词
-                # 匹配由字母、数字、撇号和连字符组成的单词，但不以撇号或连字符开头或结尾
-                english_words = re.findall(r"[a-zA-Z]+(?:'[a-zA-Z]+)?", text)
-                all_english_words.extend(english_words)
-        except Exception as e:
-            print(f"⚠️ 读取文件 {filepath} 时出错：{e}")
-    
-    return all_english_words
+    # 分词结果按文件缓存，并编码为整数数组（EncodedCorpus），避免逐符号的 str 对象
+    return load_encoded(folder_path, 'words')
 
 def calculate_entropy_for_subset(words, subset_size):
     """计算指定大小子集的信息熵"""
-    if len(words) < subset_size:
-        subset = words
-    else:
-        subset = words[:subset_size]
-    
-    # 统计每个英文单词的频次
-    word_counts = Counter(subset)
-    total = sum(word_counts.values())
+    return prefix_entropies(words, [subset_size])[0]
+
+def calculate_entropy_curve(words, scales):
+    """一次遍历计算各规模下的信息熵，返回有效规模及对应的熵"""
+    valid_scales = []
+    for scale in scales:
+        if scale > len(words):
+            break
+        valid_scales.append(scale)
     
-    # 计算信息熵
-    entropy = 0.0
-    for count in word_counts.values():
-        p = count / total
-        entropy -= p * math.log2(p)
+    # 各规模共用同一次前缀遍历，检查点再多也只统计一遍
+    entropies = prefix_entropies(words, valid_scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/单词")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际单词总数 {len(words)}")
     
-    return entropy
+    return valid_scales, entropies
 
-def plot_entropy_vs_scale(scales, entropies, title, filename):
+def calculate_sketch_entropy_curve(folder_paths, scales):
+    """sketch 模式：按顺序流式读取各文件夹，用熵 sketch 估计各规模下的熵（内存固定，不加载完整序列）"""
+    token_lists = (tokens for folder_path in folder_paths
+                   for _, tokens in iter_file_tokens(folder_path, 'words'))
+    valid_scales, entropies = sketch_prefix_entropies(token_lists, scales)
+    for scale, entropy in zip(valid_scales, entropies):
+        print(f"规模 {scale}: 熵 ≈ {entropy:.4f} 比特/单词（sketch 估计）")
+    if len(valid_scales) < len(scales):
+        print(f"警告: 请求规模 {scales[len(valid_scales)]} 超过了实际单词总数")
+    
+    return valid_scales, entropies
+
+def draw_entropy_vs_scale(scales, entropies, title):
     """绘制熵随样本规模变化的图表"""
     plt.figure(figsize=(10, 6))
     plt.plot(scales, entropies, marker='o')
@@ -53,30 +53,25 @@ def plot_entropy_vs_scale(scales, entropies, title, filename):
     plt.title(title)
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(filename)
-    plt.show()
 
-def process_single_folder(folder_path, scales, title_prefix):
-    """处理单个文件夹并生成图表"""
+def plot_entropy_vs_scale(scales, entropies, title, filename):
+    """保存熵随样本规模变化的图表（非交互渲染，输入未变时跳过）"""
+    render_chart(draw_entropy_vs_scale, filename, scales, entropies, title)
+
+def process_single_folder(folder_path, scales, title_prefix, sketch=False):
+    """处理单个文件夹并生成图表；sketch=True 时流式估计，返回 None"""
     print(f"正在处理文件夹: {folder_path}")
     
-    # 提取所有英文单词
-    all_words = extract_english_words_from_folder(folder_path)
-    print(f"总共提取到 {len(all_words)} 个英文单词")
-    
-    # 计算不同规模下的信息熵
-    entropies = []
-    valid_scales = []
-    
-    for scale in scales:
-        if scale <= len(all_words):
-            entropy = calculate_entropy_for_subset(all_words, scale)
-            entropies.append(entropy)
-            valid_scales.append(scale)
-            print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/单词")
-        else:
-            print(f"警告: 请求规模 {scale} 超过了实际单词总数 {len(all_words)}")
-            break
+    if sketch:
+        all_words = None
+        valid_scales, entropies = calculate_sketch_entropy_curve([folder_path], scales)
+    else:
+        # 提取所有英文单词
+        all_words = extract_english_words_from_folder(folder_path)
+        print(f"总共提取到 {len(all_words)} 个英文单词")
+        
+        # 计算不同规模下的信息熵
+        valid_scales, entropies = calculate_entropy_curve(all_words.ids, scales)
     
     # 绘制图表
     if valid_scales:
@@ -89,7 +84,7 @@ def process_single_folder(folder_path, scales, title_prefix):
     
     return all_words
 
-def main():
+def main(sketch=False):
     # 设置中文字体
     plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
     plt.rcParams['axes.unicode_minus'] = False
@@ -99,7 +94,8 @@ def main():
     english_news_words = process_single_folder(
         "english.news", 
         english_news_scales, 
-        "新华网英文版（单词）"
+        "新华网英文版（单词）",
+        sketch
     )
     
     # 处理 en.people 文件夹 (5w, 10w, ..., 35w)
@@ -107,27 +103,23 @@ def main():
     en_people_words = process_single_folder(
         "en.people", 
         en_people_scales, 
-        "人民网英文版（单词）"
+        "人民网英文版（单词）",
+        sketch
     )
     
     # 合并两个文件夹的内容并处理 (5w, 10w, 15w, ..., 75w)
-    combined_words = english_news_words + en_people_words
-    print(f"\n合并后总单词数: {len(combined_words)}")
-    
     combined_scales = [i * 50000 for i in range(1, 16)]  # 5万, 10万, ..., 75万
-    combined_entropies = []
-    combined_valid_scales = []
     
-    print("\n正在处理合并后的数据:")
-    for scale in combined_scales:
-        if scale <= len(combined_words):
-            entropy = calculate_entropy_for_subset(combined_words, scale)
-            combined_entropies.append(entropy)
-            combined_valid_scales.append(scale)
-            print(f"规模 {scale}: 熵 = {entropy:.4f} 比特/单词")
-        else:
-            print(f"警告: 请求规模 {scale} 超过了实际单词总数 {len(combined_words)}")
-            break
+    if sketch:
+        print("\n正在处理合并后的数据:")
+        # 按与拼接相同的顺序流式读取两个文件夹
+        combined_valid_scales, combined_entropies = calculate_sketch_entropy_curve(
+            ["english.news", "en.people"], combined_scales)
+    else:
+        combined_words = english_news_words + en_people_words
+        print(f"\n合并后总单词数: {len(combined_words)}")
+        print("\n正在处理合并后的数据:")
+        combined_valid_scales, combined_entropies = calculate_entropy_curve(combined_words.ids, combined_scales)
     
     # 绘制合并数据的图表
     if combined_valid_scales:
@@ -139,4 +131,10 @@ def main():
         )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sketch', action='store_true',
+                        help="逐个文件流式读取、用熵 sketch 估计（内存固定，适合放不进内存的语料）")
+    args = parser.parse_args()
+    # 所有图表在最后统一用进程池渲染；结束时把各阶段耗时写入 profiles/cal_en_words.json / .csv
+    with profile_run("cal_en_words"), batch():
+        main(sketch=args.sketch)
\ No newline at end of file
@@ -1,51 +1,133 @@
+import argparse
 import os
-import re
+from corpus_pack import PackReader, is_pack
+from profiling import profile_run, profiler
+from sketch import HyperLogLog
+from tokenizer import count_tokens, scan, unpack
 
-def count_chinese_and_english_words(folder_path, english='words'):
-    total_chinese_chars = 0
-    total_english = 0
-    
-    # 遍历文件夹中所有的 .txt 文件
+# 汉字（范围见 script_classes.py 的文字类别表）和英文单词由一次扫描同时计数（tokenizer.count_tokens，
+# 逐个匹配累加，不构造匹配列表）；英文字母都落在某个单词里，因此字母数 = 单词长度之和 - 单词内的撇号数。
+# 只有 sketch 模式需要符号本身，才用 tokenizer.scan 取出汉字串和单词。
+
+METRICS = ['files', 'bytes', 'lines', 'chinese_chars', 'english_letters', 'english_words']
+METRIC_NAMES = {
+    'files': '文件数',
+    'bytes': '字节数',
+    'lines': '行数',
+    'chinese_chars': '汉字个数',
+    'english_letters': '英文letters个数',
+    'english_words': '英文words个数',
+}
+# sketch 模式下额外输出的不同符号数（HyperLogLog 估计，内存固定）
+SKETCH_METRIC_NAMES = {
+    'distinct_chinese_chars': '不同汉字个数（估计）',
+    'distinct_english_words': '不同英文words个数（估计）',
+}
+
+def scan_text(text, chinese_hll=None, english_hll=None):
+    """单次扫描文本，返回 (汉字数, 英文字母数, 英文单词数)
+
+    传入 HyperLogLog 时，同一次扫描还把出现的汉字和英文单词（小写）加入其中。
+    """
+    if chinese_hll is None:
+        return count_tokens(text)
+    packed = scan(text, ('cjk_chars', 'words', 'lower_words'))
+    chinese, words = packed['cjk_chars'], packed['words']
+    english_words = words.count("\n") + 1 if words else 0
+    english_letters = len(words) - max(english_words - 1, 0) - words.count("'")
+    chinese_hll.update(set(chinese))
+    english_hll.update(set(unpack(packed['lower_words'], False)))
+    return len(chinese), english_letters, english_words
+
+def iter_file_bytes(folder_path):
+    """依次返回文件夹中各 txt 文件的原始字节；folder_path 也可以是打包语料 .pack（按写入顺序）"""
+    if is_pack(folder_path):
+        with PackReader(folder_path) as reader:
+            for i in reader.live:
+                yield reader.view(i).tobytes()
+        return
     for filename in os.listdir(folder_path):
         if filename.endswith('.txt'):
-            file_path = os.path.join(folder_path, filename)
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-                # 统计汉字个数（中文字符范围：\u4e00-\u9fff）
-                chinese_chars = re.findall(r'[\u4e00-\u9fff]', content)
-                total_chinese_chars += len(chinese_chars)
-                
-                # 统计英文单词/字母个数
-                if english == 'words':
-                    english_matches = re.findall(r"[a-zA-Z]+(?:'[a-zA-Z]+)?", content)
-                elif english == 'letters':
-                    english_matches = re.findall(r"[a-zA-Z]", content)
-                else:
-                    english_matches = []
-                
-                total_english += len(english_matches)
-    
-    return total_chinese_chars, total_english
+            with open(os.path.join(folder_path, filename), 'rb') as file:
+                yield file.read()
+
+def scan_folder(folder_path, sketch=False):
+    """单次遍历文件夹（或打包语料），逐个文件一次读取同时统计所有指标
+
+    sketch=True 时同一次扫描还用 HyperLogLog 估计不同汉字数和不同英文单词数。
+    """
+    stats = dict.fromkeys(METRICS, 0)
+    if sketch:
+        chinese_hll, english_hll = HyperLogLog(), HyperLogLog()
+
+    with profiler.stage("scan") as record:
+        # 遍历文件夹中所有的 .txt 文件（或打包语料中的所有文档）
+        for data in iter_file_bytes(folder_path):
+            stats['files'] += 1
+            stats['bytes'] += len(data)
+            stats['lines'] += data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+
+            text = data.decode('utf-8')
+            if sketch:
+                counts = scan_text(text, chinese_hll, english_hll)
+            else:
+                counts = scan_text(text)
+            chinese_chars, english_letters, english_words = counts
+            stats['chinese_chars'] += chinese_chars
+            stats['english_letters'] += english_letters
+            stats['english_words'] += english_words
+
+        # 以汉字和英文单词计符号数
+        record['items'] = stats['chinese_chars'] + stats['english_words']
+        record['bytes'] = stats['bytes']
+
+    if sketch:
+        stats['distinct_chinese_chars'] = int(round(chinese_hll.estimate()))
+        stats['distinct_english_words'] = int(round(english_hll.estimate()))
+    return stats
+
+def count_chinese_and_english_words(folder_path, english='words'):
+    stats = scan_folder(folder_path)
+
+    # 统计英文单词/字母个数
+    if english == 'words':
+        total_english = stats['english_words']
+    elif english == 'letters':
+        total_english = stats['english_letters']
+    else:
+        total_english = 0
+
+    return stats['chinese_chars'], total_english
 
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sketch', action='store_true',
+                        help="额外用 HyperLogLog 估计不同汉字/单词数（每个文件夹只占 32 KB）")
+    parser.add_argument('folders', nargs='*', help="要统计的文件夹或打包语料 .pack（默认四个语料文件夹）")
+    args = parser.parse_args()
+    sketch = args.sketch
+
     # 定义要处理的文件夹路径（请根据实际路径修改）
-    folders = [
+    folders = args.folders or [
         'en.people',
         'english.news',
         'renminwang',
         'xinhuawang'
     ]
-    # 遍历每个文件夹并统计
-    typename = 'words'  # 可选 'words' 或 'letters'
-    for folder in folders:
-        folder_path = os.path.join(folder)  
-        if os.path.exists(folder_path):
-            chinese_count, english_count = count_chinese_and_english_words(folder_path, english=typename)
-            print(f"{folder}:")
-            print(f"汉字个数: {chinese_count}")
-            print("英文"+ typename + "个数" + f"{english_count}")
-        else:
-            print(f"文件夹 {folder} 不存在")
\ No newline at end of file
+    # 遍历每个文件夹并统计（每个文件只读取、扫描一次，一次输出全部指标）；
+    # 结束时把扫描耗时与吞吐写入 profiles/cal_scale.json / .csv
+    with profile_run("cal_scale"):
+        for folder in folders:
+            folder_path = os.path.join(folder)
+            if os.path.exists(folder_path):
+                stats = scan_folder(folder_path, sketch)
+                print(f"{folder}:")
+                for metric in METRICS:
+                    print(f"{METRIC_NAMES[metric]}: {stats[metric]}")
+                if sketch:
+                    for metric, name in SKETCH_METRIC_NAMES.items():
+                        print(f"{name}: {stats[metric]}")
+            else:
+                print(f"文件夹 {folder} 不存在")
@@ -1,90 +1,46 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import time
-import re
-import os
 from bs4 import XMLParsedAsHTMLWarning
 import warnings
+from crawl_engine import SiteCrawler
+from profiling import profile_run
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
-# 保存目录
+# 保存目录与文件名前缀
 OUTPUT_DIR = "xinhuawang" # 新华网中文版
 # OUTPUT_DIR = "renminwang" # 人民网中文版
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+FILE_PREFIX = "xinhuawang"
+# FILE_PREFIX = "renminwang"
 
-visited = set()
-corpus = []
+# 只保留同域链接（避免跳转到外部网站）
+ALLOWED_PREFIXES = ('http://www.news.cn', 'https://www.news.cn',
+                    'http://politics.people.com.cn/', 'http://ent.people.com.cn/',
+                    'https://cpc.people.com.cn/', 'https://world.people.com.cn/',
+                    'http://health.people.com.cn/', 'http://opinion.people.com.cn/',
+                    'http://tw.people.com.cn/')
 
-def fetch_page_text(url):
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; AcademicCrawler/1.0)'
-        }
-        r = requests.get(url, headers=headers, timeout=10)
-        r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, 'html.parser')
-        
-        # 提取标题
-        title = soup.title.text.strip() if soup.title else ""
-        
-        # 提取正文
-        content = ""
-        for p in soup.find_all('p'):
-            content += p.get_text().strip() + "\n"
-            return title + "\n" + content
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return ""
-    
-def extract_all_links(seed_url):
-    try:
-        r = requests.get(seed_url, headers={'User-Agent': 'AcademicCrawler'})
-        r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, 'html.parser')
-        links = set()
-        for a in soup.find_all('a', href=True):
-            full_url = urljoin(seed_url, a['href'].strip())
-            # 只保留同域链接（避免跳转到外部网站）
-            if full_url.startswith(('http://www.news.cn', 'https://www.news.cn',
-                                    'http://politics.people.com.cn/', 'http://ent.people.com.cn/',
-                                    'https://cpc.people.com.cn/', 'https://world.people.com.cn/',
-                                    'http://health.people.com.cn/', 'http://opinion.people.com.cn/',
-                                    'http://tw.people.com.cn/')):
-                links.add(full_url)
-        return list(links)
-    except Exception as e:
-        print(f"Link extraction failed: {e}")
-        return []
+# 同时把正文追加到打包语料（见 corpus_pack.py），分析脚本可直接读取；None 表示只保存 txt 文件
+PACK_PATH = None  # 例如 OUTPUT_DIR + ".pack"
+# 把抓到的原始网页另存为样本，用于比较解析后端（python html_extract.py <目录>）；None 表示不保存
+HTML_FIXTURE_DIR = None  # 例如 "html_fixtures"
+# True 时每个 URL 只抓取一次：同一份响应解析一次，既取正文也取链接，按内容判断是否为文章页；
+# False 时沿用按 URL 区分详情页（只取正文）和目录页（只取链接）的方式
+FETCH_ONCE = True
+# 文章页判定：较长段落（见 html_extract.looks_like_article）合计至少这么多字符
+ARTICLE_MIN_CHARS = 100
 
-def crawl_from_seed(seed_url, max_pages=1, delay=1):
-    queue = [seed_url]
-    while queue and len(corpus) < max_pages:
-        url = queue.pop(0)
-        if url in visited:
-            continue
-        visited.add(url)
-        
-        # 判断是否为新闻详情页（含日期和长字符串）
-        if '/2025' in url and len(url) > 50:  
-            text = fetch_page_text(url)
-            if text.strip():
-                text = re.sub(r'\s+', ' ', text)
-                corpus.append(text)
-                # 保存到文件（按序号命名）
-                filename = os.path.join(OUTPUT_DIR, f"xinhuawang_{len(corpus)}.txt")
-                # filename = os.path.join(OUTPUT_DIR, f"renminwang_{len(corpus)}.txt")
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(text)
-                print(f"Saved {len(corpus)}: {url}")
-        else:
-            # 如果是目录页，继续提取链接
-            new_links = extract_all_links(url)
-            queue.extend(new_links)
-        
-        time.sleep(delay)  
+# 抓取、解析、去重、保存和断点续爬都在 crawl_engine.SiteCrawler 中，这里只提供站点参数
+crawler = SiteCrawler(OUTPUT_DIR, FILE_PREFIX, ALLOWED_PREFIXES, ARTICLE_MIN_CHARS,
+                      fetch_once=FETCH_ONCE, pack_path=PACK_PATH, fixture_dir=HTML_FIXTURE_DIR)
 
-seed_url = "https://www.news.cn/" # 新华网中文版
-# seed_url = "http://people.com.cn/" # 人民网中文版
+if __name__ == "__main__":
+    seed_url = "https://www.news.cn/" # 新华网中文版
+    # seed_url = "http://people.com.cn/" # 人民网中文版
 
-crawl_from_seed(seed_url=seed_url, max_pages=1000, delay=0.2)
\ No newline at end of file
+    # workers > 1 时并发抓取（各主机仍按 delay 限速），workers = 1 时逐个抓取
+    workers = 8
+    # 每次运行结束时把各阶段（抓取、解码、解析、保存）的耗时与吞吐写入 profiles/，
+    # 计数器 article_pages / index_pages 记录按内容判定的页面类型
+    with profile_run("ch_crawl"):
+        if workers > 1:
+            crawler.crawl_concurrently(seed_url=seed_url, max_pages=1000, delay=0.2, workers=workers)
+        else:
+            crawler.crawl_from_seed(seed_url=seed_url, max_pages=1000, delay=0.2)
@@ -1,7 +1,9 @@
-import os
-import re
-from collections import Counter
+import argparse
 import matplotlib.pyplot as plt
+from corpus_cache import load_encoded
+from profiling import profile_run
+from render import batch, render_chart
+from topk import APPROXIMATE_METHODS, stream_counts
 
 # 设置中文字体支持
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
@@ -9,71 +11,81 @@ plt.rcParams['axes.unicode_minus'] = False
 
 def extract_chinese_chars_from_folder(folder_path):
     """从指定文件夹提取所有中文汉字"""
-    all_chinese_chars = []
+    # 分词结果按文件缓存，并编码为整数数组（EncodedCorpus），计数走 bincount
+    return load_encoded(folder_path, 'cjk_chars')
+
+def count_chinese_chars_from_folder(folder_path, streaming=False, approximate=None):
+    """统计指定文件夹中各中文汉字的出现次数，返回可用 + 合并的计数对象"""
+    if streaming or approximate:
+        # 逐个文件流式计数，不保存完整序列，内存只与词表大小（或近似统计的容量）有关
+        return stream_counts(folder_path, 'cjk_chars', approximate)
+    return extract_chinese_chars_from_folder(folder_path).to_counter()
+
+def draw_top_chars(top_chars, title):
+    """绘制前10个汉字的直方图"""
+    chars_list, counts = zip(*top_chars)
+    
+    plt.figure(figsize=(12, 6))
+    bars = plt.bar(range(len(chars_list)), counts, color='skyblue')
+    plt.xlabel('汉字')
+    plt.ylabel('出现次数')
+    plt.title(title)
+    plt.xticks(range(len(chars_list)), chars_list)
     
-    # 遍历文件夹中所有的 .txt 文件
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.txt'):
-            file_path = os.path.join(folder_path, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                    # 提取中文汉字（Unicode范围：\u4e00-\u9fff）
-                    chinese_chars = re.findall(r'[\u4e00-\u9fff]', content)
-                    all_chinese_chars.extend(chinese_chars)
-            except Exception as e:
-                print(f"读取文件 {file_path} 时出错: {e}")
+    # 在每个柱子上显示具体数值
+    for bar, count in zip(bars, counts):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
+                str(count), ha='center', va='bottom')
     
-    return all_chinese_chars
+    plt.tight_layout()
 
-def plot_top_chars(chars, title, filename):
-    """绘制前10个汉字的直方图"""
-    top_chars = Counter(chars).most_common(10)
+def plot_top_chars(char_counts, title, filename):
+    """保存前10个汉字的直方图（非交互渲染，输入未变时跳过）"""
+    top_chars = char_counts.most_common(10)
     
     if top_chars:
-        chars_list, counts = zip(*top_chars)
-        
-        plt.figure(figsize=(12, 6))
-        bars = plt.bar(range(len(chars_list)), counts, color='skyblue')
-        plt.xlabel('汉字')
-        plt.ylabel('出现次数')
-        plt.title(title)
-        plt.xticks(range(len(chars_list)), chars_list)
-        
-        # 在每个柱子上显示具体数值
-        for bar, count in zip(bars, counts):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                    str(count), ha='center', va='bottom')
-        
-        plt.tight_layout()
-        plt.savefig(filename)
-        plt.show()
+        render_chart(draw_top_chars, filename, top_chars, title)
     else:
         print("未找到任何中文汉字")
 
-# 处理 renminwang 文件夹
-renminwang_chars = extract_chinese_chars_from_folder("renminwang")
-print("renminwang 文件夹中出现频率最高的10个中文汉字:")
-renminwang_top10 = Counter(renminwang_chars).most_common(10)
-for i, (char, count) in enumerate(renminwang_top10, 1):
-    print(f"{i:2d}. {char:<15} : {count:>6} 次")
+def main(streaming=False, approximate=None):
+    # streaming=True 时逐个文件流式计数（不经过缓存，内存只与词表大小有关）；
+    # 语料超出内存时可再指定 approximate='space_saving'、'count_min' 或 'count_sketch' 近似统计高频项
+
+    # 处理 renminwang 文件夹
+    renminwang_counts = count_chinese_chars_from_folder("renminwang", streaming, approximate)
+    print("renminwang 文件夹中出现频率最高的10个中文汉字:")
+    renminwang_top10 = renminwang_counts.most_common(10)
+    for i, (char, count) in enumerate(renminwang_top10, 1):
+        print(f"{i:2d}. {char:<15} : {count:>6} 次")
+
+    plot_top_chars(renminwang_counts, 'renminwang文件夹中出现频率最高的10个中文汉字', 'renminwang_top10.png')
 
-plot_top_chars(renminwang_chars, 'renminwang文件夹中出现频率最高的10个中文汉字', 'renminwang_top10.png')
+    # 处理 xinhuawang 文件夹
+    xinhuawang_counts = count_chinese_chars_from_folder("xinhuawang", streaming, approximate)
+    print("\nxinhuawang 文件夹中出现频率最高的10个中文汉字:")
+    xinhuawang_top10 = xinhuawang_counts.most_common(10)
+    for i, (char, count) in enumerate(xinhuawang_top10, 1):
+        print(f"{i:2d}. {char:<15} : {count:>6} 次")
 
-# 处理 xinhuawang 文件夹
-xinhuawang_chars = extract_chinese_chars_from_folder("xinhuawang")
-print("\nxinhuawang 文件夹中出现频率最高的10个中文汉字:")
-xinhuawang_top10 = Counter(xinhuawang_chars).most_common(10)
-for i, (char, count) in enumerate(xinhuawang_top10, 1):
-    print(f"{i:2d}. {char:<15} : {count:>6} 次")
+    plot_top_chars(xinhuawang_counts, 'xinhuawang文件夹中出现频率最高的10个中文汉字', 'xinhuawang_top10.png')
 
-plot_top_chars(xinhuawang_chars, 'xinhuawang文件夹中出现频率最高的10个中文汉字', 'xinhuawang_top10.png')
+    # 合并两个文件夹的计数（不拼接原始序列）
+    combined_counts = renminwang_counts + xinhuawang_counts
+    print("\n合并后出现频率最高的10个中文汉字:")
+    combined_top10 = combined_counts.most_common(10)
+    for i, (char, count) in enumerate(combined_top10, 1):
+        print(f"{i:2d}. {char:<15} : {count:>6} 次")
 
-# 合并两个文件夹的内容
-combined_chars = renminwang_chars + xinhuawang_chars
-print("\n合并后出现频率最高的10个中文汉字:")
-combined_top10 = Counter(combined_chars).most_common(10)
-for i, (char, count) in enumerate(combined_top10, 1):
-    print(f"{i:2d}. {char:<15} : {count:>6} 次")
+    plot_top_chars(combined_counts, '合并后出现频率最高的10个中文汉字', 'combined_top10.png')
 
-plot_top_chars(combined_chars, '合并后出现频率最高的10个中文汉字', 'combined_top10.png')
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--streaming', action='store_true',
+                        help="逐个文件流式计数（不经过缓存，内存只与词表大小有关）")
+    parser.add_argument('--approximate', choices=APPROXIMATE_METHODS,
+                        help="近似统计高频项（流式，内存固定），适合超出内存的语料")
+    args = parser.parse_args()
+    # 所有图表在最后统一用进程池渲染；结束时把各阶段耗时写入 profiles/ch_top10.json / .csv
+    with profile_run("ch_top10"), batch():
+        main(streaming=args.streaming, approximate=args.approximate)
@@ -0,0 +1,279 @@
+import os
+import hashlib
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from corpus_pack import PackReader, is_pack
+from profiling import profiler
+from script_classes import SIGNATURE
+from tokenizer import TOKENIZERS, canonical_variant, pack, tokenize_packed, unpack
+from vocab import Vocabulary, EncodedCorpus
+
+# 缓存目录（可通过环境变量 CORPUS_CACHE_DIR 修改）
+CACHE_DIR = os.environ.get("CORPUS_CACHE_DIR", ".corpus_cache")
+CACHE_VERSION = 2
+# 分词进程数（可通过环境变量 CORPUS_WORKERS 修改），需要分词的文件少于 PARALLEL_MIN_FILES 时不启用多进程
+WORKERS = int(os.environ.get("CORPUS_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_FILES = 32
+
+
+def _token_count(packed, single_char):
+    """压缩后的符号串中的符号个数"""
+    if single_char:
+        return len(packed)
+    return packed.count("\n") + 1 if packed else 0
+
+
+def _cache_path(folder_path, variant):
+    """缓存文件路径：以文件夹（或打包语料）绝对路径和分词方式为键"""
+    key = hashlib.md5(os.path.abspath(folder_path).encode("utf-8")).hexdigest()[:12]
+    name = os.path.basename(os.path.normpath(folder_path))
+    return os.path.join(CACHE_DIR, f"{name}_{key}_{variant}.pkl")
+
+
+def _load_cache(path):
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        # 文字类别表（如 HAN_BLOCKS）变化后，汉字相关的分词结果不再有效
+        if data.get("version") == CACHE_VERSION and data.get("scripts") == SIGNATURE:
+            return data["files"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️ 读取缓存 {path} 时出错，将重新分词：{e}")
+    return {}
+
+
+def _save_cache(path, files):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "scripts": SIGNATURE, "files": files}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ 写入缓存 {path} 时出错：{e}")
+
+
+def list_documents(folder_path):
+    """返回 [(文档名, 状态戳), ...]
+
+    文件夹按 os.listdir 顺序，状态戳为 (mtime_ns, size)；
+    打包语料（.pack）按写入顺序，状态戳为 (打包 ID, offset, length)。
+    """
+    if is_pack(folder_path):
+        with PackReader(folder_path) as reader:
+            return [(reader.records[i].get("name") or str(i), reader.stamp(i)) for i in reader.live]
+    documents = []
+    for filename in os.listdir(folder_path):
+        if not filename.endswith(".txt"):
+            continue
+        filepath = os.path.join(folder_path, filename)
+        try:
+            st = os.stat(filepath)
+        except Exception as e:
+            print(f"⚠️ 读取文件 {filepath} 时出错：{e}")
+            continue
+        documents.append((filename, (st.st_mtime_ns, st.st_size)))
+    return documents
+
+
+def iter_texts(folder_path, names=None):
+    """按顺序返回 (文档名, 正文, 错误信息)；names 为 None 时返回全部文档"""
+    if is_pack(folder_path):
+        with PackReader(folder_path) as reader:
+            if names is None:
+                yield from ((name, text, None) for name, text in reader.iter_texts())
+                return
+            for name in names:
+                try:
+                    yield name, reader.text(reader.index_of(name)), None
+                except Exception as e:
+                    yield name, None, f"⚠️ 读取 {folder_path} 中的文档 {name} 时出错：{e}"
+        return
+    if names is None:
+        names = [f for f in os.listdir(folder_path) if f.endswith(".txt")]
+    for filename in names:
+        filepath = os.path.join(folder_path, filename)
+        try:
+            with open(filepath, "r", encoding="utf-8", newline="") as f:
+                yield filename, f.read(), None
+        except Exception as e:
+            yield filename, None, f"⚠️ 读取文件 {filepath} 时出错：{e}"
+
+
+def _tokenize_shard(variants, folder_path, filenames):
+    """在工作进程中对一批文档分词（每个文档只读一次，依次用各分词方式处理）
+
+    返回 [(文档名, {分词方式: 压缩后的符号串} 或 None, 错误信息), ...]
+    """
+    batch_variants = [variant for variant in variants if hasattr(TOKENIZERS[variant][0], "batch")]
+    per_document = [variant for variant in variants if variant not in batch_variants]
+    documents = iter_texts(folder_path, filenames)
+    batched = {}
+    if batch_variants:
+        # 支持批量的分词方式对整批文档调用一次，其余仍逐个文档处理
+        documents = list(documents)
+        texts = [text for _, text, error in documents if not error]
+        batched = {variant: iter(TOKENIZERS[variant][0].batch(texts)) for variant in batch_variants}
+    results = []
+    for name, text, error in documents:
+        if error:
+            results.append((name, None, error))
+            continue
+        # 逐个文档的分词方式共用一次扫描（tokenizer.tokenize_packed）
+        packed = tokenize_packed(text, per_document)
+        for variant in batch_variants:
+            packed[variant] = pack(next(batched[variant]), TOKENIZERS[variant][1])
+        results.append((name, packed, None))
+    return results
+
+
+def _tokenize_files(folder_path, variants, filenames, workers):
+    """对需要重新分词的文件分词；文件较多时按连续分片交给进程池，结果按原顺序合并"""
+    for variant in variants:
+        if filenames and hasattr(TOKENIZERS[variant][0], "prepare"):
+            TOKENIZERS[variant][0].prepare()
+    if workers > 1 and len(filenames) >= PARALLEL_MIN_FILES:
+        # 每个进程分到若干片，既能均衡负载，又不会因任务过碎增加进程间通信开销
+        n_shards = min(len(filenames), workers * 4)
+        size = -(-len(filenames) // n_shards)
+        shards = [filenames[i:i + size] for i in range(0, len(filenames), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shard_results = pool.map(_tokenize_shard, [variants] * len(shards),
+                                     [folder_path] * len(shards), shards)
+            return [item for shard in shard_results for item in shard]
+    return _tokenize_shard(variants, folder_path, filenames)
+
+
+def _load_packed_variants(folder_path, variants, use_cache=True, workers=None):
+    """按文档顺序返回 {分词方式: [(文档名, 压缩后的符号串), ...]}
+
+    folder_path 可以是 txt 文件夹（os.listdir 顺序），也可以是打包语料 .pack（写入顺序）。
+    缓存以每个文档的状态戳判断是否失效，只有新增或修改过的文档会被重新读取；
+    任一分词方式未命中的文档只读取一次，同时完成所有分词方式。
+    需要分词的文档较多时使用多进程，合并后的顺序与串行处理完全相同。
+    别名（如 chinese_chars）与其实际的分词方式共用同一份缓存和结果。
+    """
+    if workers is None:
+        workers = WORKERS
+    requested = tuple(variants)
+    variants = tuple(dict.fromkeys(canonical_variant(variant) for variant in requested))
+    documents = list_documents(folder_path)
+    paths = {variant: _cache_path(folder_path, variant) for variant in variants}
+    with profiler.stage("cache_load"):
+        cached = {variant: _load_cache(paths[variant]) if use_cache else {} for variant in variants}
+
+    # 先按文档顺序确定哪些文档需要重新分词（任一分词方式未命中即重新读取）
+    misses = []
+    for name, stamp in documents:
+        for variant in variants:
+            entry = cached[variant].get(name)
+            if not (entry and entry[0] == stamp):
+                misses.append(name)
+                break
+
+    tokenized = {}
+    # 工作进程中的耗时不单独统计，这里记录整个分词阶段的用时和产生的符号数
+    with profiler.stage("tokenize") as record:
+        for name, packed, error in _tokenize_files(folder_path, variants, misses, workers):
+            if error:
+                print(error)
+            else:
+                tokenized[name] = packed
+                record['items'] += sum(_token_count(packed[variant], TOKENIZERS[variant][1])
+                                       for variant in variants if variant != 'doc_stats')
+
+    results = {}
+    for variant in variants:
+        files = {}
+        packed_list = []
+        for name, stamp in documents:
+            if name in tokenized:
+                packed = tokenized[name][variant]
+            else:
+                entry = cached[variant].get(name)
+                if not (entry and entry[0] == stamp):
+                    continue
+                packed = entry[1]
+            files[name] = (stamp, packed)
+            packed_list.append((name, packed))
+        # 有文档变化（包括被删除）时才回写缓存
+        if use_cache and (misses or len(files) != len(cached[variant])):
+            _save_cache(paths[variant], files)
+        results[variant] = packed_list
+    return {variant: results[canonical_variant(variant)] for variant in requested}
+
+
+def _load_packed(folder_path, variant, use_cache=True, workers=None):
+    """按文档顺序返回 [(文档名, 压缩后的符号串), ...]"""
+    return _load_packed_variants(folder_path, [variant], use_cache, workers)[variant]
+
+
+def iter_file_tokens(folder_path, variant):
+    """按文档顺序逐个读取并分词，不经过缓存，任何时刻只持有当前文档的符号"""
+    tokenize = TOKENIZERS[variant][0]
+    for name, text, error in iter_texts(folder_path):
+        if error:
+            print(error)
+            continue
+        yield name, tokenize(text)
+
+
+def load_file_tokens(folder_path, variant, use_cache=True):
+    """按文档顺序返回 [(文档名, 符号列表), ...]"""
+    single_char = TOKENIZERS[variant][1]
+    return [(filename, unpack(packed, single_char))
+            for filename, packed in _load_packed(folder_path, variant, use_cache)]
+
+
+def load_tokens(folder_path, variant, use_cache=True):
+    """返回文件夹内所有 txt 文件（或打包语料中所有文档）按顺序拼接后的符号列表"""
+    all_tokens = []
+    for _, tokens in load_file_tokens(folder_path, variant, use_cache):
+        all_tokens.extend(tokens)
+    return all_tokens
+
+
+def _encode(packed, single_char, vocab):
+    with profiler.stage("encode") as record:
+        if single_char:
+            # 单字符符号直接按码点整体编码，不展开成逐字符的列表
+            ids = vocab.encode_chars("".join(p for _, p in packed))
+        else:
+            ids = vocab.encode(t for _, p in packed for t in unpack(p, False))
+        record['items'] = len(ids)
+    return EncodedCorpus(ids, vocab)
+
+
+def load_encoded(folder_path, variant, vocab=None, use_cache=True):
+    """返回整数编码后的语料（vocab.EncodedCorpus）
+
+    多个文件夹传入同一个 vocab 时编号一致，可以直接用 + 拼接。
+    """
+    if vocab is None:
+        vocab = Vocabulary()
+    return _encode(_load_packed(folder_path, variant, use_cache), TOKENIZERS[variant][1], vocab)
+
+
+def load_variants(folder_path, variants, use_cache=True):
+    """一次读取同时得到多种分词结果，返回 {分词方式: EncodedCorpus}
+
+    'doc_stats' 返回 {'files', 'bytes', 'lines'} 汇总字典而不是语料。
+    """
+    results = {}
+    for variant, packed in _load_packed_variants(folder_path, variants, use_cache).items():
+        variant = canonical_variant(variant)
+        if variant in results:
+            continue
+        if variant == 'doc_stats':
+            stats = {'files': len(packed), 'bytes': 0, 'lines': 0}
+            for _, p in packed:
+                n_bytes, n_lines = unpack(p, False)
+                stats['bytes'] += int(n_bytes)
+                stats['lines'] += int(n_lines)
+            results[variant] = stats
+        else:
+            results[variant] = _encode(packed, TOKENIZERS[variant][1], Vocabulary())
+    return {variant: results[canonical_variant(variant)] for variant in variants}
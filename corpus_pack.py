@@ -0,0 +1,138 @@
+import json
+import mmap
+import os
+import re
+import sys
+import time
+
+# 打包语料格式：
+#   X.pack      —— 16 字节文件头（魔数 + 8 字节随机 ID），之后依次存放各文档的 UTF-8 正文
+#   X.pack.idx  —— 每行一个 JSON 记录：offset、length、name 以及 url、crawl_time 等元数据
+# 只追加写入：先写正文再写索引行，中途崩溃时未写入索引的尾部数据会被忽略
+MAGIC = b"NLPPACK1"
+HEADER_SIZE = 16
+
+
+def index_path(pack_path):
+    return pack_path + ".idx"
+
+
+def is_pack(path):
+    return path.endswith(".pack") and os.path.isfile(path)
+
+
+class PackWriter:
+    """向打包语料追加文档（文件不存在时自动创建）"""
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        if not os.path.exists(pack_path):
+            with open(pack_path, "wb") as f:
+                f.write(MAGIC + os.urandom(HEADER_SIZE - len(MAGIC)))
+            open(index_path(pack_path), "w", encoding="utf-8").close()
+
+    def append(self, text, name=None, **metadata):
+        """追加一篇文档，metadata 中的字段（如 url、crawl_time）原样写入索引"""
+        data = text.encode("utf-8")
+        with open(self.pack_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        record = {"offset": offset, "length": len(data), "name": name}
+        record.update(metadata)
+        with open(index_path(self.pack_path), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class PackReader:
+    """通过 mmap 读取打包语料，按写入顺序访问文档，view() 不复制数据"""
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        with open(index_path(pack_path), "r", encoding="utf-8") as f:
+            self.records = [json.loads(line) for line in f if line.strip()]
+        self._file = open(pack_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        header = bytes(self._mm[:HEADER_SIZE])
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{pack_path} 不是打包语料文件")
+        # 打包文件的唯一 ID，与 offset/length 一起作为缓存的状态戳
+        self.pack_id = header[len(MAGIC):].hex()
+        self._by_name = {r["name"]: i for i, r in enumerate(self.records) if r.get("name")}
+        # 同名文档以最后追加的一条为准（爬虫更新文章时重新追加），live 为有效记录的序号
+        self.live = [i for i, r in enumerate(self.records) if not r.get("name") or self._by_name[r["name"]] == i]
+
+    def __len__(self):
+        return len(self.live)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def view(self, i):
+        """第 i 篇文档的只读 memoryview（不复制）"""
+        r = self.records[i]
+        return memoryview(self._mm)[r["offset"]:r["offset"] + r["length"]]
+
+    def text(self, i):
+        return str(self.view(i), "utf-8")
+
+    def index_of(self, name):
+        """按文档名查找序号（没有名称的文档以序号字符串为名）"""
+        i = self._by_name.get(name)
+        return int(name) if i is None else i
+
+    def stamp(self, i):
+        r = self.records[i]
+        return (self.pack_id, r["offset"], r["length"])
+
+    def iter_texts(self):
+        """按写入顺序依次返回有效文档的 (文档名, 正文)，整体上是对数据文件的一次顺序读取"""
+        for i in self.live:
+            yield self.records[i].get("name") or str(i), self.text(i)
+
+
+def _natural_key(filename):
+    """按文件名中的数字排序（xxx_2.txt 在 xxx_10.txt 之前），顺序与文件系统无关"""
+    m = re.search(r'_(\d+)\.txt$', filename)
+    return (0, int(m.group(1)), filename) if m else (1, 0, filename)
+
+
+def pack_folder(folder_path, pack_path=None):
+    """把文件夹中的 txt 文件按序号顺序打包为一个数据文件，返回打包文件路径"""
+    if pack_path is None:
+        pack_path = os.path.normpath(folder_path) + ".pack"
+    for path in (pack_path, index_path(pack_path)):
+        if os.path.exists(path):
+            os.remove(path)
+    writer = PackWriter(pack_path)
+    filenames = sorted((f for f in os.listdir(folder_path) if f.endswith(".txt")), key=_natural_key)
+    for filename in filenames:
+        filepath = os.path.join(folder_path, filename)
+        # newline="" 保留原文的 \r\n，打包后的文档与原文件逐字节相同
+        with open(filepath, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        crawl_time = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(os.path.getmtime(filepath)))
+        writer.append(text, name=filename, crawl_time=crawl_time)
+    return pack_path
+
+
+if __name__ == "__main__":
+    # 默认打包四个语料文件夹，也可以在命令行中指定文件夹
+    folders = sys.argv[1:] or ['en.people', 'english.news', 'renminwang', 'xinhuawang']
+    for folder in folders:
+        if os.path.isdir(folder):
+            pack_path = pack_folder(folder)
+            with PackReader(pack_path) as reader:
+                print(f"{folder} -> {pack_path}: {len(reader)} 篇文档")
+        else:
+            print(f"文件夹 {folder} 不存在")
@@ -0,0 +1,413 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from corpus_pack import PackWriter
+from dedup import FetchStore, canonical_key, canonicalize_url
+from html_extract import decode_html, extract_article, extract_links, extract_page, looks_like_article, save_fixture
+from profiling import profiler
+
+DEFAULT_TIMEOUT = 10
+POOL_SIZE = 16
+CHECKPOINT_EVERY = 50
+USER_AGENT = 'Mozilla/5.0 (compatible; AcademicCrawler/1.0)'
+
+
+class HostRateLimiter:
+    """按主机限速：同一主机两次请求之间至少间隔 min_interval 秒，不同主机互不影响"""
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = min_interval
+        self._last_sent = {}
+        self._host_locks = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """阻塞到该 URL 所在主机允许发出下一次请求为止"""
+        host = urlparse(url).netloc
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        # 同一主机的线程依次排队，间隔按上一个请求实际放行的时间计算：
+        # 预约时间槽的做法在线程被延迟唤醒时，相邻两次请求可能靠得比 min_interval 更近
+        with host_lock:
+            last = self._last_sent.get(host)
+            if last is not None:
+                delay = last + self.min_interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self._last_sent[host] = time.monotonic()
+
+
+rate_limiter = HostRateLimiter()
+_local = threading.local()
+
+
+def set_politeness(delay):
+    """设置每个主机的最小请求间隔（秒）"""
+    rate_limiter.min_interval = delay
+
+
+def get_session():
+    """返回当前线程的 Session，复用 keep-alive 连接"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+def http_get(url, **kwargs):
+    """经过按主机限速和连接池的 GET 请求，参数与 requests.get 相同"""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    rate_limiter.wait(url)
+    # 只统计请求本身的耗时（不含限速等待），计入 fetch 阶段和延迟直方图
+    start = time.perf_counter()
+    try:
+        r = get_session().get(url, **kwargs)
+    except Exception:
+        profiler.count("fetch_errors")
+        raise
+    seconds = time.perf_counter() - start
+    profiler.add("fetch", seconds, items=1, nbytes=len(r.content))
+    profiler.observe("fetch", seconds)
+    profiler.count(f"http_{r.status_code}")
+    return r
+
+
+def url_key(url):
+    """规范化 URL 的定长摘要，用于已访问集合，比保存完整 URL 更省内存和磁盘"""
+    return hashlib.sha1(canonical_key(url).encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlState:
+    """可断点续爬的抓取状态：待抓取队列、已见 URL 摘要和已保存页数
+
+    队列用 deque，出队为 O(1)；URL 入队时即记为已见，避免重复入队。
+    每处理 checkpoint_every 个 URL 写一次检查点，已出队但未完成的 URL 会写回队首，
+    重启后从检查点继续抓取，文件序号也接着上次的编号。
+    saved 是最大文件序号，只用于给新文件编号；run_saved 是本次抓取（含续爬）保存的页数，
+    max_pages 限制的是它。
+    """
+
+    def __init__(self, path, checkpoint_every=CHECKPOINT_EVERY, stores=()):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        # 需要随检查点一起落盘的其他状态（如 dedup.FetchStore）
+        self.stores = stores
+        self.frontier = deque()
+        self.seen = set()
+        self.in_flight = {}
+        self.saved = 0
+        self.run_saved = 0
+        self._processed = 0
+
+    def load(self):
+        """从检查点恢复，返回是否成功恢复；上次已经抓完（队列为空）的检查点不恢复"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Failed to load crawl state {self.path}: {e}")
+            return False
+        if not data["frontier"]:
+            # 上次抓取已经完成（队列为空）：重新从种子开始，重爬时才能发现新文章和更新
+            print("Previous crawl finished, starting a new one")
+            return False
+        self.frontier = deque(data["frontier"])
+        self.seen = set(data["seen"])
+        self.saved = data["saved"]
+        self.run_saved = data.get("run_saved", 0)
+        print(f"Resumed crawl: {self.run_saved} saved, {len(self.frontier)} queued")
+        return True
+
+    def checkpoint(self):
+        """把当前状态原子地写入磁盘"""
+        data = {
+            "saved": self.saved,
+            "run_saved": self.run_saved,
+            "frontier": list(self.in_flight) + list(self.frontier),
+            "seen": list(self.seen),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        for store in self.stores:
+            store.save()
+
+    def push(self, urls):
+        """把未见过的 URL 加入队尾"""
+        for url in urls:
+            key = url_key(url)
+            if key not in self.seen:
+                self.seen.add(key)
+                self.frontier.append(url)
+
+    def pop(self):
+        """取出队首 URL，并记为处理中"""
+        url = self.frontier.popleft()
+        self.in_flight[url] = None
+        return url
+
+    def done(self, url):
+        """标记 URL 处理完成，必要时写检查点"""
+        self.in_flight.pop(url, None)
+        self._processed += 1
+        if self._processed % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def next_page_number(self):
+        """分配下一个保存文件的序号"""
+        self.saved += 1
+        return self.saved
+
+
+def last_page_number(folder_path):
+    """目录中已有文件的最大序号（xxx_N.txt），没有则为 0"""
+    numbers = [int(m.group(1)) for m in
+               (re.search(r'_(\d+)\.txt$', f) for f in os.listdir(folder_path)) if m]
+    return max(numbers, default=0)
+
+
+def run_crawl(state, visit, save, should_stop, workers=8):
+    """用有界线程池并发抓取
+
+    visit(url) 在工作线程中执行，返回 (正文, 新链接列表)；
+    save(url, 正文) 在调用线程中按完成顺序执行，因此文件编号等状态无需加锁。
+    should_stop() 返回 True 时不再派发新任务，并丢弃尚未开始的任务。
+    """
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while (state.frontier or pending) and not should_stop():
+            # 保持最多 2 倍线程数的任务在途，避免一次性把整个队列提交出去
+            while state.frontier and len(pending) < workers * 2 and not should_stop():
+                url = state.pop()
+                pending[pool.submit(visit, url)] = url
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                if should_stop():
+                    # 已达上限的结果不再处理，URL 留在处理中，检查点时写回队首
+                    continue
+                try:
+                    text, links = future.result()
+                except Exception as e:
+                    print(f"Error crawling {url}: {e}")
+                    profiler.count("visit_errors")
+                    state.done(url)
+                    continue
+                if text and text.strip():
+                    save(url, text)
+                state.push(links)
+                state.done(url)
+
+        for future in pending:
+            future.cancel()
+
+
+
+class SiteCrawler:
+    """一个站点的抓取流程（ch_crawl.py 和 en_crawl.py 只在参数上不同）
+
+    output_dir: 保存目录，文件名为 file_prefix_N.txt；allowed_prefixes: 只跟踪以这些前缀开头的链接；
+    article_min_chars: 文章页判定阈值（见 html_extract.looks_like_article）；
+    container: 正文所在 div 的 id，页面没有该 div 时退回所有 <p>（None 表示直接取所有 <p>）；
+    fetch_once、pack_path、fixture_dir 的含义见 ch_crawl.py 顶部。
+    """
+
+    def __init__(self, output_dir, file_prefix, allowed_prefixes, article_min_chars,
+                 container=None, fetch_once=True, pack_path=None, fixture_dir=None):
+        self.output_dir = output_dir
+        self.file_prefix = file_prefix
+        self.allowed_prefixes = tuple(allowed_prefixes)
+        self.article_min_chars = article_min_chars
+        self.container = container
+        self.fetch_once = fetch_once
+        self.fixture_dir = fixture_dir
+        os.makedirs(output_dir, exist_ok=True)
+        # 条件请求验证器与正文指纹，重爬时跳过未变化和重复的文章
+        self.fetch_store = FetchStore(os.path.join(output_dir, ".fetch_store.json"))
+        # 抓取进度（队列、已访问 URL、已保存页数）定期写入保存目录，中断后可续爬
+        self.state = CrawlState(os.path.join(output_dir, ".crawl_state.json"), stores=[self.fetch_store])
+        self.pack_writer = PackWriter(pack_path) if pack_path else None
+
+    def _get(self, url, conditional=True):
+        headers = {'User-Agent': USER_AGENT}
+        if conditional:
+            # 带上上次的 ETag/Last-Modified，页面未变化时服务器返回 304
+            headers.update(self.fetch_store.conditional_headers(url))
+        r = http_get(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+        if r.status_code != 304 and self.fixture_dir:
+            save_fixture(self.fixture_dir, url, r)
+        return r
+
+    def _decode(self, r):
+        # 编码优先取响应头和 <meta charset>，都没有时才对整个正文做字符集探测
+        with profiler.stage("decode", nbytes=len(r.content)):
+            return decode_html(r.headers, r.content)
+
+    def same_site_links(self, base_url, hrefs):
+        """把 href 拼接为规范化的绝对地址，只保留同域链接（避免跳转到外部网站）"""
+        links = set()
+        for href in hrefs:
+            full_url = canonicalize_url(urljoin(base_url, href))
+            if full_url.startswith(self.allowed_prefixes):
+                links.add(full_url)
+        return list(links)
+
+    def fetch_page_text(self, url):
+        """只取详情页的标题和正文（FETCH_ONCE = False 时使用）"""
+        try:
+            r = self._get(url)
+            if r.status_code == 304:
+                return ""
+            self.fetch_store.remember_validators(url, r.headers)
+            html = self._decode(r)
+            with profiler.stage("parse", items=1, nbytes=len(r.content)):
+                title, paragraphs = extract_article(html, container=self.container)
+            return title + "\n" + "".join(p + "\n" for p in paragraphs)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            profiler.count("fetch_page_text_errors")
+            return ""
+
+    def fetch_page(self, url):
+        """抓取一次 URL，返回 (正文, 链接列表)：文章页同时返回正文和页内链接，其他页面正文为空"""
+        try:
+            # 只有保存过的文章记录了验证器；未变化时返回 304，其链接在上次抓取时已加入队列
+            r = self._get(url)
+            if r.status_code == 304:
+                return "", []
+            html = self._decode(r)
+            # 同一棵文档树同时提供标题、段落和链接
+            with profiler.stage("parse", items=1, nbytes=len(r.content)):
+                title, paragraphs, hrefs = extract_page(html, container=self.container)
+            links = self.same_site_links(url, hrefs)
+            if not looks_like_article(paragraphs, self.article_min_chars):
+                profiler.count("index_pages")
+                return "", links
+            profiler.count("article_pages")
+            # 目录页经常更新，不记录验证器，每次都完整抓取以发现新链接
+            self.fetch_store.remember_validators(url, r.headers)
+            return title + "\n" + "".join(p + "\n" for p in paragraphs), links
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            profiler.count("fetch_page_errors")
+            return "", []
+
+    def extract_all_links(self, url):
+        """目录页只需要链接：直接扫描 <a href>，不构建文档树"""
+        try:
+            r = self._get(url, conditional=False)
+            html = self._decode(r)
+            with profiler.stage("link_parse", items=1, nbytes=len(r.content)):
+                return self.same_site_links(url, extract_links(html))
+        except Exception as e:
+            print(f"Link extraction failed: {e}")
+            profiler.count("link_extraction_errors")
+            return []
+
+    @staticmethod
+    def is_article_url(url):
+        # 判断是否为新闻详情页（含日期和长字符串ID）
+        return '/2025' in url and len(url) > 50
+
+    def save_page(self, url, text):
+        text = re.sub(r'\s+', ' ', text)
+        key = canonical_key(url)
+        # 同一篇文章的其他 URL（移动版、带跟踪参数等）或近似重复的内容不再保存；
+        # 与本 URL 上次保存的正文完全相同时也跳过
+        duplicate = self.fetch_store.find_duplicate(text, key)
+        if duplicate:
+            print(f"Skipped {'unchanged' if duplicate == key else 'duplicate of ' + duplicate}: {url}")
+            profiler.count("unchanged_skipped" if duplicate == key else "duplicates_skipped")
+            return
+        with profiler.stage("save", items=1, nbytes=len(text.encode("utf-8"))):
+            # 文章更新过：覆盖该 URL 上次保存的文件；否则按序号新建（续爬时接着上次的序号）
+            name = self.fetch_store.files.get(key)
+            if name and os.path.exists(os.path.join(self.output_dir, name)):
+                label = f"Updated {name}"
+                profiler.count("articles_updated")
+            else:
+                number = self.state.next_page_number()
+                name = f"{self.file_prefix}_{number}.txt"
+                label = f"Saved {number}"
+            with open(os.path.join(self.output_dir, name), "w", encoding="utf-8") as f:
+                f.write(text)
+            if self.pack_writer:
+                # 打包语料只追加：同名文档以最后一条为准（见 corpus_pack.PackReader）
+                self.pack_writer.append(text, name=name, url=url,
+                                        crawl_time=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            self.fetch_store.remember_content(key, text, name)
+        # 新建和覆盖的文件都计入本次抓取的页数
+        self.state.run_saved += 1
+        print(f"{label}: {url}")
+
+    def visit_url(self, url):
+        """抓取单个 URL，返回 (正文, 新链接)
+
+        fetch_once 时每个 URL 只请求一次，文章页中的链接也会加入队列；
+        否则按 URL 判断：详情页返回正文，目录页返回其中的链接。
+        """
+        if self.fetch_once:
+            return self.fetch_page(url)
+        if self.is_article_url(url):
+            return self.fetch_page_text(url), []
+        # 如果是目录页，继续提取链接
+        return "", self.extract_all_links(url)
+
+    def resume_or_seed(self, seed_url):
+        """有检查点时从检查点续爬，否则从种子 URL 开始（序号接着目录中已有的文件）"""
+        if not self.fetch_store.load():
+            self.fetch_store.index_folder(self.output_dir)
+        if not self.state.load():
+            self.state.saved = last_page_number(self.output_dir)
+            self.state.run_saved = 0
+            self.state.push([canonicalize_url(seed_url)])
+
+    def crawl_from_seed(self, seed_url, max_pages=1, delay=1):
+        """逐个抓取；同一主机的请求间隔至少 delay 秒（由 http_get 按主机限速）"""
+        set_politeness(delay)
+        self.resume_or_seed(seed_url)
+        state = self.state
+        try:
+            while state.frontier and state.run_saved < max_pages:
+                url = state.pop()
+                text, new_links = self.visit_url(url)
+                if text.strip():
+                    self.save_page(url, text)
+                state.push(new_links)
+                state.done(url)
+        finally:
+            # 正常结束或 Ctrl-C 时都写入检查点
+            state.checkpoint()
+
+    def crawl_concurrently(self, seed_url, max_pages=1, delay=1, workers=8):
+        """多线程并发抓取，各主机仍按 delay 限速；保存在调用线程中进行，序号不会冲突"""
+        set_politeness(delay)
+        self.resume_or_seed(seed_url)
+        try:
+            run_crawl(
+                self.state,
+                visit=self.visit_url,
+                save=self.save_page,
+                should_stop=lambda: self.state.run_saved >= max_pages,
+                workers=workers,
+            )
+        finally:
+            self.state.checkpoint()
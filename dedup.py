@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 不影响页面内容的跟踪参数，规范化时去掉
+TRACKING_PARAMS = {'spm', 'from', 'fbclid', 'gclid', 'isappinstalled', 'share_token',
+                   'wfr', 'tt_from', 'scene'}
+# 移动版/无前缀主机与 www 主机视为同一站点
+HOST_ALIAS_PREFIXES = ('www.', 'm.', 'wap.')
+INDEX_PAGES = ('index.html', 'index.htm', 'index.shtml')
+
+SHINGLE_SIZE = 5
+SIMHASH_BITS = 64
+NEAR_DUPLICATE_DISTANCE = 3
+MIN_SHINGLES = 20
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith('utm_')
+
+
+def canonicalize_url(url):
+    """规范化 URL：小写主机、去掉默认端口、片段和跟踪参数，并对查询参数排序"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or '/'
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking_param(k)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def canonical_key(url):
+    """用于去重的 URL 键：在规范化基础上忽略协议、www/移动版前缀和默认首页文件名"""
+    parts = urlsplit(canonicalize_url(url))
+    host = parts.netloc
+    for prefix in HOST_ALIAS_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = parts.path
+    for index in INDEX_PAGES:
+        if path.endswith('/' + index):
+            path = path[:-len(index)]
+            break
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def normalize_text(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def content_hash(text):
+    """正文的精确指纹（空白规范化后的 SHA-1）"""
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def simhash(text, k=SHINGLE_SIZE):
+    """基于字符 k-shingle 的 64 位 SimHash，中英文通用；shingle 太少时返回 None"""
+    text = normalize_text(text)
+    shingles = {text[i:i + k] for i in range(len(text) - k + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(sh.encode('utf-8'), digest_size=8).digest(), 'big')
+         for sh in shingles], dtype=np.uint64)
+    # 逐位统计：该位为 1 的 shingle 多于一半则指纹该位为 1
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    ones = bits.sum(axis=0)
+    value = 0
+    for bit in np.flatnonzero(2 * ones > len(hashes)):
+        value |= 1 << int(bit)
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FetchStore:
+    """跨次抓取保存的条件请求验证器（ETag/Last-Modified）与正文指纹
+
+    近似重复检测把 64 位 SimHash 分成 4 段 16 位建立索引：汉明距离不超过 3 的两个指纹
+    至少有一段完全相同，因此只需与同段的候选比较，不必扫描全部指纹。
+    指纹以 URL 键区分：同一 URL 的新版本替换旧版本的指纹和文件，近似重复只在不同 URL 之间判断。
+    """
+
+    BANDS = 4
+
+    def __init__(self, path):
+        self.path = path
+        self.validators = {}
+        self.hashes = {}
+        self.simhashes = {}
+        self.files = {}     # URL 键 -> 保存的文件名，文章更新时覆盖该文件
+        self._digests = {}  # hashes 的反向表：URL 键 -> 正文摘要，替换指纹时不必扫描整个 hashes
+        self._bands = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """从磁盘恢复，返回是否成功"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Failed to load fetch store {self.path}: {e}")
+            return False
+        self.validators = data.get('validators', {})
+        self.hashes = data.get('hashes', {})
+        self._digests = {key: digest for digest, key in self.hashes.items()}
+        self.files = data.get('files', {})
+        for key, value in data.get('simhashes', {}).items():
+            self._add_simhash(key, value)
+        return True
+
+    def save(self):
+        with self._lock:
+            data = {
+                'validators': dict(self.validators),
+                'hashes': dict(self.hashes),
+                'simhashes': dict(self.simhashes),
+                'files': dict(self.files),
+            }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def index_folder(self, folder_path):
+        """为目录中已有的 txt 文件建立指纹，使首次重爬也能识别已保存过的文章"""
+        for filename in sorted(os.listdir(folder_path)):
+            if filename.endswith('.txt'):
+                with open(os.path.join(folder_path, filename), 'r', encoding='utf-8') as f:
+                    self.remember_content(f"file:{filename}", f.read())
+
+    def conditional_headers(self, url):
+        """返回该 URL 上次响应的验证器对应的条件请求头"""
+        validator = self.validators.get(canonical_key(url))
+        headers = {}
+        if validator:
+            if validator.get('etag'):
+                headers['If-None-Match'] = validator['etag']
+            if validator.get('last_modified'):
+                headers['If-Modified-Since'] = validator['last_modified']
+        return headers
+
+    def remember_validators(self, url, response_headers):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if etag or last_modified:
+            with self._lock:
+                self.validators[canonical_key(url)] = {'etag': etag, 'last_modified': last_modified}
+
+    def _add_simhash(self, key, value):
+        self._remove_simhash(key)
+        self.simhashes[key] = value
+        for band in self._split(value):
+            self._bands.setdefault(band, []).append(key)
+
+    def _remove_simhash(self, key):
+        value = self.simhashes.pop(key, None)
+        if value is None:
+            return
+        for band in self._split(value):
+            keys = self._bands[band]
+            keys.remove(key)
+            if not keys:
+                del self._bands[band]
+
+    def _split(self, value):
+        width = SIMHASH_BITS // self.BANDS
+        mask = (1 << width) - 1
+        return [(i, (value >> (i * width)) & mask) for i in range(self.BANDS)]
+
+    def find_duplicate(self, text, key=None):
+        """若正文与已保存页面完全相同或近似重复，返回那个页面的 URL 键，否则返回 None
+
+        key 为本页的 URL 键：与本 URL 上次保存的正文完全相同时返回 key（未变化）；
+        与本 URL 的旧版本相近不算重复（文章更新后由调用方覆盖旧文件）。
+        """
+        digest = content_hash(text)
+        if digest in self.hashes:
+            return self.hashes[digest]
+        value = simhash(text)
+        if value is None:
+            return None
+        for band in self._split(value):
+            for other in self._bands.get(band, ()):
+                if other != key and hamming_distance(value, self.simhashes[other]) <= NEAR_DUPLICATE_DISTANCE:
+                    return other
+        return None
+
+    def remember_content(self, key, text, filename=None):
+        """记录已保存页面的指纹，替换该 URL 键此前的指纹；key 为 canonical_key(url)，已有文件用 file:文件名"""
+        digest = content_hash(text)
+        value = simhash(text)
+        with self._lock:
+            old = self._digests.pop(key, None)
+            if old is not None and self.hashes.get(old) == key:
+                del self.hashes[old]
+            # 相同正文此前属于另一个键时，该键不再拥有这条摘要
+            self._digests.pop(self.hashes.get(digest), None)
+            self.hashes[digest] = key
+            self._digests[key] = digest
+            if value is not None:
+                self._add_simhash(key, value)
+            else:
+                self._remove_simhash(key)
+            if filename:
+                self.files[key] = filename
@@ -1,93 +1,45 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import time
-import re
-import os
 from bs4 import XMLParsedAsHTMLWarning
 import warnings
+from crawl_engine import SiteCrawler
+from profiling import profile_run
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
-# 保存目录
+# 保存目录与文件名前缀
 OUTPUT_DIR = "english" # 新华网英文版
 # OUTPUT_DIR = "en.people" # 人民网英文版
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+FILE_PREFIX = "english.news"
+# FILE_PREFIX = "en.people"
 
-visited = set()
-corpus = []
+# 只保留同域链接（避免跳转到外部网站）
+ALLOWED_PREFIXES = ('https://en.people.cn/','http://en.people.cn/',
+                    'https://english.news.cn/', 'http://english.news.cn/')
 
-def fetch_page_text(url):
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; AcademicCrawler/1.0)'
-        }
-        r = requests.get(url, headers=headers, timeout=10)
-        r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, 'html.parser')
-        
-        # 提取标题
-        title = soup.title.text.strip() if soup.title else ""
-        
-        # 提取正文
-        content = ""
-        detail_div = soup.find('div', id='detail')
-        if detail_div:
-            for p in detail_div.find_all('p'):
-                content += p.get_text().strip() + "\n"
-        else:
-            # 备用策略：提取所有 <p>（适用于其他结构页面）
-            for p in soup.find_all('p'):
-                content += p.get_text().strip() + "\n"
-        
-        return title + "\n" + content
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return ""
-    
-def extract_all_links(seed_url):
-    try:
-        r = requests.get(seed_url, headers={'User-Agent': 'AcademicCrawler'})
-        r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, 'html.parser')
-        links = set()
-        for a in soup.find_all('a', href=True):
-            full_url = urljoin(seed_url, a['href'].strip())
-            # 只保留同域链接（避免跳转到外部网站）
-            if full_url.startswith(('https://en.people.cn/','http://en.people.cn/',
-                                    'https://english.news.cn/', 'http://english.news.cn/')):
-                links.add(full_url)
-        return list(links)
-    except Exception as e:
-        print(f"Link extraction failed: {e}")
-        return []
+# 同时把正文追加到打包语料（见 corpus_pack.py），分析脚本可直接读取；None 表示只保存 txt 文件
+PACK_PATH = None  # 例如 OUTPUT_DIR + ".pack"
+# 把抓到的原始网页另存为样本，用于比较解析后端（python html_extract.py <目录>）；None 表示不保存
+HTML_FIXTURE_DIR = None  # 例如 "html_fixtures"
+# True 时每个 URL 只抓取一次：同一份响应解析一次，既取正文也取链接，按内容判断是否为文章页；
+# False 时沿用按 URL 区分详情页（只取正文）和目录页（只取链接）的方式
+FETCH_ONCE = True
+# 文章页判定：较长段落（见 html_extract.looks_like_article）合计至少这么多字符
+ARTICLE_MIN_CHARS = 300
+# 正文优先取 div#detail 中的 <p>，没有时退回所有 <p>（适用于其他结构页面）
+CONTAINER = 'detail'
 
-def crawl_from_seed(seed_url, max_pages=1, delay=1):
-    queue = [seed_url]
-    while queue and len(corpus) < max_pages:
-        url = queue.pop(0)
-        if url in visited:
-            continue
-        visited.add(url)
-        
-        # 判断是否为新闻详情页（含日期和长字符串ID）
-        if '/2025' in url and len(url) > 50:  # 含有年份且字符串长度大于50
-            text = fetch_page_text(url)
-            if text.strip():
-                text = re.sub(r'\s+', ' ', text)
-                corpus.append(text)
-                # 保存到文件（按序号命名）
-                filename = os.path.join(OUTPUT_DIR, f"english.news_{len(corpus)}.txt")
-                # filename = os.path.join(OUTPUT_DIR, f"en.people_{len(corpus)}.txt")
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(text)
-                print(f"Saved {len(corpus)}: {url}")
-        else:
-            # 如果是目录页，继续提取链接
-            new_links = extract_all_links(url)
-            queue.extend(new_links)
-        
-        time.sleep(delay)  
+# 抓取、解析、去重、保存和断点续爬都在 crawl_engine.SiteCrawler 中，这里只提供站点参数
+crawler = SiteCrawler(OUTPUT_DIR, FILE_PREFIX, ALLOWED_PREFIXES, ARTICLE_MIN_CHARS, container=CONTAINER,
+                      fetch_once=FETCH_ONCE, pack_path=PACK_PATH, fixture_dir=HTML_FIXTURE_DIR)
 
-seed_url = "https://english.news.cn/" # 新华网英文版
-# seed_url = "https://en.people.cn/" # 人民网英文版
-crawl_from_seed(seed_url=seed_url, max_pages=1000, delay=0.2)
\ No newline at end of file
+if __name__ == "__main__":
+    seed_url = "https://english.news.cn/" # 新华网英文版
+    # seed_url = "https://en.people.cn/" # 人民网英文版
+
+    # workers > 1 时并发抓取（各主机仍按 delay 限速），workers = 1 时逐个抓取
+    workers = 8
+    # 每次运行结束时把各阶段（抓取、解码、解析、保存）的耗时与吞吐写入 profiles/，
+    # 计数器 article_pages / index_pages 记录按内容判定的页面类型
+    with profile_run("en_crawl"):
+        if workers > 1:
+            crawler.crawl_concurrently(seed_url=seed_url, max_pages=1000, delay=0.2, workers=workers)
+        else:
+            crawler.crawl_from_seed(seed_url=seed_url, max_pages=1000, delay=0.2)
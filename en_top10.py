@@ -1,7 +1,9 @@
-import os
-import re
-from collections import Counter
+import argparse
 import matplotlib.pyplot as plt
+from corpus_cache import load_encoded
+from profiling import profile_run
+from render import batch, render_chart
+from topk import APPROXIMATE_METHODS, stream_counts
 
 # 设置中文字体支持
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
@@ -9,71 +11,81 @@ plt.rcParams['axes.unicode_minus'] = False
 
 def extract_words_from_folder(folder_path):
     """从指定文件夹提取所有英文单词"""
-    all_english_words = []
+    # 分词结果按文件缓存，并编码为整数数组（EncodedCorpus），计数走 bincount
+    return load_encoded(folder_path, 'lower_words')
+
+def count_words_from_folder(folder_path, streaming=False, approximate=None):
+    """统计指定文件夹中各英文单词的出现次数，返回可用 + 合并的计数对象"""
+    if streaming or approximate:
+        # 逐个文件流式计数，不保存完整序列，内存只与词表大小（或近似统计的容量）有关
+        return stream_counts(folder_path, 'lower_words', approximate)
+    return extract_words_from_folder(folder_path).to_counter()
+
+def draw_top_words(top_words, title):
+    """绘制前10个单词的直方图"""
+    words_list, counts = zip(*top_words)
+    
+    plt.figure(figsize=(12, 6))
+    bars = plt.bar(range(len(words_list)), counts, color='blue')
+    plt.xlabel('单词')
+    plt.ylabel('出现次数')
+    plt.title(title)
+    plt.xticks(range(len(words_list)), words_list, rotation=45, ha='right')
     
-    # 遍历文件夹中所有的 .txt 文件
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.txt'):
-            file_path = os.path.join(folder_path, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                    # 提取英文单词（连续的英文字母）
-                    english_words = re.findall(r"[a-zA-Z]+(?:'[a-zA-Z]+)?", content.lower())
-                    all_english_words.extend(english_words)
-            except Exception as e:
-                print(f"读取文件 {file_path} 时出错: {e}")
+    # 在每个柱子上显示具体数值
+    for bar, count in zip(bars, counts):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
+                str(count), ha='center', va='bottom')
     
-    return all_english_words
+    plt.tight_layout()
 
-def plot_top_words(words, title, filename):
-    """绘制前10个单词的直方图"""
-    top_words = Counter(words).most_common(10)
+def plot_top_words(word_counts, title, filename):
+    """保存前10个单词的直方图（非交互渲染，输入未变时跳过）"""
+    top_words = word_counts.most_common(10)
     
     if top_words:
-        words_list, counts = zip(*top_words)
-        
-        plt.figure(figsize=(12, 6))
-        bars = plt.bar(range(len(words_list)), counts, color='blue')
-        plt.xlabel('单词')
-        plt.ylabel('出现次数')
-        plt.title(title)
-        plt.xticks(range(len(words_list)), words_list, rotation=45, ha='right')
-        
-        # 在每个柱子上显示具体数值
-        for bar, count in zip(bars, counts):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                    str(count), ha='center', va='bottom')
-        
-        plt.tight_layout()
-        plt.savefig(filename)
-        plt.show()
+        render_chart(draw_top_words, filename, top_words, title)
     else:
         print("未找到任何英文单词")
 
-# 处理 en.people 文件夹
-en_people_words = extract_words_from_folder("en.people")
-print("en.people 文件夹中出现频率最高的10个英文单词:")
-en_people_top10 = Counter(en_people_words).most_common(10)
-for i, (word, count) in enumerate(en_people_top10, 1):
-    print(f"{i:2d}. {word:<15} : {count:>6} 次")
+def main(streaming=False, approximate=None):
+    # streaming=True 时逐个文件流式计数（不经过缓存，内存只与词表大小有关）；
+    # 语料超出内存时可再指定 approximate='space_saving'、'count_min' 或 'count_sketch' 近似统计高频项
+
+    # 处理 en.people 文件夹
+    en_people_counts = count_words_from_folder("en.people", streaming, approximate)
+    print("en.people 文件夹中出现频率最高的10个英文单词:")
+    en_people_top10 = en_people_counts.most_common(10)
+    for i, (word, count) in enumerate(en_people_top10, 1):
+        print(f"{i:2d}. {word:<15} : {count:>6} 次")
+
+    plot_top_words(en_people_counts, 'en.people文件夹中出现频率最高的10个英文单词', 'en_people_top10.png')
 
-plot_top_words(en_people_words, 'en.people文件夹中出现频率最高的10个英文单词', 'en_people_top10.png')
+    # 处理 english.news 文件夹
+    english_news_counts = count_words_from_folder("english.news", streaming, approximate)
+    print("\nenglish.news 文件夹中出现频率最高的10个英文单词:")
+    english_news_top10 = english_news_counts.most_common(10)
+    for i, (word, count) in enumerate(english_news_top10, 1):
+        print(f"{i:2d}. {word:<15} : {count:>6} 次")
 
-# 处理 english.news 文件夹
-english_news_words = extract_words_from_folder("english.news")
-print("\nenglish.news 文件夹中出现频率最高的10个英文单词:")
-english_news_top10 = Counter(english_news_words).most_common(10)
-for i, (word, count) in enumerate(english_news_top10, 1):
-    print(f"{i:2d}. {word:<15} : {count:>6} 次")
+    plot_top_words(english_news_counts, 'english.news文件夹中出现频率最高的10个英文单词', 'english_news_top10.png')
 
-plot_top_words(english_news_words, 'english.news文件夹中出现频率最高的10个英文单词', 'english_news_top10.png')
+    # 合并两个文件夹的计数（不拼接原始序列）
+    combined_counts = en_people_counts + english_news_counts
+    print("\n合并后出现频率最高的10个英文单词:")
+    combined_top10 = combined_counts.most_common(10)
+    for i, (word, count) in enumerate(combined_top10, 1):
+        print(f"{i:2d}. {word:<15} : {count:>6} 次")
 
-# 合并两个文件夹的内容
-combined_words = en_people_words + english_news_words
-print("\n合并后出现频率最高的10个英文单词:")
-combined_top10 = Counter(combined_words).most_common(10)
-for i, (word, count) in enumerate(combined_top10, 1):
-    print(f"{i:2d}. {word:<15} : {count:>6} 次")
+    plot_top_words(combined_counts, '合并后出现频率最高的10个英文单词', 'combined_top10.png')
 
-plot_top_words(combined_words, '合并后出现频率最高的10个英文单词', 'combined_top10.png')
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--streaming', action='store_true',
+                        help="逐个文件流式计数（不经过缓存，内存只与词表大小有关）")
+    parser.add_argument('--approximate', choices=APPROXIMATE_METHODS,
+                        help="近似统计高频项（流式，内存固定），适合超出内存的语料")
+    args = parser.parse_args()
+    # 所有图表在最后统一用进程池渲染；结束时把各阶段耗时写入 profiles/en_top10.json / .csv
+    with profile_run("en_top10"), batch():
+        main(streaming=args.streaming, approximate=args.approximate)
@@ -0,0 +1,220 @@
+import math
+from statistics import NormalDist
+import numpy as np
+from profiling import profiler
+
+# 信息熵估计量（单位：比特）。输入为计数向量；plugin / miller_madow / chao_shen 也接受
+# 二维计数矩阵（每行一个重抽样样本），按行向量化计算。
+
+_LN2 = math.log(2)
+
+
+def _as_rows(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    return counts[None, :] if counts.ndim == 1 else counts, counts.ndim == 1
+
+
+def _xlogx_sum(p):
+    """Σ p·ln(p)，约定 0·ln(0) = 0"""
+    return np.sum(p * np.log(np.where(p > 0, p, 1.0)), axis=-1)
+
+
+def plugin_entropy(counts):
+    """直接代入频率的估计量（与 entropy_utils 中的结果相同），样本较小时系统性偏低"""
+    rows, single = _as_rows(counts)
+    n = rows.sum(axis=1)
+    h = -_xlogx_sum(rows / n[:, None]) / _LN2
+    return float(h[0]) if single else h
+
+
+def miller_madow(counts):
+    """Miller–Madow 修正：在代入估计上加 (K - 1) / 2N，K 为观测到的符号种类数"""
+    rows, single = _as_rows(counts)
+    n = rows.sum(axis=1)
+    k = np.count_nonzero(rows, axis=1)
+    h = plugin_entropy(rows) + (k - 1) / (2 * n * _LN2)
+    return float(h[0]) if single else h
+
+
+def chao_shen(counts):
+    """Chao–Shen 估计：用 Good–Turing 覆盖率修正频率，再做 Horvitz–Thompson 加权，兼顾未出现的符号"""
+    rows, single = _as_rows(counts)
+    n = rows.sum(axis=1)[:, None]
+    f1 = np.sum(rows == 1, axis=1)[:, None]
+    # 全部符号都只出现一次时覆盖率为 0，按惯例把 f1 减一
+    f1 = np.where(f1 == n, n - 1, f1)
+    coverage = 1 - f1 / n
+    pa = coverage * rows / n
+    observed = pa > 0
+    safe = np.where(observed, pa, 0.5)
+    inclusion = 1 - np.power(1 - safe, n)
+    terms = np.where(observed, -safe * np.log(safe) / inclusion, 0.0)
+    h = terms.sum(axis=1) / _LN2
+    return float(h[0]) if single else h
+
+
+def _digamma(x):
+    """ψ(x)，x > 0：先用递推把自变量移到 6 以上，再用渐近展开"""
+    x = np.array(x, dtype=np.float64)
+    result = np.zeros_like(x)
+    for _ in range(6):
+        small = x < 6
+        if not small.any():
+            break
+        result[small] -= 1 / x[small]
+        x[small] += 1
+    inv2 = 1 / (x * x)
+    return result + np.log(x) - 0.5 / x - inv2 * (1 / 12 - inv2 * (1 / 120 - inv2 / 252))
+
+
+def _trigamma(x):
+    """ψ'(x)，x > 0"""
+    x = np.array(x, dtype=np.float64)
+    result = np.zeros_like(x)
+    for _ in range(6):
+        small = x < 6
+        if not small.any():
+            break
+        result[small] += 1 / (x[small] * x[small])
+        x[small] += 1
+    inv = 1 / x
+    inv2 = inv * inv
+    return result + inv + inv2 / 2 + inv * inv2 * (1 / 6 - inv2 * (1 / 30 - inv2 / 42))
+
+
+def _lgamma(x):
+    """ln Γ(x)，x > 0（Stirling 级数加递推）"""
+    x = np.array(x, dtype=np.float64)
+    result = np.zeros_like(x)
+    for _ in range(6):
+        small = x < 6
+        if not small.any():
+            break
+        result[small] -= np.log(x[small])
+        x[small] += 1
+    inv = 1 / x
+    inv2 = inv * inv
+    return (result + (x - 0.5) * np.log(x) - x + 0.5 * math.log(2 * math.pi)
+            + inv * (1 / 12 - inv2 * (1 / 360 - inv2 / 1260)))
+
+
+def chao1_richness(counts):
+    """Chao1 物种数估计：K_obs + f1² / 2f2，用作未知字母表大小的默认值"""
+    counts = np.asarray(counts)
+    k_obs = np.count_nonzero(counts)
+    f1 = np.sum(counts == 1)
+    f2 = np.sum(counts == 2)
+    extra = f1 * f1 / (2 * f2) if f2 > 0 else f1 * (f1 - 1) / 2
+    return int(math.ceil(k_obs + extra))
+
+
+def nsb_entropy(counts, alphabet_size=None, grid=400):
+    """NSB 风格的贝叶斯估计：对 Dirichlet(β) 先验下的后验熵期望按 β 做混合
+
+    混合权重为证据 p(n|β) 乘以 dξ/dβ（ξ 为先验下的熵期望），使先验在熵上近似均匀。
+    alphabet_size 默认取 Chao1 估计；积分在对数等距的 β 网格上数值完成。
+    """
+    counts = np.asarray(counts)
+    # 按计数值分组（出现 v 次的符号有 m_v 个），求和只需遍历不同的计数值
+    values, multiplicity = np.unique(counts[counts > 0], return_counts=True)
+    values = values.astype(np.float64)
+    k_obs = int(multiplicity.sum())
+    n = float(np.dot(values, multiplicity))
+    k = max(alphabet_size or chao1_richness(counts), k_obs)
+    unseen = k - k_obs
+    log_beta = np.linspace(math.log(1e-4), math.log(1e4), grid)
+    beta = np.exp(log_beta)
+    shifted = values[None, :] + beta[:, None]
+
+    # 证据（省略与 β 无关的常数）：ln Γ(Kβ) - ln Γ(N + Kβ) + Σ_i [ln Γ(n_i + β) - ln Γ(β)]
+    evidence = (_lgamma(k * beta) - _lgamma(n + k * beta)
+                + _lgamma(shifted) @ multiplicity - k_obs * _lgamma(beta))
+    dxi = k * _trigamma(k * beta + 1) - _trigamma(beta + 1)
+    # 对数网格上积分：dβ = β·d(ln β)
+    log_weight = evidence + np.log(dxi) + log_beta
+    weight = np.exp(log_weight - log_weight.max())
+    weight /= weight.sum()
+
+    # 给定 β 的后验熵期望：ψ(N + Kβ + 1) - Σ_i (n_i + β)/(N + Kβ)·ψ(n_i + β + 1)（未出现的符号 n_i = 0）
+    a = n + k * beta
+    posterior = (_digamma(a + 1)
+                 - (shifted * _digamma(shifted + 1)) @ multiplicity / a
+                 - unseen * beta * _digamma(beta + 1) / a)
+    return float(np.dot(weight, posterior) / _LN2)
+
+
+ESTIMATORS = {
+    'plugin': plugin_entropy,
+    'miller_madow': miller_madow,
+    'chao_shen': chao_shen,
+    'nsb': nsb_entropy,
+}
+# 可以直接作用于重抽样计数矩阵（按行）的估计量
+_VECTORIZED = {'plugin', 'miller_madow', 'chao_shen'}
+
+
+def _apply(estimator, counts):
+    if estimator in _VECTORIZED or counts.ndim == 1:
+        return np.asarray(ESTIMATORS[estimator](counts))
+    return np.array([ESTIMATORS[estimator](row) for row in counts])
+
+
+def estimate_entropies(ids, scales, estimator='miller_madow', vocab_size=None):
+    """各前缀规模下的熵估计（与 prefix_entropies 相同的前缀，换用修正后的估计量）"""
+    if vocab_size is None:
+        vocab_size = int(ids.max()) + 1 if len(ids) else 1
+    with profiler.stage("entropy_estimator") as record:
+        counts = np.zeros(vocab_size, dtype=np.int64)
+        results = [0.0] * len(scales)
+        pos = 0
+        for i in sorted(range(len(scales)), key=lambda j: scales[j]):
+            end = min(scales[i], len(ids))
+            if end > pos:
+                counts += np.bincount(ids[pos:end], minlength=vocab_size)
+                pos = end
+            results[i] = float(_apply(estimator, counts))
+        record['items'] = pos
+    return results
+
+
+def entropy_bands(ids, scales, estimator='miller_madow', mode='bootstrap', n_rep=100,
+                  alpha=0.05, seed=0, vocab_size=None):
+    """各规模下熵估计的置信带，返回 (点估计, 下界, 上界) 三个列表
+
+    mode='bootstrap'：对前 s 个符号的频率做多项式重抽样（有放回），点估计为原前缀上的估计，
+    区间为点估计 ± z·(重抽样估计的标准差)；
+    mode='subsample'：从整个语料中无放回随机抽取 s 个符号（多元超几何分布），
+    点估计为各次抽样的平均、区间为其分位数，因此结果不依赖文件顺序。
+    重抽样直接在计数向量上进行，每次的代价与词表大小成正比，而不是与 s 成正比。
+    """
+    if vocab_size is None:
+        vocab_size = int(ids.max()) + 1 if len(ids) else 1
+    with profiler.stage("entropy_bands") as record:
+        rng = np.random.default_rng(seed)
+        total_counts = np.bincount(ids, minlength=vocab_size)
+        prefix = np.zeros(vocab_size, dtype=np.int64)
+        pos = 0
+        point, low, high = [0.0] * len(scales), [0.0] * len(scales), [0.0] * len(scales)
+        for i in sorted(range(len(scales)), key=lambda j: scales[j]):
+            s = min(scales[i], len(ids))
+            if mode == 'bootstrap':
+                if s > pos:
+                    prefix += np.bincount(ids[pos:s], minlength=vocab_size)
+                    pos = s
+                samples = rng.multinomial(s, prefix / s, size=n_rep)
+                point[i] = float(_apply(estimator, prefix))
+            elif mode == 'subsample':
+                samples = rng.multivariate_hypergeometric(total_counts, s, size=n_rep,
+                                                          method='marginals')
+            else:
+                raise ValueError(f"未知的重抽样方式: {mode}")
+            estimates = _apply(estimator, samples)
+            if mode == 'subsample':
+                point[i] = float(estimates.mean())
+                low[i], high[i] = (float(q) for q in np.quantile(estimates, [alpha / 2, 1 - alpha / 2]))
+            else:
+                # 重抽样样本中的稀有符号更少，估计整体偏低，因此区间以原估计为中心、取 ± z·标准差
+                half_width = NormalDist().inv_cdf(1 - alpha / 2) * float(estimates.std(ddof=1))
+                low[i], high[i] = point[i] - half_width, point[i] + half_width
+        record['items'] = n_rep * len(scales)
+    return point, low, high
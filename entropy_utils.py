@@ -0,0 +1,223 @@
+import math
+import os
+from collections import Counter
+import numpy as np
+from profiling import profiler
+
+# n 元组熵计算的内存预算（字节，可通过环境变量 NGRAM_MEMORY_BUDGET 修改）：
+# 输入按预算切段处理，每段的临时键数组与排序缓冲不超过预算
+NGRAM_MEMORY_BUDGET = int(os.environ.get("NGRAM_MEMORY_BUDGET", 256 << 20))
+# 每个位置在一段内大约占用的临时内存（键数组、排序与去重的中间结果）
+_NGRAM_BYTES_PER_POSITION = 48
+
+
+def _c_log_c(c):
+    """计算 c·log2(c)，约定 0·log2(0) = 0"""
+    return c * math.log2(c) if c > 0 else 0.0
+
+
+class PrefixEntropy:
+    """流式信息熵累加器：按顺序加入符号，随时给出当前前缀的信息熵
+
+    维护 N = Σc 与 S = Σ c·log2(c)，则 H = log2(N) - S / N，
+    加入新符号时只需更新受影响的计数项，无需重新统计整个前缀。
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum_c_log_c = 0.0
+
+    def update(self, tokens):
+        """加入一段符号序列"""
+        # 先用 Counter 在 C 层面统计本段，再按不同符号逐个修正 S
+        counts = self.counts
+        delta = 0.0
+        added = 0
+        for token, k in Counter(tokens).items():
+            old = counts.get(token, 0)
+            new = old + k
+            counts[token] = new
+            delta += _c_log_c(new) - _c_log_c(old)
+            added += k
+        self.sum_c_log_c += delta
+        self.total += added
+
+    def entropy(self):
+        """返回当前前缀的信息熵（比特/符号）"""
+        if self.total == 0:
+            return 0.0
+        # 浮点误差可能让结果出现极小的负数
+        return max(0.0, math.log2(self.total) - self.sum_c_log_c / self.total)
+
+
+class ArrayPrefixEntropy(PrefixEntropy):
+    """整数编号数组版本的累加器：计数存放在数组中，每段用 bincount 向量化更新"""
+
+    def __init__(self):
+        super().__init__()
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, ids):
+        """加入一段编号序列"""
+        seg = np.bincount(ids)
+        touched = np.flatnonzero(seg)
+        self.update_counts(touched, seg[touched])
+
+    def update_counts(self, ids, counts):
+        """加入一组互不相同的编号及其次数（例如一个文档的计数向量），不需要符号序列"""
+        if len(ids) and ids.max() >= len(self.counts):
+            self.counts = np.concatenate(
+                [self.counts, np.zeros(int(ids.max()) + 1 - len(self.counts), dtype=np.int64)])
+        old = self.counts[ids]
+        new = old + counts
+        self.counts[ids] = new
+        # old 可能为 0，用 max(old, 1) 取对数以保证 0·log2(0) = 0
+        self.sum_c_log_c += float(np.sum(new * np.log2(new))
+                                  - np.sum(old * np.log2(np.maximum(old, 1))))
+        self.total += int(np.sum(counts))
+
+
+def prefix_entropies(tokens, scales):
+    """一次遍历计算 tokens 在各前缀规模下的信息熵，返回与 scales 一一对应的列表
+
+    tokens 可以是符号列表，也可以是 vocab.EncodedCorpus 的整数编号数组；
+    也可以是提供 prefix_entropies 方法的对象（如 stats_store.StoredCorpus，按文档计数向量累加）。
+    规模超过序列长度时按整个序列计算，与逐个切片统计的结果一致。
+    """
+    if hasattr(tokens, 'prefix_entropies'):
+        return tokens.prefix_entropies(scales)
+    with profiler.stage("entropy") as record:
+        n = len(tokens)
+        results = [0.0] * len(scales)
+        acc = ArrayPrefixEntropy() if isinstance(tokens, np.ndarray) else PrefixEntropy()
+        pos = 0
+        # 按规模从小到大推进，每个检查点只统计新增的那一段
+        for i in sorted(range(len(scales)), key=lambda j: scales[j]):
+            end = min(scales[i], n)
+            if end > pos:
+                acc.update(tokens[pos:end])
+                pos = end
+            results[i] = acc.entropy()
+        record['items'] = pos
+    return results
+
+
+class _SparseCounts:
+    """按键有序存放的稀疏计数表（键为 uint64 或定长字节串），同时维护 S = Σ c·log2(c)"""
+
+    def __init__(self):
+        self.keys = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sum_c_log_c = 0.0
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def nbytes(self):
+        return 0 if self.keys is None else self.keys.nbytes + self.counts.nbytes
+
+    def add(self, keys):
+        uniq, k = np.unique(keys, return_counts=True)
+        if self.keys is None:
+            self.keys = uniq[:0]
+        idx = np.searchsorted(self.keys, uniq)
+        found = idx < len(self.keys)
+        found[found] = self.keys[idx[found]] == uniq[found]
+        hit = idx[found]
+        old = self.counts[hit]
+        new = old + k[found]
+        self.counts[hit] = new
+        fresh = k[~found]
+        self.sum_c_log_c += float(np.sum(new * np.log2(new)) - np.sum(old * np.log2(old))
+                                  + np.sum(fresh * np.log2(fresh)))
+        if fresh.size:
+            self.keys = np.insert(self.keys, idx[~found], uniq[~found])
+            self.counts = np.insert(self.counts, idx[~found], fresh)
+
+
+class NgramEntropy:
+    """n 元条件熵 H(X_n | X_1..X_{n-1}) 的流式累加器
+
+    H = (Σ_上下文 c·log2(c) - Σ_n元组 c·log2(c)) / M，M 为 n 元组位置数，两张表统计同一批位置。
+    n 元组编码为 uint64 整数键：key = Σ x_j·V^(n-1-j)（V^n 超出 64 位时改用定长字节串作键）。
+    分段加入时保留末尾 n-1 个符号作为下一段的上下文，结果与一次性统计完全相同。
+    """
+
+    def __init__(self, n, vocab_size):
+        self.n = n
+        self.base = max(int(vocab_size), 1)
+        self.packed = self.base ** n < 1 << 64
+        self.ngrams = _SparseCounts()
+        self.contexts = _SparseCounts()
+        self.total = 0
+        self._tail = np.zeros(0, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        return self.ngrams.nbytes + self.contexts.nbytes
+
+    def _void_keys(self, seq, k, m):
+        windows = np.lib.stride_tricks.sliding_window_view(seq, k)[:m]
+        rows = np.ascontiguousarray(windows.astype(np.uint32))
+        return rows.view(np.dtype((np.void, 4 * k))).ravel()
+
+    def update(self, ids):
+        """加入一段编号序列"""
+        seq = np.concatenate([self._tail, np.asarray(ids, dtype=np.int64)])
+        m = len(seq) - self.n + 1
+        if m <= 0:
+            self._tail = seq
+            return
+        if self.packed:
+            base = np.uint64(self.base)
+            context = np.zeros(m, dtype=np.uint64)
+            for j in range(self.n - 1):
+                context = context * base + seq[j:j + m].astype(np.uint64)
+            ngram = context * base + seq[self.n - 1:self.n - 1 + m].astype(np.uint64)
+        else:
+            context = self._void_keys(seq, self.n - 1, m)
+            ngram = self._void_keys(seq, self.n, m)
+        self.ngrams.add(ngram)
+        if self.n > 1:
+            self.contexts.add(context)
+        self.total += m
+        self._tail = seq[m:]
+
+    def entropy(self):
+        """返回当前前缀的条件熵（比特/符号）；n = 1 时即普通信息熵"""
+        if self.total == 0:
+            return 0.0
+        context_sum = self.contexts.sum_c_log_c if self.n > 1 else _c_log_c(self.total)
+        return max(0.0, (context_sum - self.ngrams.sum_c_log_c) / self.total)
+
+
+def ngram_entropies(ids, scales, max_n=5, vocab_size=None, memory_budget=None):
+    """一次遍历计算各前缀规模下 n = 1..max_n 的条件熵，返回 {n: [与 scales 对应的熵]}
+
+    ids 为整数编号数组。输入按规模检查点与内存预算切段，各 n 共用同一次遍历。
+    预算约束的是每段的临时数组；不同 n 元组的计数表本身需要能放进内存。
+    """
+    if memory_budget is None:
+        memory_budget = NGRAM_MEMORY_BUDGET
+    if vocab_size is None:
+        vocab_size = int(ids.max()) + 1 if len(ids) else 1
+    with profiler.stage("ngram_entropy") as record:
+        accs = [NgramEntropy(n, vocab_size) for n in range(1, max_n + 1)]
+        results = {n: [0.0] * len(scales) for n in range(1, max_n + 1)}
+        total = len(ids)
+        pos = 0
+        for i in sorted(range(len(scales)), key=lambda j: scales[j]):
+            end = min(scales[i], total)
+            while pos < end:
+                free = memory_budget - sum(acc.nbytes for acc in accs)
+                chunk = max(1 << 16, free // (_NGRAM_BYTES_PER_POSITION * max_n))
+                stop = min(end, pos + chunk)
+                for acc in accs:
+                    acc.update(ids[pos:stop])
+                pos = stop
+            for acc in accs:
+                results[acc.n][i] = acc.entropy()
+        record['items'] = pos
+    return results
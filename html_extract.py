@@ -0,0 +1,331 @@
+import codecs
+import hashlib
+import html as html_lib
+import json
+import os
+import re
+import sys
+import time
+from requests.compat import chardet
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # 可选依赖：pip install selectolax
+    LexborHTMLParser = None
+try:
+    import lxml.html as lxml_html
+except ImportError:  # 可选依赖：pip install lxml
+    lxml_html = None
+
+# 网页解码与正文/链接提取，供两个爬虫共用。
+# 解析后端可替换：selectolax（lexbor，C 实现）> lxml（libxml2）> BeautifulSoup（html.parser，纯 Python），
+# 默认使用已安装的最快后端，可用环境变量 HTML_BACKEND 指定。
+# 链接默认用正则直接扫描 <a href>，不构建文档树。
+
+BACKEND = os.environ.get("HTML_BACKEND", "auto")
+LINK_BACKEND = os.environ.get("HTML_LINK_BACKEND", "regex")
+
+# 只在页面开头查找 <meta charset>（HTML 标准要求声明出现在前 1024 字节内，这里放宽一些）
+META_SCAN_BYTES = 4096
+# looks_like_article 只统计不短于该字符数的段落（短段落多为导航、标题、版权信息）
+ARTICLE_PARAGRAPH_CHARS = 30
+_CHARSET_PARAM_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+# GB2312/GBK 页面里常有超出声明字符集的字，统一按其超集 GB18030 解码
+_ENCODING_ALIASES = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'x-gbk': 'gb18030', 'cp936': 'gb18030'}
+_BOMS = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+# 一次扫描：跳过注释和 <script>/<style> 的内容（与解析器的处理一致），只取 <a> 标签的 href
+_LINK_SCAN_RE = re.compile(
+    r'<!--.*?-->|<(script|style)\b.*?</\1\s*>'
+    r'|<a\s[^>]*?(?<![\w-])href\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))',
+    re.S | re.I)
+
+
+def _normalize_encoding(name):
+    """把声明的字符集名称规范化，无法识别时返回 None"""
+    name = _ENCODING_ALIASES.get(name.lower(), name.lower())
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def page_encoding(headers, content):
+    """确定网页的编码，返回 (编码, 来源)
+
+    依次使用：BOM、Content-Type 响应头的 charset、页面开头的 <meta charset>、
+    能否按 UTF-8 无错解码；都不成立时才对整个正文做字符集探测（即 requests 的 apparent_encoding）。
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding, 'bom'
+    match = _CHARSET_PARAM_RE.search(headers.get('Content-Type', '') if headers else '')
+    if match:
+        encoding = _normalize_encoding(match.group(1))
+        if encoding:
+            return encoding, 'header'
+    match = _META_CHARSET_RE.search(content[:META_SCAN_BYTES])
+    if match:
+        encoding = _normalize_encoding(match.group(1).decode('ascii', 'ignore'))
+        if encoding:
+            return encoding, 'meta'
+    try:
+        content.decode('utf-8')
+        return 'utf-8', 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    detected = chardet.detect(content)['encoding']
+    return (_normalize_encoding(detected) if detected else None) or 'utf-8', 'detect'
+
+
+def decode_html(headers, content):
+    """按 page_encoding 确定的编码把响应正文解码为字符串（无法解码的字节替换为 U+FFFD）"""
+    encoding, _ = page_encoding(headers, content)
+    return content.decode(encoding, errors='replace')
+
+
+def available_backends():
+    """当前环境中可用的解析后端，按速度从快到慢排列"""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    if lxml_html is not None:
+        backends.append('lxml')
+    backends.append('bs4')
+    return backends
+
+
+def _resolve(backend):
+    backend = backend or BACKEND
+    if backend == 'auto':
+        return available_backends()[0]
+    if backend not in EXTRACTORS:
+        raise ValueError(f"未知的解析后端: {backend}")
+    if backend not in available_backends() and backend != 'regex':
+        raise ImportError(f"解析后端 {backend} 未安装")
+    return backend
+
+
+def _parse_selectolax(html):
+    return LexborHTMLParser(html)
+
+
+def _article_selectolax(tree, container):
+    title_node = tree.css_first('title')
+    title = title_node.text().strip() if title_node else ""
+    scope = tree.css_first(f'div#{container}') if container else None
+    paragraphs = (scope or tree).css('p')
+    return title, [p.text().strip() for p in paragraphs]
+
+
+def _links_selectolax(tree):
+    return [a.attributes.get('href') or "" for a in tree.css('a[href]')]
+
+
+_LXML_PARSER = None
+
+
+def _parse_lxml(html):
+    global _LXML_PARSER
+    if _LXML_PARSER is None:
+        _LXML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+    # 以字节传入：lxml 不接受带 XML 编码声明的 str
+    return lxml_html.document_fromstring(html.encode('utf-8', 'surrogatepass'), parser=_LXML_PARSER)
+
+
+def _article_lxml(doc, container):
+    title_node = doc.find('.//title')
+    title = title_node.text_content().strip() if title_node is not None else ""
+    scope = doc.xpath('//div[@id=$id]', id=container) if container else None
+    paragraphs = (scope[0] if scope else doc).iter('p')
+    return title, [p.text_content().strip() for p in paragraphs]
+
+
+def _links_lxml(doc):
+    return [a.get('href') for a in doc.iter('a') if a.get('href') is not None]
+
+
+def _parse_bs4(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser')
+
+
+def _article_bs4(soup, container):
+    title = soup.title.text.strip() if soup.title else ""
+    scope = soup.find('div', id=container) if container else None
+    paragraphs = (scope or soup).find_all('p')
+    return title, [p.get_text().strip() for p in paragraphs]
+
+
+def _links_bs4(soup):
+    return [a['href'] for a in soup.find_all('a', href=True)]
+
+
+def _links_regex(html):
+    links = []
+    for m in _LINK_SCAN_RE.finditer(html):
+        # 注释和 script/style 的匹配没有 href 分组（lastindex 为 None 或 1）
+        if m.lastindex and m.lastindex > 1:
+            links.append(html_lib.unescape(m.group(m.lastindex)))
+    return links
+
+
+# 后端 -> (构建文档, 从文档提取正文, 从文档提取链接)；regex 不构建文档树，只能提取链接
+EXTRACTORS = {
+    'selectolax': (_parse_selectolax, _article_selectolax, _links_selectolax),
+    'lxml': (_parse_lxml, _article_lxml, _links_lxml),
+    'bs4': (_parse_bs4, _article_bs4, _links_bs4),
+    'regex': (None, None, _links_regex),
+}
+
+
+def extract_article(html, container=None, backend=None):
+    """返回 (标题, [各段落文本])
+
+    container 为 div 的 id（如 'detail'）时只取该 div 中的 <p>，页面没有该 div 时退回全部 <p>。
+    """
+    backend = _resolve(backend)
+    parse, article, _ = EXTRACTORS[backend]
+    if article is None:
+        raise ValueError(f"解析后端 {backend} 不能提取正文")
+    return article(parse(html), container)
+
+
+def extract_links(html, backend=None):
+    """按文档顺序返回所有 <a href> 的值（未拼接成绝对地址）"""
+    backend = _resolve(backend or LINK_BACKEND)
+    parse, _, links = EXTRACTORS[backend]
+    return [href.strip() for href in links(parse(html) if parse else html)]
+
+
+def extract_page(html, container=None, backend=None):
+    """只解析一次，同时返回 (标题, [各段落文本], [各 <a href> 的值])，供一次抓取同时取正文和链接"""
+    backend = _resolve(backend)
+    parse, article, links = EXTRACTORS[backend]
+    if article is None:
+        raise ValueError(f"解析后端 {backend} 不能提取正文")
+    doc = parse(html)
+    title, paragraphs = article(doc, container)
+    return title, paragraphs, [href.strip() for href in links(doc)]
+
+
+def looks_like_article(paragraphs, min_chars, min_paragraph_chars=ARTICLE_PARAGRAPH_CHARS):
+    """按内容判断是否为文章页：长度不少于 min_paragraph_chars 的段落合计至少 min_chars 个字符
+
+    目录页的 <p> 多是标题、摘要和版权声明，短段落不计入，因此不会因为条目多而被当作文章。
+    """
+    return sum(len(p) for p in paragraphs if len(p) >= min_paragraph_chars) >= min_chars
+
+
+def save_fixture(directory, url, response):
+    """把原始响应保存为测试样本：<摘要>.html 为正文字节，<摘要>.json 为 URL 与 Content-Type"""
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    with open(os.path.join(directory, name + '.html'), 'wb') as f:
+        f.write(response.content)
+    with open(os.path.join(directory, name + '.json'), 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'content_type': response.headers.get('Content-Type', '')}, f)
+
+
+def load_fixtures(directory):
+    """读取 save_fixture 保存的样本，返回 [(文件名, 响应头, 正文字节, 元数据), ...]
+
+    元数据来自同名 .json（url、content_type，回归样本另有 container 与 links）；
+    回归样本还可以有同名 .txt，内容为期望的正文（与爬虫保存的文件相同），存入元数据的 'expected'。
+    """
+    fixtures = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(('.html', '.htm')):
+            continue
+        with open(os.path.join(directory, filename), 'rb') as f:
+            content = f.read()
+        headers, meta = {}, {}
+        stem = os.path.join(directory, os.path.splitext(filename)[0])
+        if os.path.exists(stem + '.json'):
+            with open(stem + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            headers['Content-Type'] = meta.get('content_type', '')
+        if os.path.exists(stem + '.txt'):
+            with open(stem + '.txt', encoding='utf-8', newline='') as f:
+                meta['expected'] = f.read()
+        fixtures.append((filename, headers, content, meta))
+    return fixtures
+
+
+def _time_per_page(func, items, repeat=3):
+    """对每个样本调用 func，返回 (每页毫秒数（取 repeat 次中最快的一次）, 结果列表)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(item) for item in items]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000 / max(len(items), 1), results
+
+
+def normalized_article(article):
+    """与爬虫保存文件时相同的空白折叠，用于比较不同后端的正文与期望正文"""
+    title, paragraphs = article
+    return re.sub(r'\s+', ' ', title + "\n" + "".join(p + "\n" for p in paragraphs))
+
+
+def compare_backends(directory, container='detail', repeat=3):
+    """在保存的网页样本上比较解码与各后端的耗时，以及提取结果与 BeautifulSoup（和期望正文）是否一致
+
+    样本元数据中有 container 时按样本的设置提取正文，否则用参数 container。
+    """
+    fixtures = load_fixtures(directory)
+    if not fixtures:
+        print(f"{directory} 中没有 .html 样本（可在爬虫中设置 HTML_FIXTURE_DIR 保存）")
+        return
+    print(f"{len(fixtures)} 个样本，共 {sum(len(c) for _, _, c, _ in fixtures) / (1 << 20):.1f} MB")
+
+    def detect(item):
+        encoding = chardet.detect(item[2])['encoding'] or 'utf-8'
+        return item[2].decode(encoding, errors='replace')
+
+    ms_detect, _ = _time_per_page(detect, fixtures, repeat)
+    ms_decode, texts = _time_per_page(lambda item: decode_html(item[1], item[2]), fixtures, repeat)
+    sources = {}
+    for _, headers, content, _ in fixtures:
+        source = page_encoding(headers, content)[1]
+        sources[source] = sources.get(source, 0) + 1
+    print(f"解码: apparent_encoding {ms_detect:.2f} ms/页，响应头/meta 优先 {ms_decode:.2f} ms/页"
+          f"（编码来源 {sources}）")
+
+    containers = [meta.get('container', container) for _, _, _, meta in fixtures]
+    expected = [(i, meta['expected']) for i, (_, _, _, meta) in enumerate(fixtures) if 'expected' in meta]
+    items = list(zip(texts, containers))
+    reference = None
+    for backend in ['bs4'] + [b for b in available_backends() if b != 'bs4']:
+        ms, articles = _time_per_page(lambda item: extract_article(item[0], item[1], backend), items, repeat)
+        normalized = [normalized_article(a) for a in articles]
+        if reference is None:
+            reference, base_ms = normalized, ms
+        same = sum(a == b for a, b in zip(normalized, reference))
+        line = f"正文 {backend:<10} {ms:7.2f} ms/页（{base_ms / ms:5.1f}x），与 bs4 一致 {same}/{len(texts)}"
+        if expected:
+            line += f"，与期望正文一致 {sum(normalized[i] == text for i, text in expected)}/{len(expected)}"
+        print(line)
+
+    reference = None
+    for backend in ['bs4', 'regex'] + [b for b in available_backends() if b != 'bs4']:
+        ms, links = _time_per_page(lambda text: set(extract_links(text, backend)), texts, repeat)
+        if reference is None:
+            reference, base_ms = links, ms
+        same = sum(a == b for a, b in zip(links, reference))
+        print(f"链接 {backend:<10} {ms:7.2f} ms/页（{base_ms / ms:5.1f}x），与 bs4 一致 {same}/{len(texts)}")
+
+    # 抓取时正文和链接来自同一次解析（extract_page），与分别解析两次对比
+    for backend in available_backends():
+        ms_twice, _ = _time_per_page(lambda item: (extract_article(item[0], item[1], backend),
+                                                   extract_links(item[0], backend)), items, repeat)
+        ms_once, _ = _time_per_page(lambda item: extract_page(item[0], item[1], backend), items, repeat)
+        print(f"正文+链接 {backend:<10} 分别解析 {ms_twice:7.2f} ms/页，单次解析 {ms_once:7.2f} ms/页")
+
+
+if __name__ == "__main__":
+    # 用法：python html_extract.py <样本目录> [正文 div 的 id，默认 detail]
+    compare_backends(sys.argv[1] if len(sys.argv) > 1 else 'html_fixtures',
+                     sys.argv[2] if len(sys.argv) > 2 else 'detail')
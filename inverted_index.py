@@ -0,0 +1,504 @@
+import argparse
+import json
+import mmap
+import os
+import pickle
+import re
+import time
+import numpy as np
+from corpus_cache import iter_texts, list_documents
+from profiling import profile_run, profiler
+from script_classes import SIGNATURE, regex_class
+from vocab import Vocabulary
+
+# 倒排索引：词项 -> 包含它的文档及其在文档中的位置，建在语料文件夹（或打包语料 .pack）之上。
+# 索引目录结构：
+#   meta.json     —— 文档表（编号 -> 语料、文档名、状态戳、词项数、是否有效）与段列表
+#   seg_<n>.lex   —— 段的词典：词项 -> (偏移, 字节数, 文档频率, 出现次数)，pickle
+#   seg_<n>.post  —— 段的倒排表：每个词项一块，依次为文档编号差值、各文档词频、文档内位置差值，均为 varint
+# 位置逐词项加 1，词项之间隔着标点、换行等不能连读的字符时再多加 1（见 term_positions()），
+# 短语查询要求位置之差与查询中的相同，因此不会跨过标点或段落匹配。
+# 带撇号的英文单词（jinping's、don't）另在同一位置记一次撇号前的部分，"xi jinping" 因此也匹配 "Xi Jinping's"。
+# 增量更新只为新增或修改过的文档写一个新段，旧版本和已删除的文档在文档表中标记为无效；
+# 段数超过 MAX_SEGMENTS 时合并为一个段（只读倒排表，不重新读取语料）。
+
+# 索引目录（可通过环境变量 INVERTED_INDEX_DIR 修改）
+INDEX_DIR = os.environ.get("INVERTED_INDEX_DIR", ".inverted_index")
+INDEX_VERSION = 2
+MAX_SEGMENTS = 8
+DEFAULT_FOLDERS = ['en.people', 'english.news', 'renminwang', 'xinhuawang']
+
+_HAN = regex_class('han')
+_LATIN = regex_class('latin')
+# 词项前的间隔 + 一个汉字串或一个英文单词（在转小写后的文本上匹配，切分与 'terms' 相同）
+_GAP_TERM_RE = re.compile(f"([^{_HAN}{_LATIN}]*)([{_HAN}]+|[{_LATIN}]+(?:'[{_LATIN}]+)?)")
+# 不换行的空白：英文单词之间、汉字与英文之间的这类间隔不打断短语
+_INLINE_SPACE_RE = re.compile(r"[^\S\r\n]+")
+
+
+def term_positions(text):
+    """文本的词项及其位置：(词项列表, 位置数组)
+
+    词项与 tokenizer.TOKENIZERS['terms'] 相同（汉字逐字、英文单词转小写）。相邻词项的位置差 1；
+    二者之间隔着标点、换行等字符时差 2，只隔着不换行的空白且有一边是英文单词时仍差 1（汉字之间有任何字符都差 2）。
+    """
+    matches = _GAP_TERM_RE.findall(text.lower())
+    if not matches:
+        return [], np.zeros(0, dtype=np.int64)
+    gaps, runs = zip(*matches)
+    # 间隔种类：0 无间隔，1 不换行的空白，2 其他；相同的间隔字符串只判断一次
+    kinds = {'': 0}
+    kind = np.array([kinds[gap] if gap in kinds else
+                     kinds.setdefault(gap, 1 if _INLINE_SPACE_RE.fullmatch(gap) else 2) for gap in gaps])
+    latin = np.array([run < "\x80" for run in runs])
+    latin_before = np.concatenate([[False], latin[:-1]])
+    broken = (kind == 2) | ((kind == 1) & ~latin & ~latin_before)
+    # 汉字串逐字为词项，只有第一个字之前可能有间隔
+    lengths = np.where(latin, 1, [len(run) for run in runs])
+    first = np.cumsum(lengths) - lengths
+    step = np.ones(int(lengths.sum()), dtype=np.int64)
+    step[first] += broken
+    terms = "\n".join([run if is_latin else "\n".join(run) for run, is_latin in zip(runs, latin.tolist())])
+    return terms.split("\n"), np.cumsum(step) - step[0]
+
+
+def _varint_encode(values):
+    """把非负整数数组编码为 varint（每字节 7 位，最高位为 1 表示后面还有字节）
+
+    返回 (字节数组, 每个数占用的字节数)，整个数组一次向量化完成。
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(values.size, dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.cumsum(nbytes) - nbytes
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    rest = values
+    for k in range(int(nbytes.max()) if values.size else 0):
+        mask = nbytes > k
+        byte = (rest[mask] & np.uint64(0x7f)).astype(np.uint8)
+        byte[nbytes[mask] > k + 1] |= 0x80
+        out[starts[mask] + k] = byte
+        rest = rest >> np.uint64(7)
+    return out, nbytes
+
+
+def varint_encode(values):
+    """把非负整数数组编码为 varint 字节串"""
+    return _varint_encode(values)[0].tobytes()
+
+
+def varint_decode(data):
+    """varint_encode 的逆运算，返回 int64 数组"""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if buf.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(buf < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    group = np.zeros(buf.size, dtype=np.int64)
+    group[starts[1:]] = 1
+    shift = (np.arange(buf.size) - starts[np.cumsum(group)]) * 7
+    return np.add.reduceat((buf & 0x7f).astype(np.int64) << shift, starts)
+
+
+def _segmented_cumsum(values, lengths):
+    """把 values 按 lengths 分成连续的若干段，各段内部分别求前缀和（用于还原差值编码）"""
+    total = np.cumsum(values)
+    before = np.concatenate([[0], total])[np.cumsum(lengths) - lengths]
+    return total - np.repeat(before, lengths)
+
+
+def _write_segment(path_prefix, terms, term_ids, doc_ids, positions):
+    """把 (词项编号, 文档编号, 位置) 三元组写成一个段
+
+    输入中同一文档的位置递增、文档编号随文档递增；按词项稳定排序后即为倒排表的顺序。
+    """
+    order = np.argsort(term_ids, kind="stable")
+    t, d, p = term_ids[order], doc_ids[order], positions[order]
+    n = t.size
+    # (词项, 文档) 对：每对的起点、词频；再按词项分组得到文档频率与出现次数
+    new_pair = np.ones(n, dtype=bool)
+    new_pair[1:] = (t[1:] != t[:-1]) | (d[1:] != d[:-1])
+    pair_start = np.flatnonzero(new_pair)
+    tf = np.diff(np.append(pair_start, n))
+    pair_term, pair_doc = t[pair_start], d[pair_start]
+    new_term = np.ones(pair_start.size, dtype=bool)
+    new_term[1:] = pair_term[1:] != pair_term[:-1]
+    term_start = np.flatnonzero(new_term)
+    df = np.diff(np.append(term_start, pair_start.size))
+    cf = np.add.reduceat(tf, term_start) if n else np.zeros(0, dtype=np.int64)
+
+    # 差值编码：文档编号在词项内做差，位置在 (词项, 文档) 内做差
+    doc_gaps = pair_doc.astype(np.int64)
+    doc_gaps[1:] -= pair_doc[:-1]
+    doc_gaps[term_start] = pair_doc[term_start]
+    pos_gaps = p.astype(np.int64)
+    pos_gaps[1:] -= p[:-1]
+    pos_gaps[pair_start] = p[pair_start]
+
+    # 每个词项一块：df 个文档差值、df 个词频、cf 个位置差值
+    block = 2 * df + cf
+    block_start = np.cumsum(block) - block
+    values = np.empty(int(block.sum()), dtype=np.int64)
+    pair_term_idx = np.repeat(np.arange(df.size), df)
+    rank = np.arange(pair_start.size) - np.repeat(term_start, df)
+    values[block_start[pair_term_idx] + rank] = doc_gaps
+    values[block_start[pair_term_idx] + df[pair_term_idx] + rank] = tf
+    pos_term_idx = np.repeat(np.arange(df.size), cf)
+    pos_rank = np.arange(n) - np.repeat(np.cumsum(cf) - cf, cf)
+    values[block_start[pos_term_idx] + 2 * df[pos_term_idx] + pos_rank] = pos_gaps
+
+    data, nbytes = _varint_encode(values)
+    byte_offset = np.concatenate([[0], np.cumsum(nbytes)])
+    offsets = byte_offset[block_start]
+    lengths = byte_offset[block_start + block] - offsets
+    lexicon = {terms[term]: (int(o), int(length), int(f), int(c))
+               for term, o, length, f, c in zip(pair_term[term_start].tolist(), offsets.tolist(),
+                                                lengths.tolist(), df.tolist(), cf.tolist())}
+    with open(path_prefix + ".post", "wb") as f:
+        f.write(data.tobytes())
+    with open(path_prefix + ".lex", "wb") as f:
+        pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return data.size
+
+
+def _decode_block(data, df, cf):
+    """解码一个词项的倒排块，返回 (文档编号, 词频, 各文档内位置依次拼接)"""
+    values = varint_decode(data)
+    tfs = values[df:2 * df]
+    return np.cumsum(values[:df]), tfs, _segmented_cumsum(values[2 * df:2 * df + cf], tfs)
+
+
+class _Segment:
+    """一个只读段：词典常驻内存，倒排表通过 mmap 按需读取"""
+
+    def __init__(self, path_prefix):
+        with open(path_prefix + ".lex", "rb") as f:
+            self.lexicon = pickle.load(f)
+        self._file = open(path_prefix + ".post", "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def block(self, term):
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return None
+        offset, length, df, cf = entry
+        return _decode_block(self.data[offset:offset + length], df, cf)
+
+    def decode_all(self):
+        """解码整个段，返回 (词项列表, 词项序号, 文档编号, 位置) 三元组数组，供合并使用"""
+        terms = list(self.lexicon)
+        entries = np.array(list(self.lexicon.values()), dtype=np.int64).reshape(-1, 4)
+        df, cf = entries[:, 2], entries[:, 3]
+        values = varint_decode(self.data[:])
+        block_start = np.cumsum(2 * df + cf) - (2 * df + cf)
+        pair_term_idx = np.repeat(np.arange(df.size), df)
+        rank = np.arange(int(df.sum())) - np.repeat(np.cumsum(df) - df, df)
+        docs = _segmented_cumsum(values[block_start[pair_term_idx] + rank], df)
+        tfs = values[block_start[pair_term_idx] + df[pair_term_idx] + rank]
+        pos_term_idx = np.repeat(np.arange(df.size), cf)
+        pos_rank = np.arange(int(cf.sum())) - np.repeat(np.cumsum(cf) - cf, cf)
+        positions = _segmented_cumsum(values[block_start[pos_term_idx] + 2 * df[pos_term_idx] + pos_rank], tfs)
+        return terms, pos_term_idx, np.repeat(docs, tfs), positions
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+
+def corpus_name(folder_path):
+    return os.path.basename(os.path.normpath(folder_path))
+
+
+class InvertedIndex:
+    """磁盘上的倒排索引：update() 增量建立，query() 按语料汇总词频、文档频率与短语出现次数"""
+
+    def __init__(self, directory=None):
+        self.directory = INDEX_DIR if directory is None else directory
+        self.docs = []         # 文档编号 -> [语料, 文档名, 状态戳, 词项数, 是否有效]
+        self.segments = []     # 段名，按建立顺序
+        self.next_segment = 0
+        self._open = None
+        meta_path = os.path.join(self.directory, "meta.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") == INDEX_VERSION and meta.get("scripts") == SIGNATURE:
+                self.docs, self.segments = meta["docs"], meta["segments"]
+                self.next_segment = meta["next_segment"]
+        except FileNotFoundError:
+            pass
+        # 版本或文字类别表变了的旧索引、中断的更新留下的段：不在段列表中的段文件在下次写入前删除
+        self._refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for segment in self._open or []:
+            segment.close()
+        self._open = None
+
+    def _refresh(self):
+        """重建文档表的派生结构：有效文档查找表、有效标记与语料编号数组"""
+        self.close()
+        self.corpora = sorted({doc[0] for doc in self.docs})
+        corpus_ids = {c: i for i, c in enumerate(self.corpora)}
+        self._live = {(doc[0], doc[1]): i for i, doc in enumerate(self.docs) if doc[4]}
+        self._alive = np.array([doc[4] for doc in self.docs], dtype=bool)
+        self._doc_corpus = np.array([corpus_ids[doc[0]] for doc in self.docs], dtype=np.int64)
+
+    def _segment_readers(self):
+        if self._open is None:
+            self._open = [_Segment(os.path.join(self.directory, name)) for name in self.segments]
+        return self._open
+
+    def _save_meta(self):
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path = os.path.join(self.directory, "meta.json")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "scripts": SIGNATURE, "docs": self.docs, "segments": self.segments,
+                       "next_segment": self.next_segment}, f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _remove_orphans(self):
+        """删除索引目录中不在段列表里的段文件"""
+        keep = set(self.segments)
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if stem.startswith("seg_") and ext in (".lex", ".post") and stem not in keep:
+                os.remove(os.path.join(self.directory, name))
+
+    def _new_segment_name(self):
+        name = f"seg_{self.next_segment}"
+        self.next_segment += 1
+        return name
+
+    def update(self, folders=DEFAULT_FOLDERS):
+        """把文件夹中新增或修改过的文档写入一个新段，已删除的文档标记为无效
+
+        只读取变化的文档，耗时与变化的文档数成正比。返回 {'added', 'removed', 'tokens'}。
+        """
+        added = removed = 0
+        vocab = Vocabulary()
+        term_ids, doc_ids, positions = [], [], []
+        with profiler.stage("index_update") as record:
+            for folder in folders:
+                corpus = corpus_name(folder)
+                documents = list_documents(folder)
+                present = {name for name, _ in documents}
+                for (c, name), doc_id in list(self._live.items()):
+                    if c == corpus and name not in present:
+                        self.docs[doc_id][4] = False
+                        removed += 1
+                changed = {}
+                for name, stamp in documents:
+                    doc_id = self._live.get((corpus, name))
+                    if doc_id is not None and tuple(self.docs[doc_id][2]) == tuple(stamp):
+                        continue
+                    if doc_id is not None:
+                        # 修改过的文档：旧版本作废，新版本以新编号写入本次的段
+                        self.docs[doc_id][4] = False
+                        removed += 1
+                    changed[name] = stamp
+                for name, text, error in iter_texts(folder, list(changed)):
+                    if error:
+                        print(error)
+                        continue
+                    terms, pos = term_positions(text)
+                    ids = vocab.encode(terms).astype(np.int64)
+                    n_tokens = ids.size
+                    heads = [i for i, term in enumerate(terms) if "'" in term]
+                    if heads:
+                        # 撇号前的部分与整个单词位置相同，按位置稳定排序后插在整个单词之前
+                        ids = np.concatenate([vocab.encode([terms[i].split("'")[0] for i in heads]), ids])
+                        pos = np.concatenate([pos[heads], pos])
+                        order = np.argsort(pos, kind="stable")
+                        ids, pos = ids[order], pos[order]
+                    term_ids.append(ids)
+                    doc_ids.append(np.full(ids.size, len(self.docs), dtype=np.int64))
+                    positions.append(pos)
+                    self.docs.append([corpus, name, list(changed[name]), n_tokens, True])
+                    added += 1
+                    record['items'] += n_tokens
+            if term_ids and sum(ids.size for ids in term_ids):
+                self.close()
+                os.makedirs(self.directory, exist_ok=True)
+                self._remove_orphans()
+                name = self._new_segment_name()
+                record['bytes'] = _write_segment(
+                    os.path.join(self.directory, name), vocab.id_to_token,
+                    np.concatenate([ids.astype(np.int64) for ids in term_ids]),
+                    np.concatenate(doc_ids), np.concatenate(positions))
+                self.segments.append(name)
+            if added or removed:
+                self._save_meta()
+            self._refresh()
+        if len(self.segments) > MAX_SEGMENTS:
+            self.compact()
+        return {'added': added, 'removed': removed, 'tokens': record['items']}
+
+    def compact(self):
+        """把所有段合并为一个并丢弃无效文档的倒排项（只读倒排表，不重新读取语料）"""
+        if len(self.segments) <= 1 and self._alive.all():
+            return
+        with profiler.stage("index_merge") as record:
+            vocab = Vocabulary()
+            term_ids, doc_ids, positions = [], [], []
+            for segment in self._segment_readers():
+                terms, t, d, p = segment.decode_all()
+                keep = self._alive[d]
+                remap = np.array([vocab.add(term) for term in terms], dtype=np.int64)
+                term_ids.append(remap[t[keep]] if remap.size else t[keep])
+                doc_ids.append(d[keep])
+                positions.append(p[keep])
+            old_segments = self.segments
+            self.close()
+            self._remove_orphans()
+            name = self._new_segment_name()
+            record['items'] = int(sum(ids.size for ids in term_ids))
+            record['bytes'] = _write_segment(
+                os.path.join(self.directory, name), vocab.id_to_token,
+                np.concatenate(term_ids), np.concatenate(doc_ids), np.concatenate(positions))
+            self.segments = [name]
+            self._save_meta()
+            for old in old_segments:
+                for ext in (".lex", ".post"):
+                    try:
+                        os.remove(os.path.join(self.directory, old + ext))
+                    except FileNotFoundError:
+                        pass
+            self._refresh()
+
+    def postings(self, term):
+        """term 在所有有效文档中的倒排表：(文档编号, 词频, 各文档内位置依次拼接)"""
+        parts = [block for block in (s.block(term) for s in self._segment_readers()) if block]
+        if not parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        docs = np.concatenate([b[0] for b in parts])
+        tfs = np.concatenate([b[1] for b in parts])
+        positions = np.concatenate([b[2] for b in parts])
+        keep = self._alive[docs]
+        return docs[keep], tfs[keep], positions[np.repeat(keep, tfs)]
+
+    def matches(self, terms, offsets=None):
+        """按 offsets（各词项相对第一个词项的位置，默认 0, 1, 2, ...）出现 terms 的文档及各文档中的出现次数：
+        (文档编号, 次数)
+
+        单个词项直接取倒排表；多个词项把各词项的 (文档, 位置 - 相对位置) 编码为整数后求交集。
+        """
+        if len(terms) == 1:
+            docs, tfs, _ = self.postings(terms[0])
+            return docs, tfs
+        if offsets is None:
+            offsets = range(len(terms))
+        keys = None
+        for term, offset in zip(terms, offsets):
+            docs, tfs, positions = self.postings(term)
+            start = positions - offset
+            valid = start >= 0
+            key = (np.repeat(docs, tfs)[valid] << 32) | start[valid]
+            keys = key if keys is None else np.intersect1d(keys, key, assume_unique=True)
+            if keys.size == 0:
+                break
+        return np.unique(keys >> 32, return_counts=True)
+
+    def corpus_tokens(self):
+        """各语料有效文档的词项总数"""
+        totals = np.bincount(self._doc_corpus[self._alive],
+                             weights=np.array([doc[3] for doc in self.docs])[self._alive],
+                             minlength=len(self.corpora)) if self.docs else []
+        return {c: int(n) for c, n in zip(self.corpora, totals)}
+
+    def query(self, text, top=0):
+        """按语料汇总查询结果；text 分词后为一个词项时统计词频，多个词项时按短语统计
+        （词项之间的标点在短语中同样要求出现间隔，见 term_positions()）
+
+        返回 {语料: {'tf', 'df', 'per_million'}}，top > 0 时另附出现次数最多的文档
+        {'top': [(语料, 文档名, 次数), ...]}。
+        """
+        terms, positions = term_positions(text)
+        with profiler.stage("index_query", items=1):
+            if terms:
+                docs, counts = self.matches(terms, (positions - positions[0]).tolist())
+            else:
+                docs = counts = np.zeros(0, dtype=np.int64)
+            n = len(self.corpora)
+            tf = np.bincount(self._doc_corpus[docs], weights=counts, minlength=n)
+            df = np.bincount(self._doc_corpus[docs], minlength=n)
+            totals = self.corpus_tokens()
+            result = {c: {'tf': int(tf[i]), 'df': int(df[i]),
+                          'per_million': tf[i] * 1e6 / totals[c] if totals[c] else 0.0}
+                      for i, c in enumerate(self.corpora)}
+            if top:
+                order = np.argsort(-counts, kind="stable")[:top]
+                result['top'] = [(self.docs[d][0], self.docs[d][1], int(c))
+                                 for d, c in zip(docs[order].tolist(), counts[order].tolist())]
+        return result
+
+    def stats(self):
+        """索引概况：有效文档数、段数、各段词项数与倒排表字节数"""
+        readers = self._segment_readers()
+        return {'documents': int(self._alive.sum()), 'dead_documents': int((~self._alive).sum()),
+                'segments': len(readers), 'terms': sum(len(s.lexicon) for s in readers),
+                'postings_bytes': sum(len(s.data) for s in readers), 'tokens': self.corpus_tokens()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语料倒排索引：建立/增量更新与查询")
+    parser.add_argument("--index-dir", default=None, help=f"索引目录（默认 {INDEX_DIR}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="建立索引，或只把新增/修改/删除的文档同步到索引")
+    build.add_argument("folders", nargs="*", default=DEFAULT_FOLDERS)
+    query = sub.add_parser("query", help="查询词项或短语在各语料中的词频与文档频率")
+    query.add_argument("queries", nargs="+")
+    query.add_argument("--top", type=int, default=5, help="列出出现次数最多的文档数")
+    sub.add_parser("compact", help="把所有段合并为一个")
+    args = parser.parse_args()
+
+    with profile_run(f"inverted_index_{args.command}"), InvertedIndex(args.index_dir) as index:
+        if args.command == "build":
+            folders = []
+            for folder in args.folders:
+                if os.path.exists(folder):
+                    folders.append(folder)
+                else:
+                    print(f"文件夹 {folder} 不存在")
+            start = time.perf_counter()
+            result = index.update(folders)
+            stats = index.stats()
+            print(f"新增 {result['added']} 篇，作废 {result['removed']} 篇，写入 {result['tokens']} 个词项，"
+                  f"用时 {time.perf_counter() - start:.2f} 秒")
+            print(f"索引共 {stats['documents']} 篇文档，{stats['segments']} 个段，"
+                  f"倒排表 {stats['postings_bytes'] / (1 << 20):.1f} MB")
+        elif args.command == "compact":
+            index.compact()
+            print(f"合并后共 {index.stats()['segments']} 个段")
+        else:
+            for text in args.queries:
+                start = time.perf_counter()
+                result = index.query(text, top=args.top)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"\n「{text}」（{elapsed:.1f} ms）")
+                for corpus in index.corpora:
+                    r = result[corpus]
+                    print(f"  {corpus:<14} 出现 {r['tf']:>7} 次，{r['df']:>5} 篇文档，"
+                          f"每百万词项 {r['per_million']:.1f}")
+                for corpus, name, count in result.get('top', []):
+                    print(f"  {count:>5}  {corpus}/{name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import cProfile
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不记录内存
+    resource = None
+
+# 每次运行结束时把性能报告写入该目录（可通过环境变量 PROFILE_DIR 修改）
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# 设为 1 时同时用 cProfile 记录主线程的函数级耗时，另存为 .prof 文件（可用 pstats 查看）
+CPROFILE = os.environ.get("PROFILE_CPROFILE", "") not in ("", "0")
+# 延迟直方图各桶的上界（秒），最后一个桶收纳更慢的请求
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CSV_FIELDS = ['stage', 'calls', 'seconds', 'items', 'bytes', 'items_per_sec', 'wall_items_per_sec',
+              'mb_per_sec', 'peak_rss_mb', 'rss_growth_mb']
+
+
+def peak_rss_mb():
+    """进程至今的峰值常驻内存（MB）；不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+class Profiler:
+    """按阶段汇总的计时器、计数器和延迟直方图（线程安全）
+
+    每个阶段记录调用次数、累计耗时、处理的条目数（页面、符号等）与字节数，
+    以及阶段结束时的进程峰值内存和该阶段让峰值上升了多少。
+    嵌套阶段的耗时互相包含；多线程中的同名阶段耗时累加，可能超过实际经过的时间。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.stages = {}
+            self.counters = {}
+            self.histograms = {}
+
+    def add(self, name, seconds=0.0, items=0, nbytes=0, rss_before=None):
+        """记录阶段 name 的一次执行"""
+        rss = peak_rss_mb()
+        with self._lock:
+            stage = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'items': 0, 'bytes': 0,
+                                                  'peak_rss_mb': None, 'rss_growth_mb': 0.0})
+            stage['calls'] += 1
+            stage['seconds'] += seconds
+            stage['items'] += items
+            stage['bytes'] += nbytes
+            if rss is not None:
+                stage['peak_rss_mb'] = rss
+                if rss_before is not None:
+                    stage['rss_growth_mb'] += rss - rss_before
+
+    @contextmanager
+    def stage(self, name, items=0, nbytes=0):
+        """计时一个阶段；块内可以修改返回字典的 'items' / 'bytes' 补记处理量，异常时也会记录"""
+        record = {'items': items, 'bytes': nbytes}
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - start, record['items'], record['bytes'], rss_before)
+
+    def count(self, name, n=1):
+        """累加计数器（错误数、各状态码次数等）"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        """把一次延迟计入直方图 name"""
+        with self._lock:
+            hist = self.histograms.setdefault(name, {'counts': [0] * (len(LATENCY_BUCKETS) + 1),
+                                                     'total': 0.0, 'max': 0.0})
+            hist['counts'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            hist['total'] += seconds
+            hist['max'] = max(hist['max'], seconds)
+
+    def summary(self):
+        """汇总为可写成 JSON 的字典，附带各阶段的吞吐率"""
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            stages = {}
+            for name, stage in self.stages.items():
+                row = dict(stage)
+                seconds = stage['seconds']
+                # 没有记录处理量的阶段只报告耗时
+                items = stage['items'] if stage['items'] and seconds > 0 else None
+                nbytes = stage['bytes'] if stage['bytes'] and seconds > 0 else None
+                row['items_per_sec'] = items / seconds if items else None
+                # 相对整次运行的速率，例如爬虫的页面/秒
+                row['wall_items_per_sec'] = items / elapsed if items else None
+                row['mb_per_sec'] = nbytes / (1 << 20) / seconds if nbytes else None
+                stages[name] = row
+            labels = [f"<={b}s" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+            histograms = {}
+            for name, hist in self.histograms.items():
+                n = sum(hist['counts'])
+                histograms[name] = {'buckets': dict(zip(labels, hist['counts'])), 'count': n,
+                                    'mean': hist['total'] / n if n else None, 'max': hist['max']}
+            return {'elapsed': elapsed, 'peak_rss_mb': peak_rss_mb(), 'stages': stages,
+                    'counters': dict(self.counters), 'histograms': histograms}
+
+    def write_report(self, path_prefix):
+        """写出 <path_prefix>.json（全部信息）和 <path_prefix>.csv（每个阶段一行）"""
+        summary = self.summary()
+        with open(path_prefix + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        with open(path_prefix + ".csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for name, row in summary['stages'].items():
+                writer.writerow({'stage': name, **row})
+        return summary
+
+
+# 全局实例，各模块直接用 profiler.stage(...) / profiler.count(...) 记录
+profiler = Profiler()
+
+
+@contextmanager
+def profile_run(name, cprofile=None, directory=None):
+    """包住一次完整运行：结束时（包括出错和 Ctrl-C）写出 <directory>/<name>.json 与 .csv 报告
+
+    cprofile 为 None 时由环境变量 PROFILE_CPROFILE 决定是否同时输出 <name>.prof。
+    """
+    directory = PROFILE_DIR if directory is None else directory
+    if cprofile is None:
+        cprofile = CPROFILE
+    profiler.reset()
+    prof = cProfile.Profile() if cprofile else None
+    if prof:
+        prof.enable()
+    try:
+        yield profiler
+    finally:
+        if prof:
+            prof.disable()
+        os.makedirs(directory, exist_ok=True)
+        path_prefix = os.path.join(directory, name)
+        summary = profiler.write_report(path_prefix)
+        if prof:
+            prof.dump_stats(path_prefix + ".prof")
+        print(f"性能报告已写入 {path_prefix}.json（用时 {summary['elapsed']:.2f} 秒）")
@@ -0,0 +1,133 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import matplotlib
+
+# 非交互后端：不弹出窗口、不依赖显示器，服务器上也能直接出图
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from corpus_cache import CACHE_DIR
+from profiling import profiler
+
+# 渲染进程数（可通过环境变量 RENDER_WORKERS 修改）
+WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+# 记录每张图输入数据的哈希，输入未变且图片仍在时跳过重新渲染
+MANIFEST_PATH = os.path.join(CACHE_DIR, "charts.json")
+# 随作图任务一起传给渲染进程、并计入哈希的绘图设置
+RC_KEYS = ('font.sans-serif', 'axes.unicode_minus')
+
+_pending = None
+
+
+def _rc_snapshot():
+    return {key: plt.rcParams[key] for key in RC_KEYS}
+
+
+def _chart_hash(draw, args, rc):
+    """作图函数（含源码）、输入数据和绘图设置的哈希"""
+    try:
+        source = inspect.getsource(draw)
+    except (OSError, TypeError):
+        source = ""
+    payload = pickle.dumps((draw.__module__, draw.__qualname__, source, args, rc),
+                           protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ 读取图表记录 {MANIFEST_PATH} 时出错，将全部重新渲染：{e}")
+        return {}
+
+
+def _save_manifest(manifest):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = MANIFEST_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, MANIFEST_PATH)
+    except Exception as e:
+        print(f"⚠️ 写入图表记录 {MANIFEST_PATH} 时出错：{e}")
+
+
+def _render(draw, args, filename, rc):
+    """执行作图函数并保存，保存后关闭图形释放内存"""
+    plt.rcParams.update(rc)
+    try:
+        draw(*args)
+        plt.savefig(filename)
+    finally:
+        plt.close('all')
+    return filename
+
+
+def _render_jobs(jobs, workers, force=False):
+    """渲染一批图表；输入哈希未变且文件存在的图表直接跳过，其余交给进程池并行渲染"""
+    manifest = _load_manifest()
+    todo = []
+    for draw, args, filename, rc in jobs:
+        key = os.path.abspath(filename)
+        digest = _chart_hash(draw, args, rc)
+        if not force and manifest.get(key) == digest and os.path.exists(filename):
+            continue
+        todo.append((draw, args, filename, rc, key, digest))
+    if not todo:
+        return
+
+    with profiler.stage("render", items=len(todo)):
+        if workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                futures = [pool.submit(_render, draw, args, filename, rc)
+                           for draw, args, filename, rc, _, _ in todo]
+                for future, (_, _, filename, _, key, digest) in zip(futures, todo):
+                    try:
+                        future.result()
+                        manifest[key] = digest
+                    except Exception as e:
+                        print(f"⚠️ 渲染图表 {filename} 时出错：{e}")
+        else:
+            for draw, args, filename, rc, key, digest in todo:
+                try:
+                    _render(draw, args, filename, rc)
+                    manifest[key] = digest
+                except Exception as e:
+                    print(f"⚠️ 渲染图表 {filename} 时出错：{e}")
+    _save_manifest(manifest)
+
+
+def render_chart(draw, filename, *args):
+    """渲染一张图：draw(*args) 负责画图（包括创建 figure），保存与关闭由这里完成
+
+    在 batch() 内调用时只登记任务，退出 batch 时统一并行渲染；否则立即渲染。
+    """
+    job = (draw, args, filename, _rc_snapshot())
+    if _pending is not None:
+        _pending.append(job)
+    else:
+        _render_jobs([job], workers=1)
+
+
+@contextmanager
+def batch(workers=None, force=False):
+    """收集块内的所有 render_chart 调用，退出时一次性用进程池渲染（嵌套时由最外层负责）"""
+    global _pending
+    if _pending is not None:
+        yield
+        return
+    _pending = []
+    try:
+        yield
+        jobs = _pending
+    finally:
+        _pending = None
+    _render_jobs(jobs, WORKERS if workers is None else workers, force)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import sys
+import numpy as np
+
+# 文字类别表：类别 -> 码点区间（闭区间）。统计汉字的脚本（cal_ch.py、ch_top10.py、cal_scale.py）、
+# 中文分词（segmenter.py）和倒排索引都经由 tokenizer.py 使用同一个 'han' 类别，汉字总数因此一致。
+# 每个类别预先生成两种查找形式：正则字符类（扫描文本，CPython 的正则引擎把基本平面部分编译为位图），
+# 以及合并后的有序区间数组（对码点数组做向量化判断，见 contains()）。
+
+# 汉字的各区块
+HAN_BLOCKS = {
+    'unified': (0x4E00, 0x9FFF),                    # 中日韩统一表意文字
+    'ext_a': (0x3400, 0x4DBF),                      # 扩展 A
+    'ext_b': (0x20000, 0x2A6DF),                    # 扩展 B
+    'ext_c': (0x2A700, 0x2B73F),                    # 扩展 C
+    'ext_d': (0x2B740, 0x2B81F),                    # 扩展 D
+    'ext_e': (0x2B820, 0x2CEAF),                    # 扩展 E
+    'ext_f': (0x2CEB0, 0x2EBEF),                    # 扩展 F
+    'ext_g': (0x30000, 0x3134F),                    # 扩展 G
+    'ext_h': (0x31350, 0x323AF),                    # 扩展 H
+    'compatibility': (0xF900, 0xFAFF),              # 兼容表意文字
+    'compatibility_supplement': (0x2F800, 0x2FA1F), # 兼容表意文字补充
+    'ideographic_zero': (0x3007, 0x3007),           # 〇（二〇二四年）
+}
+
+
+def parse_han_blocks(value):
+    """把逗号分隔的区块名解析为列表；有不认识的区块名时抛出 ValueError 并列出可用的名称"""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in HAN_BLOCKS]
+    if unknown:
+        raise ValueError(f"HAN_BLOCKS 中有未知的区块 {', '.join(unknown)}；可用的区块：{', '.join(HAN_BLOCKS)}")
+    return names
+
+
+# 统计为汉字的区块（可通过环境变量 HAN_BLOCKS 修改，逗号分隔，如 "unified" 只统计基本区）
+ENABLED_HAN_BLOCKS = parse_han_blocks(os.environ.get("HAN_BLOCKS", ",".join(HAN_BLOCKS)))
+
+SCRIPT_CLASSES = {
+    'han': [HAN_BLOCKS[name] for name in ENABLED_HAN_BLOCKS],
+    # 英文单词只用 ASCII 字母（转小写等处理依赖这一点）
+    'latin': [(0x41, 0x5A), (0x61, 0x7A)],
+}
+
+
+def code_ranges(script):
+    """类别的码点区间，合并相邻或重叠的区间后按起点排序，返回 shape 为 (k, 2) 的数组"""
+    merged = []
+    for start, end in sorted(SCRIPT_CLASSES[script]):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.array(merged, dtype=np.int64).reshape(-1, 2)
+
+
+def regex_class(script):
+    """类别对应的正则字符类内容（不含方括号），如 'A-Za-z'"""
+    parts = []
+    for start, end in code_ranges(script).tolist():
+        parts.append(f"\\U{start:08x}" if start == end else f"\\U{start:08x}-\\U{end:08x}")
+    return "".join(parts)
+
+
+def contains(codepoints, script):
+    """码点数组中每个码点是否属于该类别（在区间起点上 searchsorted，不逐个比较）"""
+    ranges = _RANGES[script]
+    idx = np.searchsorted(ranges[:, 0], codepoints, side="right") - 1
+    return (idx >= 0) & (codepoints <= ranges[np.maximum(idx, 0), 1])
+
+
+_RANGES = {script: code_ranges(script) for script in SCRIPT_CLASSES}
+# 类别表的摘要：分词缓存、统计库、倒排索引和分词词典据此判断是否按当前的表生成
+SIGNATURE = hashlib.md5(repr({script: ranges.tolist() for script, ranges in _RANGES.items()})
+                        .encode("utf-8")).hexdigest()[:12]
+
+
+def block_counts(texts):
+    """各汉字区块（不论是否启用）在文本中出现的字数，用于选择 HAN_BLOCKS"""
+    names = sorted(HAN_BLOCKS, key=lambda name: HAN_BLOCKS[name])
+    bounds = np.array([HAN_BLOCKS[name] for name in names], dtype=np.int64)
+    counts = np.zeros(len(names), dtype=np.int64)
+    for text in texts:
+        codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        idx = np.searchsorted(bounds[:, 0], codepoints, side="right") - 1
+        hit = (idx >= 0) & (codepoints <= bounds[np.maximum(idx, 0), 1])
+        counts += np.bincount(idx[hit], minlength=len(names))
+    return {name: int(counts[names.index(name)]) for name in HAN_BLOCKS}
+
+
+if __name__ == "__main__":
+    # 用法：python script_classes.py [文件夹 ...]，统计各汉字区块在语料中的字数
+    import corpus_cache
+    folders = sys.argv[1:] or ['renminwang', 'xinhuawang', 'en.people', 'english.news']
+    print(f"已启用的汉字区块：{', '.join(ENABLED_HAN_BLOCKS)}")
+    for folder in folders:
+        if not os.path.exists(folder):
+            print(f"文件夹 {folder} 不存在")
+            continue
+        counts = block_counts(text for _, text, error in corpus_cache.iter_texts(folder) if not error)
+        print(f"{folder}: " + ("，".join(f"{name} {n}" for name, n in counts.items() if n) or "没有汉字"))
@@ -0,0 +1,440 @@
+import glob
+import math
+import os
+import pickle
+import re
+import sys
+import time
+import numpy as np
+from profiling import profile_run, profiler
+from script_classes import SIGNATURE, regex_class
+
+# 中文分词：由语料统计建立词典前缀树，在每个汉字串的有向无环图（DAG）上求概率最大的切分。
+# 词典：语料中出现不少于 MIN_COUNT 次、内部凝固度（各切分点的点互信息的最小值）
+# 和左右邻字熵都足够高的 2..MAX_WORD_LEN 字串，加上所有单字；
+# 词频再用本词典切分训练语料、按切分结果重新计数，迭代 EM_ROUNDS 轮。
+# 前缀树按层存放：第 k 层节点的键为 父节点序号 × 字表大小 + 字序号，各层的键有序排列，
+# 每层另建开放寻址散列表，所有位置的查找一次向量化完成；动态规划按"到汉字串末尾的距离"分组，
+# 同一距离的位置（分布在所有汉字串中）一起计算，循环次数只取决于最长的汉字串。
+
+# 词典文件（可通过环境变量 ZH_DICT_PATH 修改）；不存在时用 TRAIN_FOLDERS 的语料自动建立
+DICT_PATH = os.environ.get("ZH_DICT_PATH", os.path.join(".corpus_cache", "zh_dict.pkl"))
+DICT_VERSION = 1
+TRAIN_FOLDERS = ['renminwang', 'xinhuawang']
+MAX_WORD_LEN = 4
+MIN_COUNT = 5
+# 凝固度：p(词) / max(p(前半) p(后半)) 的自然对数下限
+MIN_COHESION = 2.0
+# 左右邻字熵（自然对数）下限，过低说明只是更长的词的一部分
+MIN_BOUNDARY_ENTROPY = 1.0
+EM_ROUNDS = 2
+
+# 汉字范围来自 script_classes.py 的文字类别表（与 tokenizer.py 相同）
+_HAN_RUN_RE = re.compile(f"[{regex_class('han')}]+")
+
+
+def _join_runs(texts):
+    """把各文本中的汉字串用分隔符（码点 0）连接，每个汉字串后都跟一个分隔符
+
+    返回 (连接后的字符串, 码点数组, 各文本在字符串中的起始偏移，末尾附总长度)。
+    """
+    parts = []
+    offsets = [0]
+    for text in texts:
+        runs = _HAN_RUN_RE.findall(text)
+        part = "\0".join(runs) + "\0" if runs else ""
+        parts.append(part)
+        offsets.append(offsets[-1] + len(part))
+    joined = "".join(parts)
+    codepoints = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    return joined, codepoints, np.array(offsets, dtype=np.int64)
+
+
+def _distance_to_end(codepoints):
+    """每个位置到所在汉字串末尾（下一个分隔符）的距离，分隔符本身为 0"""
+    separators = np.flatnonzero(codepoints == 0)
+    return separators[np.searchsorted(separators, np.arange(len(codepoints)))] - np.arange(len(codepoints))
+
+
+def _split_words(codepoints, starts):
+    """按词的起点把码点数组中的汉字切成词列表
+
+    每个词后写入分隔符后整体解码，再用 str.split 切开，避免逐个词切片。
+    """
+    if len(starts) == 0:
+        return []
+    chars = np.flatnonzero(codepoints)
+    word_of = np.searchsorted(starts, chars, side="right") - 1
+    out = np.zeros(len(chars) + len(starts), dtype=np.uint32)
+    out[np.arange(len(chars)) + word_of] = codepoints[chars]
+    return out.tobytes().decode("utf-32-le").split("\0")[:-1]
+
+
+def _hash_slots(keys, mask):
+    """keys（非负整数）在开放寻址表中的初始槽位：乘法散列"""
+    return ((keys * 0x9E3779B1) >> 16) & mask
+
+
+def _build_hash(keys):
+    """为有序键数组建立开放寻址散列表，返回 (各槽位的键（空槽为 -1）, 各槽位键的下标)
+
+    表长取不小于键数 2.5 倍的 2 的幂，线性探测；插入与查找都按批处理。
+    """
+    size = 1 << max(int(len(keys) * 2.5).bit_length(), 4)
+    table = np.full(size, -1, dtype=np.int64)
+    values = np.full(size, -1, dtype=np.int64)
+    pending = np.arange(len(keys))
+    slot = _hash_slots(keys, size - 1)
+    while len(pending):
+        # 每个空槽只放入争用它的第一个键，其余的键探测下一个槽位
+        empty = table[slot] < 0
+        _, first = np.unique(slot[empty], return_index=True)
+        placed = np.flatnonzero(empty)[first]
+        table[slot[placed]] = keys[pending[placed]]
+        values[slot[placed]] = pending[placed]
+        rest = np.ones(len(pending), dtype=bool)
+        rest[placed] = False
+        pending, slot = pending[rest], (slot[rest] + 1) & (size - 1)
+    return table, values
+
+
+def _hash_lookup(table, values, keys):
+    """在 _build_hash 的散列表中批量查找，返回各键的下标，找不到为 -1"""
+    mask = len(table) - 1
+    result = np.full(len(keys), -1, dtype=np.int64)
+    pending = np.arange(len(keys))
+    slot = _hash_slots(keys, mask)
+    while len(pending):
+        stored = table[slot]
+        hit = stored == keys[pending]
+        result[pending[hit]] = values[slot[hit]]
+        # 命中或遇到空槽即结束，其余的继续探测
+        rest = ~hit & (stored >= 0)
+        pending, slot = pending[rest], (slot[rest] + 1) & mask
+    return result
+
+
+def _group_entropy(groups, values, n_groups):
+    """按 groups 分组计算 values（非负整数）的经验熵（自然对数），返回长度为 n_groups 的数组"""
+    width = int(values.max()) + 1 if len(values) else 1
+    pairs, counts = np.unique(groups * width + values, return_counts=True)
+    pairs = pairs // width
+    totals = np.bincount(pairs, weights=counts, minlength=n_groups)
+    c_log_c = np.bincount(pairs, weights=counts * np.log(counts), minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, np.log(np.maximum(totals, 1)) - c_log_c / np.maximum(totals, 1), 0.0)
+
+
+class Segmenter:
+    """词典前缀树与基于它的最大概率分词
+
+    char_codes：有序的汉字码点（字序号即其下标）；
+    keys[k]：第 k + 1 层节点的有序键；logp[k]：对应节点作为词的对数概率（只是前缀时为 -inf）。
+    """
+
+    def __init__(self, char_codes, keys, logp, unknown_logp):
+        self.char_codes = char_codes
+        self.keys = keys
+        self.logp = logp
+        self.unknown_logp = unknown_logp
+        # 码点 -> 字序号的直接查找表（只覆盖到最大的码点）
+        self.char_table = np.full(int(char_codes.max()) + 2 if len(char_codes) else 1, -1, dtype=np.int64)
+        self.char_table[char_codes] = np.arange(len(char_codes))
+        # 第 2 层起每层一个散列表（键 -> 节点序号）；has_child[k]：第 k + 1 层的节点是否还有子节点，
+        # 没有子节点的位置不必继续查找下一层
+        self.hashes = [None] + [_build_hash(level) for level in keys[1:]]
+        self.has_child = []
+        for k in range(1, len(keys)):
+            flag = np.zeros(len(keys[k - 1]), dtype=bool)
+            flag[keys[k] // max(len(char_codes), 1)] = True
+            self.has_child.append(flag)
+
+    @property
+    def vocab_size(self):
+        return len(self.char_codes)
+
+    def char_ids(self, codepoints):
+        """码点 -> 字序号，不在字表中的字（以及分隔符）为 -1"""
+        last = len(self.char_table) - 1
+        return self.char_table[np.minimum(codepoints, last)]
+
+    def _lattice(self, cid, dist):
+        """各位置开始、长度为 1..MAX 的候选词在前缀树中的节点序号与对数概率（shape 均为 (层数, n)）"""
+        n = len(cid)
+        n_levels = len(self.keys)
+        nodes = np.full((n_levels, n), -1, dtype=np.int64)
+        scores = np.full((n_levels, n), -np.inf)
+        in_run = dist > 0
+        nodes[0] = cid
+        scores[0] = np.where(cid >= 0, self.logp[0][np.maximum(cid, 0)], self.unknown_logp)
+        scores[0][~in_run] = -np.inf
+        node = cid
+        for k in range(1, n_levels):
+            nxt = np.full(n, -1, dtype=np.int64)
+            nxt[:max(n - k, 0)] = cid[k:]
+            ok = np.flatnonzero(node >= 0)
+            ok = ok[self.has_child[k - 1][node[ok]] & (nxt[ok] >= 0) & (dist[ok] > k)]
+            node = np.full(n, -1, dtype=np.int64)
+            if len(self.keys[k]) and len(ok):
+                node[ok] = _hash_lookup(*self.hashes[k], nodes[k - 1][ok] * self.vocab_size + nxt[ok])
+            nodes[k] = node
+            hit = node >= 0
+            scores[k][hit] = self.logp[k][node[hit]]
+        return nodes, scores
+
+    def _spans(self, codepoints):
+        """对码点数组中的所有汉字串求最大概率切分，返回按位置排列的 (起点, 长度, 节点序号)"""
+        n = len(codepoints)
+        if n == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        dist = _distance_to_end(codepoints)
+        nodes, scores = self._lattice(self.char_ids(codepoints), dist)
+        lengths = np.arange(1, len(self.keys) + 1)[:, None]
+        best = np.zeros(n + 1)
+        choice = np.ones(n, dtype=np.int64)
+        # 到末尾距离相同的位置互不依赖，按距离从小到大分组计算
+        # 距离不超过 int16 时稳定排序使用基数排序
+        order = np.argsort(dist.astype(np.int16) if dist.max() < (1 << 15) else dist, kind="stable")
+        bounds = np.searchsorted(dist[order], np.arange(1, dist.max() + 2))
+        for d in range(1, dist.max() + 1):
+            pos = order[bounds[d - 1]:bounds[d]]
+            candidates = scores[:, pos] + best[np.minimum(pos + lengths, n)]
+            j = np.argmax(candidates, axis=0)
+            best[pos] = candidates[j, np.arange(len(pos))]
+            choice[pos] = j + 1
+        # 从每个汉字串的开头沿选择的词长前进，所有汉字串同时回溯
+        run_start = (dist > 0) & np.concatenate([[True], dist[:-1] == 0])
+        front = np.flatnonzero(run_start)
+        is_start = np.zeros(n, dtype=bool)
+        while front.size:
+            is_start[front] = True
+            front = front + choice[front]
+            front = front[dist[front] > 0]
+        starts = np.flatnonzero(is_start)
+        spans = choice[starts]
+        return starts, spans, nodes[spans - 1, starts]
+
+    def segment_texts(self, texts):
+        """批量分词：所有文本一起计算，返回每个文本的词列表（只包含汉字词，其他字符忽略）"""
+        with profiler.stage("segment") as record:
+            joined, codepoints, offsets = _join_runs(texts)
+            starts, spans, _ = self._spans(codepoints)
+            words = _split_words(codepoints, starts)
+            bounds = np.searchsorted(starts, offsets)
+            record['items'] = len(words)
+            record['bytes'] = len(joined.encode("utf-8"))
+        return [words[a:b] for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+    def segment(self, text):
+        """对一个文本分词，返回汉字词列表"""
+        return self.segment_texts([text])[0]
+
+    def words(self):
+        """词典中的全部词及其对数概率（单字在前），用于查看与调试"""
+        chars = [chr(c) for c in self.char_codes.tolist()]
+        strings = chars
+        result = [(c, float(p)) for c, p in zip(chars, self.logp[0].tolist())]
+        for k in range(1, len(self.keys)):
+            parents, last = np.divmod(self.keys[k], self.vocab_size)
+            strings = [strings[p] + chars[c] for p, c in zip(parents.tolist(), last.tolist())]
+            result.extend((w, float(p)) for w, p in zip(strings, self.logp[k].tolist()) if p > -np.inf)
+        return result
+
+
+def _ngram_trie(cid, max_len, min_count):
+    """统计所有不跨分隔符、出现不少于 min_count 次的 1..max_len 字串，组织成按层的前缀树
+
+    返回 (各层有序键, 各层次数, 各层在每个位置开始的节点序号)。
+    """
+    n = len(cid)
+    vocab_size = int(cid.max()) + 1 if n else 0
+    keys = [np.arange(vocab_size, dtype=np.int64)]
+    counts = [np.bincount(cid[cid >= 0], minlength=vocab_size)]
+    node_at = [cid]
+    for k in range(1, max_len):
+        prev = node_at[-1]
+        nxt = np.full(n, -1, dtype=np.int64)
+        nxt[:max(n - k, 0)] = cid[k:]
+        valid = np.flatnonzero((prev >= 0) & (nxt >= 0))
+        uniq, inverse, cnt = np.unique(prev[valid] * vocab_size + nxt[valid],
+                                       return_inverse=True, return_counts=True)
+        keep = cnt >= min_count
+        new_index = np.cumsum(keep) - 1
+        node = np.full(n, -1, dtype=np.int64)
+        node[valid] = np.where(keep[inverse], new_index[inverse], -1)
+        keys.append(uniq[keep])
+        counts.append(cnt[keep])
+        node_at.append(node)
+    return keys, counts, node_at
+
+
+def _trie_lookup(keys, vocab_size, chars):
+    """在前缀树中查找若干等长字串（chars 每行一个字串的字序号），返回末层节点序号，找不到为 -1"""
+    node = chars[:, 0].copy()
+    for k in range(1, chars.shape[1]):
+        key = node * vocab_size + chars[:, k]
+        idx = np.minimum(np.searchsorted(keys[k], key), len(keys[k]) - 1)
+        node = np.where((node >= 0) & (keys[k][idx] == key), idx, -1)
+    return node
+
+
+def build_segmenter(texts, max_len=MAX_WORD_LEN, min_count=MIN_COUNT, min_cohesion=MIN_COHESION,
+                    min_boundary_entropy=MIN_BOUNDARY_ENTROPY, em_rounds=EM_ROUNDS):
+    """由语料统计建立词典并返回 Segmenter（不需要外部词典）"""
+    with profiler.stage("build_dictionary") as record:
+        _, codepoints, _ = _join_runs(texts)
+        is_sep = codepoints == 0
+        char_codes, inverse = np.unique(codepoints[~is_sep], return_inverse=True)
+        cid = np.full(len(codepoints), -1, dtype=np.int64)
+        cid[~is_sep] = inverse
+        total = int((~is_sep).sum())
+        record['items'] = total
+        vocab_size = len(char_codes)
+        keys, counts, node_at = _ngram_trie(cid, max_len, min_count)
+        log_total = math.log(max(total, 1))
+
+        logp = [np.log(np.maximum(counts[0], 1)) - log_total]
+        chars = np.arange(vocab_size, dtype=np.int64)[:, None]
+        n = len(cid)
+        for k in range(1, max_len):
+            parents, last = np.divmod(keys[k], vocab_size)
+            chars = np.concatenate([chars[parents], last[:, None]], axis=1)
+            # 凝固度：各切分点上 log(c(词)·N / (c(前半)·c(后半))) 的最小值
+            log_c = np.log(counts[k])
+            cohesion = np.full(len(keys[k]), np.inf)
+            for i in range(1, k + 1):
+                left = _trie_lookup(keys, vocab_size, chars[:, :i])
+                right = _trie_lookup(keys, vocab_size, chars[:, i:])
+                cohesion = np.minimum(cohesion, log_c + log_total - np.log(counts[i - 1][left])
+                                      - np.log(counts[k - i][right]))
+            # 左右邻字熵：汉字串边界上的每次出现都视为不同的邻字
+            pos = np.flatnonzero(node_at[k] >= 0)
+            group = node_at[k][pos]
+            left_char = np.where(pos > 0, cid[np.maximum(pos - 1, 0)], -1)
+            right_char = np.where(pos + k + 1 < n, cid[np.minimum(pos + k + 1, n - 1)], -1)
+            left_char = np.where(left_char >= 0, left_char, vocab_size + pos)
+            right_char = np.where(right_char >= 0, right_char, vocab_size + pos)
+            boundary = np.minimum(_group_entropy(group, left_char, len(keys[k])),
+                                  _group_entropy(group, right_char, len(keys[k])))
+            is_word = (cohesion >= min_cohesion) & (boundary >= min_boundary_entropy)
+            logp.append(np.where(is_word, log_c - log_total, -np.inf))
+
+        segmenter = Segmenter(char_codes, keys, logp, math.log(0.5) - log_total)
+        # 用当前词典切分训练语料，按切分结果重新估计词频（未被切出的词从词典中去掉，只保留为前缀）
+        for _ in range(em_rounds):
+            starts, spans, nodes = segmenter._spans(codepoints)
+            n_words = len(starts)
+            log_words = math.log(max(n_words, 1))
+            new_logp = []
+            for k in range(max_len):
+                used = np.bincount(nodes[spans == k + 1], minlength=len(keys[k]))
+                if k == 0:
+                    # 单字始终可以成词，未被切出的字给一个很小的概率
+                    new_logp.append(np.log(np.maximum(used, 0.5)) - log_words)
+                else:
+                    with np.errstate(divide="ignore"):
+                        new_logp.append(np.where(used > 0, np.log(used) - log_words, -np.inf))
+            segmenter = Segmenter(char_codes, keys, new_logp, math.log(0.5) - log_words)
+    return segmenter
+
+
+def save_segmenter(segmenter, path=None):
+    path = DICT_PATH if path is None else path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump({"version": DICT_VERSION, "scripts": SIGNATURE, "char_codes": segmenter.char_codes, "keys": segmenter.keys,
+                     "logp": segmenter.logp, "unknown_logp": segmenter.unknown_logp}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+
+def load_segmenter(path=None):
+    """读取词典文件，不存在、版本不符或由另一份文字类别表建立时返回 None"""
+    path = DICT_PATH if path is None else path
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if data.get("version") != DICT_VERSION or data.get("scripts") != SIGNATURE:
+        return None
+    return Segmenter(data["char_codes"], data["keys"], data["logp"], data["unknown_logp"])
+
+
+def build_from_folders(folders=TRAIN_FOLDERS, path=None):
+    """读取文件夹中的全部文档建立词典并保存；同时删除旧词典产生的 'zh_words' 分词缓存和统计库"""
+    import corpus_cache
+    import stats_store
+    texts = [text for folder in folders if os.path.exists(folder)
+             for _, text, error in corpus_cache.iter_texts(folder) if not error]
+    segmenter = build_segmenter(texts)
+    save_segmenter(segmenter, path)
+    for directory in (corpus_cache.CACHE_DIR, stats_store.STORE_DIR):
+        for stale in glob.glob(os.path.join(directory, "*_zh_words.pkl")):
+            os.remove(stale)
+    return segmenter
+
+
+_SEGMENTER = None
+
+
+def get_segmenter():
+    """当前使用的分词器：首次调用时读取词典，词典不存在时先用 TRAIN_FOLDERS 建立
+
+    在多进程分词之前于主进程调用一次，工作进程即可直接继承，不会各自建立词典。
+    """
+    global _SEGMENTER
+    if _SEGMENTER is None:
+        _SEGMENTER = load_segmenter()
+        if _SEGMENTER is None:
+            print(f"正在由 {', '.join(TRAIN_FOLDERS)} 建立中文分词词典 {DICT_PATH} ...")
+            _SEGMENTER = build_from_folders()
+    return _SEGMENTER
+
+
+def segment(text):
+    """用 get_segmenter() 的词典对文本分词，返回汉字词列表"""
+    return get_segmenter().segment(text)
+
+
+def segment_texts(texts):
+    return get_segmenter().segment_texts(texts)
+
+
+def benchmark(folders=TRAIN_FOLDERS):
+    """测量分词吞吐（MB/s，按 UTF-8 原文计），批量与逐个文档两种方式"""
+    import corpus_cache
+    segmenter = get_segmenter()
+    for folder in folders:
+        texts = [text for _, text, error in corpus_cache.iter_texts(folder) if not error]
+        mb = sum(len(t.encode("utf-8")) for t in texts) / (1 << 20)
+        start = time.perf_counter()
+        words = segmenter.segment_texts(texts)
+        batch_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for text in texts:
+            segmenter.segment(text)
+        single_seconds = time.perf_counter() - start
+        n_words = sum(len(w) for w in words)
+        print(f"{folder}: {mb:.1f} MB，{n_words} 个词；批量 {mb / batch_seconds:.1f} MB/s，"
+              f"逐个文档 {mb / single_seconds:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    # 用法：python segmenter.py build [文件夹 ...]   由语料重新建立词典
+    #       python segmenter.py bench                测量分词吞吐
+    #       python segmenter.py "要切分的句子" ...
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    with profile_run(f"segmenter_{command if command in ('build', 'bench') else 'segment'}"):
+        if command == "build":
+            start = time.perf_counter()
+            segmenter = build_from_folders(sys.argv[2:] or TRAIN_FOLDERS)
+            n_words = sum(1 for w, _ in segmenter.words() if len(w) > 1)
+            print(f"词典已写入 {DICT_PATH}：{segmenter.vocab_size} 个单字，{n_words} 个多字词，"
+                  f"用时 {time.perf_counter() - start:.2f} 秒")
+        elif command == "bench":
+            benchmark()
+        else:
+            for text in sys.argv[1:]:
+                print(" / ".join(segment(text)))
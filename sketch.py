@@ -0,0 +1,214 @@
+import hashlib
+import math
+from collections import Counter
+import numpy as np
+from corpus_cache import iter_file_tokens
+from profiling import profiler
+from topk import CountMinTopK, CountSketchTopK
+
+# 概率统计模式：内存固定、可合并的 sketch，用于放不进内存的大语料。
+# 各 sketch 都按文件流式加入符号，两个 sketch（不同分片或文件夹）可以用 + 合并。
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_tokens(tokens):
+    """把符号映射为 64 位哈希（blake2b），与进程和运行次数无关"""
+    return np.array([int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'little')
+                     for t in tokens], dtype=np.uint64)
+
+
+def _splitmix64(x):
+    """splitmix64 混合函数（向量化），由哈希值派生出相互独立的伪随机数"""
+    with np.errstate(over='ignore'):
+        x = x + _GOLDEN
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _uniform(x):
+    """由 64 位整数得到 (0, 1) 上的均匀随机数（取高 53 位）"""
+    return ((x >> np.uint64(11)).astype(np.float64) + 0.5) / float(1 << 53)
+
+
+def _bit_length(x):
+    """uint64 数组每个元素的二进制位数（拆成高低 32 位，保证浮点运算精确）"""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+
+class HyperLogLog:
+    """HyperLogLog 不同符号数估计：2^p 个寄存器（p=14 时 16 KB，相对误差约 0.8%）"""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, tokens):
+        """加入一段符号序列（重复符号只哈希一次）"""
+        unique = set(tokens)
+        if unique:
+            self.add_hashes(hash_tokens(unique))
+
+    def add_hashes(self, hashes):
+        p = self.p
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # 剩余 64-p 位中第一个 1 的位置（全为 0 时取 64-p+1）
+        rank = (64 - p + 1 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # 小基数时改用线性计数
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return float(raw)
+
+    def __add__(self, other):
+        if self.p != other.p:
+            raise ValueError("只能合并精度相同的 HyperLogLog")
+        merged = HyperLogLog(self.p)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+
+class EntropySketch:
+    """基于稳定分布随机投影的熵估计（Clifford & Cosma）
+
+    每个符号按哈希确定地生成 k 个 α=1、β=-1 的最大偏斜稳定分布随机数 r_j，
+    sketch 为 y_j = Σ c_i·r_ij。对这种分布 E[exp(Σ p_i r_i)] = exp(-(2/π)·H)（H 以 nat 计），
+    因此 H ≈ -(π/2)·ln(mean_j exp(y_j / N))。sketch 是线性的，合并时直接相加；内存只有 k 个浮点数。
+    """
+
+    def __init__(self, k=512, seed=0, buffer_size=8192):
+        self.k = k
+        self.seed = seed
+        self.y = np.zeros(k, dtype=np.float64)
+        self.total = 0
+        # 投影按不同符号计算，先在有界的缓冲里累加计数，攒够 buffer_size 个不同符号再投影
+        self.buffer_size = buffer_size
+        self._pending = Counter()
+
+    def _stable(self, hashes):
+        """每个哈希对应的 k 个 S1(1, -1, 0) 随机数（Chambers–Mallows–Stuck 方法），形状 (符号数, k)"""
+        j = np.arange(self.k, dtype=np.uint64) + np.uint64(self.seed * self.k)
+        with np.errstate(over='ignore'):
+            base = hashes[:, None] + j[None, :] * np.uint64(0xD1B54A32D192ED03)
+        u = np.pi * (_uniform(_splitmix64(base)) - 0.5)
+        w = -np.log(_uniform(_splitmix64(base ^ np.uint64(0x5851F42D4C957F2D))))
+        half_pi = np.pi / 2
+        # β = -1：X = (2/π)·[(π/2 - U)·tan U + ln((π/2)·W·cos U / (π/2 - U))]
+        return (2 / np.pi) * ((half_pi - u) * np.tan(u)
+                              + np.log(half_pi * w * np.cos(u) / (half_pi - u)))
+
+    def update(self, tokens):
+        self._pending.update(tokens)
+        self.total += len(tokens)
+        if len(self._pending) >= self.buffer_size:
+            self._flush()
+
+    def _flush(self):
+        counts = self._pending
+        if counts:
+            weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            self.y += weights @ self._stable(hash_tokens(counts))
+            self._pending = Counter()
+
+    def entropy(self):
+        """当前的熵估计（比特/符号）"""
+        self._flush()
+        if self.total == 0:
+            return 0.0
+        z = self.y / self.total
+        shift = z.max()
+        log_mean = shift + math.log(np.mean(np.exp(z - shift)))
+        return max(0.0, -(math.pi / 2) * log_mean / math.log(2))
+
+    def __add__(self, other):
+        if (self.k, self.seed) != (other.k, other.seed):
+            raise ValueError("只能合并参数相同的熵 sketch")
+        self._flush()
+        other._flush()
+        merged = EntropySketch(self.k, self.seed, self.buffer_size)
+        merged.y = self.y + other.y
+        merged.total = self.total + other.total
+        return merged
+
+
+class SketchStats:
+    """一份语料的全部概率统计：符号总数、HyperLogLog 词表大小、近似高频项与熵 sketch"""
+
+    def __init__(self, capacity=1000, counter='count_sketch', k=512):
+        self.total = 0
+        self.hll = HyperLogLog()
+        self.counts = CountSketchTopK(capacity) if counter == 'count_sketch' else CountMinTopK(capacity)
+        self.entropy_sketch = EntropySketch(k)
+
+    def update(self, tokens):
+        self.total += len(tokens)
+        self.hll.update(tokens)
+        self.counts.update(tokens)
+        self.entropy_sketch.update(tokens)
+
+    def vocab_size(self):
+        return int(round(self.hll.estimate()))
+
+    def most_common(self, n=None):
+        return self.counts.most_common(n)
+
+    def entropy(self):
+        return self.entropy_sketch.entropy()
+
+    def __add__(self, other):
+        merged = SketchStats.__new__(SketchStats)
+        merged.total = self.total + other.total
+        merged.hll = self.hll + other.hll
+        merged.counts = self.counts + other.counts
+        merged.entropy_sketch = self.entropy_sketch + other.entropy_sketch
+        return merged
+
+
+def sketch_folder(folder_path, variant, **kwargs):
+    """逐个文件流式读取，返回该文件夹的 SketchStats（内存与语料大小无关）"""
+    stats = SketchStats(**kwargs)
+    with profiler.stage("sketch") as record:
+        for _, tokens in iter_file_tokens(folder_path, variant):
+            stats.update(tokens)
+            record['items'] += len(tokens)
+    return stats
+
+
+def sketch_prefix_entropies(token_lists, scales, k=512):
+    """流式计算各前缀规模下的熵 sketch 估计，返回 (有效规模, 熵)
+
+    token_lists 为按顺序给出的符号列表（例如 iter_file_tokens 的各文件）；
+    跨越规模检查点的文件在检查点处切开，结果与先拼接再切前缀一致。
+    """
+    with profiler.stage("sketch") as record:
+        order = sorted(scales)
+        sketch = EntropySketch(k)
+        valid_scales, entropies = [], []
+        pos = 0
+        i = 0
+        for tokens in token_lists:
+            start = 0
+            while i < len(order) and pos + len(tokens) - start >= order[i]:
+                cut = start + order[i] - pos
+                sketch.update(tokens[start:cut])
+                pos += cut - start
+                start = cut
+                valid_scales.append(order[i])
+                entropies.append(sketch.entropy())
+                i += 1
+            sketch.update(tokens[start:])
+            pos += len(tokens) - start
+            if i == len(order):
+                break
+        record['items'] = pos
+    return valid_scales, entropies
@@ -0,0 +1,262 @@
+import hashlib
+import os
+import pickle
+import sys
+import time
+import numpy as np
+from corpus_cache import iter_texts, list_documents
+from entropy_utils import ArrayPrefixEntropy
+from profiling import profile_run, profiler
+from script_classes import SIGNATURE
+from tokenizer import TOKENIZERS, canonical_variant, tokenize_packed, unpack
+from vocab import CountVector, Vocabulary
+
+# 持久化的统计库：每个语料文件夹（或打包语料）在每种分词方式下一份，
+# 保存每个文档的稀疏计数向量 (编号, 次数) 与整个语料的计数向量。
+# 爬虫新增或修改文档后，汇总只加上这些文档的计数、减去被删除或修改前的计数，
+# 不需要重新分词和统计整个语料；规模、Top-K、齐夫拟合直接由汇总得到，
+# 熵曲线由各文档的计数向量依次累加，只有检查点落在其中的文档需要重新读取。
+
+# 统计库目录（可通过环境变量 STATS_STORE_DIR 修改）
+STORE_DIR = os.environ.get("STATS_STORE_DIR", ".stats_store")
+STORE_VERSION = 1
+# python stats_store.py 默认同步的分词方式（与 tokenizer.TOKENIZERS 同名）
+STORE_VARIANTS = ['doc_stats', 'cjk_chars', 'letters', 'words', 'lower_words']
+DEFAULT_FOLDERS = ['en.people', 'english.news', 'renminwang', 'xinhuawang']
+
+
+class CountStore:
+    """一个语料在一种分词方式下的统计：符号表、每个文档的计数向量、语料的计数向量
+
+    'doc_stats' 的"符号表"固定为 ['bytes', 'lines']，每个文档的向量即其字节数与行数。
+    """
+
+    def __init__(self, variant):
+        self.variant = variant
+        self.vocab = Vocabulary()
+        self.docs = {}      # 文档名 -> (状态戳, 编号数组, 次数数组)
+        self.order = []     # 上次同步时的文档顺序（与 corpus_cache 的拼接顺序一致）
+        self.totals = np.zeros(0, dtype=np.int64)
+        if variant == 'doc_stats':
+            self.vocab.add('bytes')
+            self.vocab.add('lines')
+
+    def encode(self, text):
+        """把文档分词并编码为本统计库的编号序列"""
+        return self.encode_packed(tokenize_packed(text, [self.variant])[self.variant])
+
+    def encode_packed(self, packed):
+        """把压缩后的符号串（见 tokenizer.pack）编码为本统计库的编号序列"""
+        if TOKENIZERS[self.variant][1]:
+            return self.vocab.encode_chars(packed)
+        return self.vocab.encode(unpack(packed, False))
+
+    def add(self, name, stamp, packed):
+        """加入一个文档（压缩后的符号串）：记录其计数向量并累加到汇总"""
+        if self.variant == 'doc_stats':
+            ids = np.array([0, 1], dtype=np.int64)
+            counts = np.array([int(v) for v in unpack(packed, False)], dtype=np.int64)
+        else:
+            ids, counts = np.unique(self.encode_packed(packed), return_counts=True)
+            ids = ids.astype(np.int64)
+        if len(self.totals) < len(self.vocab):
+            self.totals = np.concatenate(
+                [self.totals, np.zeros(len(self.vocab) - len(self.totals), dtype=np.int64)])
+        self.totals[ids] += counts
+        self.docs[name] = (stamp, ids, counts)
+
+    def remove(self, name):
+        """从汇总中减去一个文档的计数"""
+        _, ids, counts = self.docs.pop(name)
+        self.totals[ids] -= counts
+
+    def doc_stats(self):
+        """'doc_stats' 统计库的汇总：{'files', 'bytes', 'lines'}（与 corpus_cache.load_variants 相同）"""
+        totals = self.totals if len(self.totals) else np.zeros(2, dtype=np.int64)
+        return {'files': len(self.docs), 'bytes': int(totals[0]), 'lines': int(totals[1])}
+
+
+class StoredCorpus(CountVector):
+    """由统计库得到的语料：计数来自汇总向量，熵曲线按文档计数向量依次累加
+
+    parts 为 [(文件夹, CountStore, 编号映射)]，依次拼接；编号映射把统计库的编号映射到 vocab
+    （None 表示相同）。与 EncodedCorpus 一样可以用 + 拼接，供 Top-K、齐夫拟合和熵曲线使用。
+    """
+
+    def __init__(self, parts, counts, vocab):
+        super().__init__(counts, vocab)
+        self.parts = parts
+
+    @classmethod
+    def from_store(cls, folder_path, store):
+        return cls([(folder_path, store, None)], store.totals.copy(), store.vocab)
+
+    def __add__(self, other):
+        """拼接两份语料，不修改各统计库自己的符号表"""
+        vocab = Vocabulary()
+        for token in self.vocab.id_to_token:
+            vocab.add(token)
+        remap = np.array([vocab.add(t) for t in other.vocab.id_to_token], dtype=np.int64)
+        counts = np.zeros(len(vocab), dtype=np.int64)
+        own = self.counts()
+        counts[:len(own)] = own
+        counts[remap] += other.counts()
+        parts = self.parts + [(folder, store, remap if mapping is None else remap[mapping])
+                              for folder, store, mapping in other.parts]
+        return StoredCorpus(parts, counts, vocab)
+
+    def prefix_entropies(self, scales):
+        """各前缀规模下的信息熵，结果与 entropy_utils.prefix_entropies 对完整序列的计算一致
+
+        整个文档落在前缀内时直接累加其计数向量；检查点落在某个文档中间时才读取该文档，
+        按顺序切分其编号序列。
+        """
+        with profiler.stage("entropy") as record:
+            acc = ArrayPrefixEntropy()
+            results = [0.0] * len(scales)
+            pending = sorted(range(len(scales)), key=lambda j: scales[j])
+            k = pos = 0
+            for folder, store, mapping in self.parts:
+                for name in store.order:
+                    if k == len(pending):
+                        break
+                    _, ids, counts = store.docs[name]
+                    n = int(counts.sum())
+                    mapped = ids if mapping is None else mapping[ids]
+                    if pos + n <= scales[pending[k]]:
+                        acc.update_counts(mapped, counts)
+                        pos += n
+                        if pos == scales[pending[k]]:
+                            while k < len(pending) and scales[pending[k]] == pos:
+                                results[pending[k]] = acc.entropy()
+                                k += 1
+                        continue
+                    # 检查点落在本文档中间：重新读取该文档，按检查点切分编号序列
+                    sequence = next(store.encode(text) for _, text, _ in iter_texts(folder, [name]))
+                    if mapping is not None:
+                        sequence = mapping[sequence]
+                    start = 0
+                    while k < len(pending) and scales[pending[k]] < pos + n:
+                        end = max(scales[pending[k]] - pos, start)
+                        acc.update(sequence[start:end])
+                        start = end
+                        results[pending[k]] = acc.entropy()
+                        k += 1
+                    acc.update(sequence[start:])
+                    pos += n
+            # 规模超过序列长度时按整个序列计算
+            for i in pending[k:]:
+                results[i] = acc.entropy()
+            record['items'] = pos
+        return results
+
+
+def _store_path(folder_path, variant):
+    """统计库文件路径：以文件夹（或打包语料）绝对路径和分词方式为键（与 corpus_cache 相同）"""
+    key = hashlib.md5(os.path.abspath(folder_path).encode("utf-8")).hexdigest()[:12]
+    name = os.path.basename(os.path.normpath(folder_path))
+    return os.path.join(STORE_DIR, f"{name}_{key}_{variant}.pkl")
+
+
+def _load_store(path, variant):
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") == STORE_VERSION and data.get("scripts") == SIGNATURE:
+            return data["store"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️ 读取统计库 {path} 时出错，将重新统计：{e}")
+    return CountStore(variant)
+
+
+def _save_store(path, store):
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": STORE_VERSION, "scripts": SIGNATURE, "store": store}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ 写入统计库 {path} 时出错：{e}")
+
+
+def update_stores(folder_path, variants):
+    """把 folder_path 各分词方式的统计库同步到当前的文档
+
+    删除或修改过的文档先从汇总中减去；新增或修改过的文档只读取一次，
+    所有分词方式共用一次扫描（tokenizer.tokenize_packed）。
+    返回 ({分词方式: CountStore}, {'added', 'changed', 'removed', 'unchanged'})，别名按其实际的分词方式只存一份。
+    """
+    variants = list(dict.fromkeys(canonical_variant(variant) for variant in variants))
+    documents = list_documents(folder_path)
+    stamps = dict(documents)
+    paths = {variant: _store_path(folder_path, variant) for variant in variants}
+    stores = {variant: _load_store(paths[variant], variant) for variant in variants}
+    summary = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+    # 按文档判断：任一分词方式缺少该文档或状态戳不同，即需要重新读取
+    reread = []
+    for name, stamp in documents:
+        known = [store.docs.get(name) for store in stores.values()]
+        if all(entry and entry[0] == stamp for entry in known):
+            summary['unchanged'] += 1
+            continue
+        # 某个统计库中状态戳不同才算修改；只是缺少该文档（如新加的分词方式）算新增
+        summary['changed' if any(entry and entry[0] != stamp for entry in known) else 'added'] += 1
+        reread.append(name)
+    dirty = set()
+    with profiler.stage("store_update") as record:
+        for variant, store in stores.items():
+            for name in list(store.docs):
+                if name not in stamps or store.docs[name][0] != stamps[name]:
+                    store.remove(name)
+                    dirty.add(variant)
+                    if name not in stamps and variant == variants[0]:
+                        summary['removed'] += 1
+        for name, text, error in iter_texts(folder_path, reread):
+            if error:
+                print(error)
+                continue
+            pending = [variant for variant, store in stores.items()
+                       if store.docs.get(name, (None,))[0] != stamps[name]]
+            packed = tokenize_packed(text, pending)
+            for variant in pending:
+                stores[variant].add(name, stamps[name], packed[variant])
+                dirty.add(variant)
+            record['items'] += 1
+            record['bytes'] += len(text.encode("utf-8"))
+        for variant, store in stores.items():
+            order = [name for name, _ in documents if name in store.docs]
+            if order != store.order:
+                store.order = order
+                dirty.add(variant)
+            if variant in dirty:
+                _save_store(paths[variant], store)
+    return stores, summary
+
+
+def load_stored(folder_path, variants):
+    """与 corpus_cache.load_variants 相同的返回形式，但数据来自增量同步的统计库
+
+    返回 {分词方式: StoredCorpus}，'doc_stats' 返回 {'files', 'bytes', 'lines'}。
+    """
+    stores, summary = update_stores(folder_path, variants)
+    print(f"统计库 {folder_path}: 新增 {summary['added']} 篇，修改 {summary['changed']} 篇，"
+          f"删除 {summary['removed']} 篇，未变 {summary['unchanged']} 篇")
+    results = {variant: store.doc_stats() if variant == 'doc_stats'
+               else StoredCorpus.from_store(folder_path, store)
+               for variant, store in stores.items()}
+    return {variant: results[canonical_variant(variant)] for variant in variants}
+
+
+if __name__ == "__main__":
+    # 用法：python stats_store.py [文件夹 ...]，同步各文件夹所有分词方式的统计库
+    with profile_run("stats_store"):
+        for folder in sys.argv[1:] or DEFAULT_FOLDERS:
+            if not os.path.exists(folder):
+                print(f"文件夹 {folder} 不存在")
+                continue
+            start = time.perf_counter()
+            stats = load_stored(folder, STORE_VARIANTS)['doc_stats']
+            print(f"  {stats['files']} 个文件，{stats['bytes']} 字节，用时 {time.perf_counter() - start:.2f} 秒")
@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# 各模块都在仓库根目录下，测试直接按模块名导入
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORDS = ("economy trade policy growth market energy climate science health education culture "
+         "research industry farmers village city river bridge railway summit leaders talks "
+         "cooperation exports investment technology digital students teachers hospital doctors "
+         "museum festival tourism weather harvest factory workers ocean satellite launch").split()
+
+
+def article_paragraphs(i, n_paragraphs=4, words_per_paragraph=40):
+    """第 i 篇测试文章的段落（随机单词，各篇之间 SimHash 相差很远）"""
+    rng = random.Random(i)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_paragraph)) + "."
+            for _ in range(n_paragraphs)]
+
+
+class SiteServer:
+    """本地测试站点：/ 为目录页，/news/<i>.html 为文章页；记录每次请求的 (时间, 路径)"""
+
+    def __init__(self, n_articles):
+        self.articles = {i: article_paragraphs(i) for i in range(1, n_articles + 1)}
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((time.monotonic(), self.path))
+                body = server.page(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def page(self, path):
+        if path == "/":
+            links = "".join(f'<li><a href="/news/{i}.html">Story {i}</a></li>' for i in self.articles)
+            return (f"<html><head><title>Home</title></head><body><p>Latest news</p><ul>{links}</ul>"
+                    f'<a href="https://example.com/elsewhere">external</a></body></html>')
+        if path.startswith("/news/") and path.endswith(".html"):
+            i = int(path[len("/news/"):-len(".html")])
+            if i not in self.articles:
+                return None
+            paragraphs = "".join(f"<p>{p}</p>" for p in self.articles[i])
+            return (f"<html><head><title>Story {i}</title></head><body><div id='detail'>{paragraphs}</div>"
+                    f'<a href="/">Home</a> <a href="/news/{i % len(self.articles) + 1}.html">Next</a>'
+                    f"</body></html>")
+        return None
+
+    def fetched(self, path):
+        return sum(1 for _, p in self.requests if p == path)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def site_server():
+    with SiteServer(n_articles=12) as server:
+        yield server
@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import analyze
+import cal_scale
+import render
+from conftest import ROOT
+from corpus_cache import iter_texts
+from tokenizer import REFERENCE_TOKENIZERS
+from zipf_fit import zipf_summary
+
+FOLDERS = ['en.people', 'english.news', 'renminwang', 'xinhuawang']
+# 每个语料取前若干篇：足够让每条熵曲线至少有一个有效规模
+N_FILES = 200
+
+
+@pytest.fixture
+def small_corpora(tmp_path, monkeypatch):
+    """在临时目录中放四个语料的子集；缓存、统计库和性能报告都写在临时目录中"""
+    if not all(os.path.isdir(os.path.join(ROOT, folder)) for folder in FOLDERS):
+        pytest.skip("语料文件夹不存在")
+    for folder in FOLDERS:
+        os.makedirs(tmp_path / folder)
+        for i in range(1, N_FILES + 1):
+            shutil.copy(os.path.join(ROOT, folder, f"{folder}_{i}.txt"), tmp_path / folder)
+    monkeypatch.chdir(tmp_path)
+    # 图表渲染不影响结果，测试中跳过
+    monkeypatch.setattr(render, "_render_jobs", lambda jobs, workers, force=False: None)
+    return tmp_path
+
+
+def read_results(output_dir):
+    return {name: json.load(open(os.path.join(output_dir, f"{name}.json"), encoding="utf-8"))
+            for name in ('scale', 'top_k', 'entropy', 'zipf')}
+
+
+def assert_close(a, b, path="results"):
+    """逐项比较两份结果：整数与字符串必须相同，浮点数允许累加顺序带来的舍入误差"""
+    assert type(a) is type(b), path
+    if isinstance(a, dict):
+        assert a.keys() == b.keys(), path
+        for key in a:
+            assert_close(a[key], b[key], f"{path}.{key}")
+    elif isinstance(a, list):
+        assert len(a) == len(b), path
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_close(x, y, f"{path}[{i}]")
+    elif isinstance(a, float):
+        assert a == pytest.approx(b, rel=1e-9, abs=1e-9), path
+    else:
+        assert a == b, path
+
+
+def test_incremental_results_match_a_full_run(small_corpora, capsys):
+    analyze.main(['all', '--incremental', '--output-dir', 'incremental'])
+    # 爬虫在两次运行之间删除、修改和新增了文档
+    os.remove(small_corpora / 'renminwang' / 'renminwang_3.txt')
+    os.remove(small_corpora / 'en.people' / 'en.people_5.txt')
+    with open(small_corpora / 'xinhuawang' / 'xinhuawang_7.txt', 'a', encoding='utf-8') as f:
+        f.write("\n新增的一段：中国经济稳步增长。")
+    with open(small_corpora / 'english.news' / 'english.news_9.txt', 'a', encoding='utf-8') as f:
+        f.write("\nAn added paragraph about the economy.")
+    for folder in ('renminwang', 'english.news'):
+        shutil.copy(os.path.join(ROOT, folder, f"{folder}_{N_FILES + 1}.txt"), small_corpora / folder)
+    capsys.readouterr()
+
+    analyze.main(['all', '--incremental', '--output-dir', 'incremental'])
+    log = capsys.readouterr().out
+    assert "统计库 renminwang: 新增 1 篇，修改 0 篇，删除 1 篇" in log
+    assert "统计库 xinhuawang: 新增 0 篇，修改 1 篇，删除 0 篇" in log
+    analyze.main(['all', '--no-cache', '--output-dir', 'full'])
+
+    incremental, full = read_results('incremental'), read_results('full')
+    assert full['scale']['renminwang']['files'] == N_FILES
+    assert all(full['entropy'][variant][folder]['scales']
+               for variant, folders in full['entropy'].items() for folder in folders)
+    assert_close(incremental, full)
+
+
+def reference_tokens(folder, variant):
+    """原脚本的逐个分词方式提取，不经过缓存与一次扫描"""
+    return [token for _, text, _ in iter_texts(folder) for token in REFERENCE_TOKENIZERS[variant](text)]
+
+
+def plugin_entropy(tokens):
+    counts = np.array(list(Counter(tokens).values()), dtype=np.float64)
+    p = counts / counts.sum()
+    return float(-(p * np.log2(p)).sum())
+
+
+def test_one_pass_results_match_the_individual_scripts(small_corpora):
+    analyze.main(['all', '--output-dir', 'out'])
+    results = read_results('out')
+    for folder in FOLDERS:
+        assert results['scale'][folder] == cal_scale.scan_folder(folder)
+    for variant, folders in analyze.TOPK_VARIANTS.items():
+        for folder in folders:
+            counts = Counter(reference_tokens(folder, variant))
+            top = results['top_k'][variant][folder]
+            assert [count for _, count in top] == [count for _, count in counts.most_common(10)]
+            assert all(counts[token] == count for token, count in top)
+    for variant, task in analyze.ENTROPY_TASKS.items():
+        for folder in task['folders']:
+            tokens = reference_tokens(folder, variant)
+            result = results['entropy'][variant][folder]
+            assert result['scales']
+            for scale, h in zip(result['scales'], result['entropies']):
+                assert h == pytest.approx(plugin_entropy(tokens[:scale]), abs=1e-9)
+    for folder in analyze.ZIPF_FOLDERS:
+        counts = np.array(list(Counter(reference_tokens(folder, 'lower_words')).values()))
+        expected = zipf_summary(counts)
+        assert results['zipf'][folder]['mle_s'] == pytest.approx(expected['mle_s'], rel=1e-9)
+        assert results['zipf'][folder]['tokens'] == expected['tokens'] == counts.sum()
@@ -0,0 +1,56 @@
+import os
+
+import cal_scale
+from corpus_cache import iter_texts, list_documents
+from corpus_pack import PackReader, PackWriter, pack_folder
+
+DOCS = {
+    "site_1.txt": "第一行\r\n second line with words\r\n",
+    "site_2.txt": "no trailing newline 中文",
+    "site_10.txt": "mixed\nline\r\nendings\r\n它's\n",
+}
+
+
+def write_folder(path):
+    path.mkdir()
+    for name, text in DOCS.items():
+        (path / name).write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def test_pack_keeps_documents_byte_for_byte(tmp_path):
+    folder = write_folder(tmp_path / "site")
+    pack_path = pack_folder(folder)
+    with PackReader(pack_path) as reader:
+        names = [name for name, _ in reader.iter_texts()]
+        # 按文件序号排序，与文件系统顺序无关
+        assert names == ["site_1.txt", "site_2.txt", "site_10.txt"]
+        for i, name in enumerate(names):
+            assert reader.view(i).tobytes() == DOCS[name].encode("utf-8")
+    assert dict((name, text) for name, text, _ in iter_texts(pack_path)) == DOCS
+    assert dict((name, text) for name, text, _ in iter_texts(folder)) == DOCS
+
+
+def test_cal_scale_gives_same_stats_for_folder_and_pack(tmp_path):
+    folder = write_folder(tmp_path / "site")
+    pack_path = pack_folder(folder)
+    for sketch in (False, True):
+        assert cal_scale.scan_folder(folder, sketch) == cal_scale.scan_folder(pack_path, sketch)
+    stats = cal_scale.scan_folder(pack_path)
+    assert stats["files"] == 3
+    assert stats["bytes"] == sum(len(t.encode("utf-8")) for t in DOCS.values())
+    assert stats["lines"] == 2 + 1 + 4
+
+
+def test_later_record_with_same_name_supersedes_earlier_one(tmp_path):
+    pack_path = str(tmp_path / "site.pack")
+    writer = PackWriter(pack_path)
+    writer.append("old", name="a.txt")
+    writer.append("other", name="b.txt")
+    writer.append("new", name="a.txt")
+    assert [name for name, _ in list_documents(pack_path)] == ["b.txt", "a.txt"]
+    assert dict((name, text) for name, text, _ in iter_texts(pack_path)) == {"a.txt": "new", "b.txt": "other"}
+    assert dict((name, text) for name, text, _ in iter_texts(pack_path, ["a.txt"])) == {"a.txt": "new"}
+    with PackReader(pack_path) as reader:
+        assert len(reader) == 2
+    assert os.path.getsize(pack_path) == 16 + len("oldothernew")
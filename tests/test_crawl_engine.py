@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+import crawl_engine
+from crawl_engine import SiteCrawler, last_page_number
+
+DELAY = 0.05
+
+
+def make_crawler(server, output_dir):
+    return SiteCrawler(str(output_dir), "site", (server.base_url + "/",), article_min_chars=300,
+                       container="detail")
+
+
+def saved_texts(output_dir):
+    return {name: open(os.path.join(output_dir, name), encoding="utf-8").read()
+            for name in os.listdir(output_dir) if name.endswith(".txt")}
+
+
+def file_number(name):
+    return int(name[len("site_"):-len(".txt")])
+
+
+def test_concurrent_crawl_saves_every_article_and_respects_host_delay(site_server, tmp_path, monkeypatch):
+    # 在限速等待之后、发出请求之前记录时间（服务器端的到达时间还受建立连接的耗时影响）
+    sent = []
+    get_session = crawl_engine.get_session
+
+    class RecordingSession:
+        def __init__(self, session):
+            self.session = session
+
+        def get(self, url, **kwargs):
+            sent.append(crawl_engine.time.monotonic())
+            return self.session.get(url, **kwargs)
+
+    monkeypatch.setattr(crawl_engine, "get_session", lambda: RecordingSession(get_session()))
+    crawler = make_crawler(site_server, tmp_path)
+    crawler.crawl_concurrently(site_server.base_url + "/", max_pages=100, delay=DELAY, workers=4)
+
+    texts = saved_texts(tmp_path)
+    assert sorted(texts, key=file_number) == [f"site_{i}.txt" for i in range(1, 13)]
+    assert last_page_number(str(tmp_path)) == 12
+    # 每篇文章正好保存一次，目录页不保存
+    assert len(set(texts.values())) == 12
+    assert all(text.startswith("Story ") for text in texts.values())
+    # 每个 URL 只请求一次，站外链接不跟踪
+    paths = [path for _, path in site_server.requests]
+    assert sorted(paths) == sorted(["/"] + [f"/news/{i}.html" for i in range(1, 13)])
+    # 同一主机的相邻请求间隔不小于 delay（留出少量计时误差）
+    times = sorted(sent)
+    assert len(times) == 13
+    assert min(b - a for a, b in zip(times, times[1:])) >= DELAY - 0.005
+
+
+def test_serial_crawl_resumes_after_interruption(site_server, tmp_path):
+    crawler = make_crawler(site_server, tmp_path)
+    save_page = crawler.save_page
+    calls = []
+
+    def interrupted_save(url, text):
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        calls.append(url)
+        save_page(url, text)
+
+    crawler.save_page = interrupted_save
+    with pytest.raises(KeyboardInterrupt):
+        crawler.crawl_from_seed(site_server.base_url + "/", max_pages=100, delay=0)
+    assert len(saved_texts(tmp_path)) == 3
+    assert os.path.exists(tmp_path / ".crawl_state.json")
+
+    # 新进程从检查点继续：序号接着 3 往后编，已保存的文章不再请求
+    resumed = make_crawler(site_server, tmp_path)
+    resumed.crawl_from_seed(site_server.base_url + "/", max_pages=100, delay=0)
+    texts = saved_texts(tmp_path)
+    assert sorted(texts, key=file_number) == [f"site_{i}.txt" for i in range(1, 13)]
+    assert len(set(texts.values())) == 12
+    assert site_server.fetched("/") == 1
+    for url in calls:
+        assert site_server.fetched(url[len(site_server.base_url):]) == 1
+
+
+def test_max_pages_stops_and_resume_continues(site_server, tmp_path):
+    make_crawler(site_server, tmp_path).crawl_concurrently(
+        site_server.base_url + "/", max_pages=4, delay=0, workers=4)
+    assert len(saved_texts(tmp_path)) == 4
+
+    make_crawler(site_server, tmp_path).crawl_concurrently(
+        site_server.base_url + "/", max_pages=8, delay=0, workers=4)
+    texts = saved_texts(tmp_path)
+    assert len(texts) == 8
+    assert len(set(texts.values())) == 8
+
+
+def test_max_pages_counts_pages_saved_in_this_run(site_server, tmp_path):
+    # 与实际语料相同：目录中已有 max_pages 个文件，重新运行仍应抓取新文章，序号接着往后编
+    for i in range(1, 6):
+        (tmp_path / f"site_{i}.txt").write_text(f"existing page {i} " * 50, encoding="utf-8")
+    make_crawler(site_server, tmp_path).crawl_from_seed(site_server.base_url + "/", max_pages=5, delay=0)
+    texts = saved_texts(tmp_path)
+    assert sorted(texts, key=file_number) == [f"site_{i}.txt" for i in range(1, 11)]
+    assert all(texts[f"site_{i}.txt"].startswith("Story ") for i in range(6, 11))
+
+    # 续爬属于同一次抓取：已保存的 5 页计入 max_pages
+    make_crawler(site_server, tmp_path).crawl_concurrently(
+        site_server.base_url + "/", max_pages=10, delay=0, workers=4)
+    assert last_page_number(str(tmp_path)) == 15
+
+
+def test_rate_limiter_spaces_requests_per_host_only():
+    limiter = crawl_engine.HostRateLimiter(0.2)
+    start = crawl_engine.time.monotonic()
+    limiter.wait("http://a.example/1")
+    limiter.wait("http://b.example/1")
+    assert crawl_engine.time.monotonic() - start < 0.1
+    limiter.wait("http://a.example/2")
+    assert crawl_engine.time.monotonic() - start >= 0.19
@@ -0,0 +1,80 @@
+import os
+
+from conftest import article_paragraphs
+from corpus_pack import PackReader
+from crawl_engine import SiteCrawler
+from dedup import FetchStore, canonical_key, canonicalize_url, hamming_distance, simhash
+
+
+def test_canonical_key_ignores_tracking_params_host_aliases_and_index_pages():
+    assert canonical_key("https://www.news.cn/a/index.html?spm=1&b=2#top") == canonical_key("http://m.news.cn/a/?b=2")
+    assert canonicalize_url("HTTP://Example.com:80/x?utm_source=a&z=1&a=2") == "http://example.com/x?a=2&z=1"
+
+
+def test_near_duplicates_are_found_only_across_different_urls(tmp_path):
+    store = FetchStore(str(tmp_path / "store.json"))
+    text = " ".join(article_paragraphs(1))
+    edited = text.replace("economy", "economics", 1) if "economy" in text else text + " extra"
+    assert hamming_distance(simhash(text), simhash(edited)) <= 3
+    store.remember_content("site/a", text, "a.txt")
+    # 同一篇文章完全相同：未变化；其他 URL 上的相近正文：重复
+    assert store.find_duplicate(text, "site/a") == "site/a"
+    assert store.find_duplicate(edited, "site/b") == "site/a"
+    # 本 URL 的新版本不算重复
+    assert store.find_duplicate(edited, "site/a") is None
+
+
+def test_remember_content_replaces_previous_fingerprints(tmp_path):
+    store = FetchStore(str(tmp_path / "store.json"))
+    old, new = " ".join(article_paragraphs(1)), " ".join(article_paragraphs(2))
+    store.remember_content("site/a", old, "a.txt")
+    store.remember_content("site/a", old, "a.txt")
+    assert all(keys.count("site/a") == 1 for keys in store._bands.values())
+    store.remember_content("site/a", new, "a.txt")
+    assert store.find_duplicate(old, "site/b") is None
+    assert store.find_duplicate(new, "site/b") == "site/a"
+    assert sum(keys.count("site/a") for keys in store._bands.values()) == FetchStore.BANDS
+    assert list(store.hashes.values()) == ["site/a"]
+
+    store.save()
+    loaded = FetchStore(store.path)
+    assert loaded.load()
+    assert loaded.files == {"site/a": "a.txt"}
+    assert loaded._digests == store._digests
+    assert loaded.simhashes == store.simhashes
+    assert sorted(map(sorted, loaded._bands.values())) == sorted(map(sorted, store._bands.values()))
+
+
+def test_recrawl_overwrites_updated_articles(site_server, tmp_path):
+    pack_path = str(tmp_path / "site.pack")
+    seed = site_server.base_url + "/"
+
+    def crawl(max_pages):
+        crawler = SiteCrawler(str(tmp_path / "site"), "site", (seed,), article_min_chars=300,
+                              container="detail", pack_path=pack_path)
+        crawler.crawl_from_seed(seed, max_pages=max_pages, delay=0)
+        return crawler
+
+    crawler = crawl(len(site_server.articles))
+    files = dict(crawler.fetch_store.files)
+    assert len(files) == 12
+
+    # 小改动（与旧版本相近）和大改动都应覆盖原文件，不新建文件也不当作重复丢弃
+    site_server.articles[3][0] = site_server.articles[3][0].replace(".", " today.")
+    site_server.articles[5] = article_paragraphs(105)
+    # 与 ch_crawl.py / en_crawl.py 相同：max_pages 等于目录中已有的文件数
+    crawler = crawl(len(files))
+    assert crawler.fetch_store.files == files
+    output_dir = tmp_path / "site"
+    assert sorted(f for f in os.listdir(output_dir) if f.endswith(".txt")) == sorted(files.values())
+    for i in (3, 5):
+        name = files[canonical_key(f"{site_server.base_url}/news/{i}.html")]
+        text = (output_dir / name).read_text(encoding="utf-8")
+        assert site_server.articles[i][0][:40] in text
+    # 上次抓取已经完成，重爬从种子重新开始，而不是什么都不抓
+    assert site_server.fetched("/") == 2
+
+    with PackReader(pack_path) as reader:
+        texts = dict(reader.iter_texts())
+    assert len(reader.records) == 14 and len(texts) == 12
+    assert texts == {name: (output_dir / name).read_text(encoding="utf-8") for name in files.values()}
@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+import pytest
+
+from entropy_estimators import (ESTIMATORS, chao1_richness, entropy_bands, estimate_entropies,
+                                miller_madow, plugin_entropy)
+
+K = 1000
+
+
+def zipf_probabilities(k=K, s=1.0):
+    p = 1 / np.arange(1, k + 1) ** s
+    return p / p.sum()
+
+
+DISTRIBUTIONS = {
+    'uniform': np.full(K, 1 / K),
+    'zipf': zipf_probabilities(),
+}
+
+
+def true_entropy(p):
+    return float(-(p * np.log2(p)).sum())
+
+
+def mean_estimate(estimator, p, n, n_samples=20):
+    return float(np.mean([ESTIMATORS[estimator](np.random.default_rng(seed).multinomial(n, p))
+                          for seed in range(n_samples)]))
+
+
+def test_exact_values():
+    counts = np.full(8, 5)
+    assert plugin_entropy(counts) == pytest.approx(3.0)
+    assert miller_madow(counts) == pytest.approx(3.0 + 7 / (2 * 40 * math.log(2)))
+    for estimator in ('plugin', 'miller_madow', 'chao_shen'):
+        assert ESTIMATORS[estimator](np.array([100, 0, 0])) == pytest.approx(0.0, abs=1e-12)
+
+
+@pytest.mark.parametrize("name", DISTRIBUTIONS)
+def test_corrected_estimators_reduce_the_small_sample_bias(name):
+    p = DISTRIBUTIONS[name]
+    h = true_entropy(p)
+    # N = 2K：代入估计明显偏低，修正后的估计都更接近真值
+    bias = {estimator: mean_estimate(estimator, p, 2 * K) - h for estimator in ESTIMATORS}
+    assert bias['plugin'] < -0.3
+    for estimator in ('miller_madow', 'chao_shen', 'nsb'):
+        assert abs(bias[estimator]) < abs(bias['plugin']), estimator
+    assert abs(bias['nsb']) < 0.1
+    assert abs(bias['chao_shen']) < 0.25
+
+
+@pytest.mark.parametrize("name", DISTRIBUTIONS)
+@pytest.mark.parametrize("estimator", list(ESTIMATORS))
+def test_estimators_converge_on_large_samples(name, estimator):
+    p = DISTRIBUTIONS[name]
+    counts = np.random.default_rng(0).multinomial(1_000_000, p)
+    assert ESTIMATORS[estimator](counts) == pytest.approx(true_entropy(p), abs=0.01)
+
+
+def test_rows_are_estimated_independently():
+    rows = np.random.default_rng(1).multinomial(500, zipf_probabilities(), size=5)
+    for estimator in ('plugin', 'miller_madow', 'chao_shen'):
+        np.testing.assert_allclose(ESTIMATORS[estimator](rows), [ESTIMATORS[estimator](row) for row in rows])
+
+
+def test_chao1_counts_unseen_symbols():
+    assert chao1_richness([5, 5, 5]) == 3
+    # f1 = 4, f2 = 2：4 + 16 / 4
+    assert chao1_richness([1, 1, 1, 1, 2, 2, 7, 0]) == 7 + 4
+
+
+def test_prefix_estimates_match_direct_counts():
+    ids = np.random.default_rng(2).choice(K, size=20000, p=zipf_probabilities())
+    scales = [5000, 1000, 20000, 50000]
+    for estimator in ESTIMATORS:
+        expected = [ESTIMATORS[estimator](np.bincount(ids[:s], minlength=K)) for s in scales]
+        assert estimate_entropies(ids, scales, estimator, K) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("mode, estimator", [('bootstrap', 'miller_madow'), ('subsample', 'chao_shen')])
+def test_bands_cover_the_true_entropy(mode, estimator):
+    p = zipf_probabilities()
+    h = true_entropy(p)
+    covered = 0
+    for seed in range(20):
+        ids = np.random.default_rng(seed).choice(K, size=100000, p=p)
+        point, low, high = entropy_bands(ids, [20000], estimator, mode, n_rep=50, seed=seed, vocab_size=K)
+        assert low[0] <= point[0] <= high[0]
+        covered += low[0] <= h <= high[0]
+    # 95% 区间：20 次中至少 16 次包含真值
+    assert covered >= 16
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from html_extract import (available_backends, decode_html, extract_article, extract_links, extract_page,
+                          load_fixtures, looks_like_article, normalized_article, page_encoding)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+# 四个语料网站的页面样本：原始字节、响应头、期望正文（与爬虫保存的文件相同）和期望链接
+FIXTURES = load_fixtures(FIXTURE_DIR)
+ARTICLE_BACKENDS = ["selectolax", "lxml", "bs4"]
+LINK_BACKENDS = ["regex"] + ARTICLE_BACKENDS
+
+
+def require(backend):
+    if backend != "regex" and backend not in available_backends():
+        pytest.skip(f"解析后端 {backend} 未安装")
+
+
+def test_fixtures_cover_every_site():
+    sites = {filename.rsplit("_", 1)[0] for filename, _, _, _ in FIXTURES}
+    assert sites == {"renminwang", "xinhuawang", "english.news", "en.people"}
+    assert all("expected" in meta and "links" in meta for _, _, _, meta in FIXTURES)
+
+
+@pytest.mark.parametrize("filename,headers,content,meta", FIXTURES, ids=[f[0] for f in FIXTURES])
+def test_decoding_uses_declared_charset(filename, headers, content, meta):
+    _, source = page_encoding(headers, content)
+    assert source in ("header", "meta")
+    html = decode_html(headers, content)
+    assert "�" not in html
+    # 期望正文的标题出现在解码结果中（GB2312 页面按 GB18030 解码）
+    assert meta["expected"].split(" ", 1)[0] in html
+
+
+@pytest.mark.parametrize("backend", ARTICLE_BACKENDS)
+@pytest.mark.parametrize("filename,headers,content,meta", FIXTURES, ids=[f[0] for f in FIXTURES])
+def test_article_text_matches_expected(backend, filename, headers, content, meta):
+    require(backend)
+    html = decode_html(headers, content)
+    article = extract_article(html, meta["container"], backend)
+    assert normalized_article(article) == meta["expected"]
+    title, paragraphs, links = extract_page(html, meta["container"], backend)
+    assert normalized_article((title, paragraphs)) == meta["expected"]
+    assert links == meta["links"]
+    min_chars = 100 if filename.startswith(("renminwang", "xinhuawang")) else 300
+    assert looks_like_article(paragraphs, min_chars)
+
+
+@pytest.mark.parametrize("backend", LINK_BACKENDS)
+@pytest.mark.parametrize("filename,headers,content,meta", FIXTURES, ids=[f[0] for f in FIXTURES])
+def test_links_match_expected(backend, filename, headers, content, meta):
+    require(backend)
+    # 注释和 <script> 中的 <a href>、data-href 等都不算链接
+    assert extract_links(decode_html(headers, content), backend) == meta["links"]
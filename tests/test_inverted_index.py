@@ -0,0 +1,113 @@
+import os
+import re
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from corpus_cache import iter_texts
+from inverted_index import INDEX_VERSION, InvertedIndex, term_positions, varint_decode, varint_encode
+from tokenizer import TOKENIZERS
+
+CORPORA = ['en.people', 'renminwang']
+QUERIES = ["中国", "发展", "一带一路", "人民日报", "xi jinping", "jinping", "jinping's", "the",
+           "belt and road", "united states", "china's economy"]
+
+
+@pytest.fixture(scope="module")
+def corpus_index(tmp_path_factory):
+    folders = [os.path.join(ROOT, corpus) for corpus in CORPORA]
+    if not all(os.path.isdir(folder) for folder in folders):
+        pytest.skip("语料文件夹不存在")
+    index = InvertedIndex(str(tmp_path_factory.mktemp("index")))
+    index.update(folders)
+    texts = {corpus: [text for _, text, error in iter_texts(folder) if not error]
+             for corpus, folder in zip(CORPORA, folders)}
+    yield index, texts
+    index.close()
+
+
+def expected_count(texts, query):
+    """在原文上直接数短语：汉字用 str.count，英文单词之间只隔不换行的空白，前后不接字母（撇号后缀除外）"""
+    if re.search("[a-z]", query):
+        words = query.split()
+        pattern = re.compile(r"(?<![a-z])(?<![a-z]')" + r"[^\S\r\n]+".join(map(re.escape, words)) + "(?![a-z])")
+        return sum(len(pattern.findall(text.lower())) for text in texts)
+    return sum(text.count(query) for text in texts)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_query_counts_match_the_text(corpus_index, query):
+    index, texts = corpus_index
+    result = index.query(query)
+    for corpus in CORPORA:
+        assert result[corpus]['tf'] == expected_count(texts[corpus], query), corpus
+
+
+def test_phrases_do_not_cross_punctuation_or_lines():
+    terms, positions = term_positions("眼中，国内\n中国 Xi Jinping's visit, GDP增长")
+    assert terms == ['眼', '中', '国', '内', '中', '国', 'xi', "jinping's", 'visit', 'gdp', '增', '长']
+    steps = np.diff(positions).tolist()
+    # 中，国 与换行处隔开；汉字与英文之间的空格、英文单词之间的空格、英文紧接汉字不隔开
+    assert steps == [1, 2, 1, 2, 1, 1, 1, 1, 2, 1, 1]
+
+
+def test_terms_match_tokenizer(corpus_index):
+    _, texts = corpus_index
+    tokenize = TOKENIZERS['terms'][0]
+    for corpus in CORPORA:
+        for text in texts[corpus][:200]:
+            assert term_positions(text)[0] == tokenize(text)
+
+
+def test_incremental_update_matches_full_build(tmp_path):
+    folder = tmp_path / "site"
+    folder.mkdir()
+    for i in range(6):
+        (folder / f"site_{i}.txt").write_text(f"第{i}篇：中国经济。\nXi Jinping's talks, China's economy {i}\n",
+                                              encoding="utf-8")
+    index_dir = str(tmp_path / "index")
+    with InvertedIndex(index_dir) as index:
+        index.update([str(folder)])
+    os.remove(folder / "site_0.txt")
+    (folder / "site_1.txt").write_text("中国中国，中国\nxi jinping\n", encoding="utf-8")
+    (folder / "site_9.txt").write_text("新的一篇 中国 xi  jinping\n", encoding="utf-8")
+    with InvertedIndex(index_dir) as index:
+        result = index.update([str(folder)])
+        assert (result['added'], result['removed']) == (2, 2)
+        incremental = {q: index.query(q)['site'] for q in ("中国", "xi jinping", "economy", "国，中")}
+        index.compact()
+        compacted = {q: index.query(q)['site'] for q in incremental}
+    with InvertedIndex(str(tmp_path / "full")) as index:
+        index.update([str(folder)])
+        full = {q: index.query(q)['site'] for q in incremental}
+    assert incremental == compacted == full
+    assert full["中国"]['tf'] == 4 + 3 + 1 and full["xi jinping"]['tf'] == 4 + 1 + 1
+
+
+def test_stale_index_segments_are_removed(tmp_path):
+    folder = tmp_path / "site"
+    folder.mkdir()
+    (folder / "site_1.txt").write_text("中国\n", encoding="utf-8")
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    # 旧版本的索引：段文件不在新的段列表中，重建时应被删除
+    (index_dir / "meta.json").write_text(f'{{"version": {INDEX_VERSION - 1}}}', encoding="utf-8")
+    for name in ("seg_0.lex", "seg_0.post", "seg_7.lex", "seg_7.post"):
+        (index_dir / name).write_bytes(b"stale")
+    with InvertedIndex(str(index_dir)) as index:
+        index.update([str(folder)])
+        assert index.query("中国")['site']['tf'] == 1
+        segments = index.segments
+    files = sorted(name for name in os.listdir(index_dir) if name.startswith("seg_"))
+    assert files == sorted(name + ext for name in segments for ext in (".lex", ".post"))
+
+
+def test_varint_round_trip():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([[0, 1, 127, 128, 16383, 16384, 2 ** 32, 2 ** 63 - 1],
+                             rng.integers(0, 2 ** 40, 1000), rng.integers(0, 300, 1000)])
+    data = varint_encode(values)
+    assert len(varint_encode([127])) == 1 and len(varint_encode([128])) == 2
+    assert varint_decode(data).tolist() == values.tolist()
+    assert varint_decode(varint_encode([])).size == 0
@@ -0,0 +1,109 @@
+import math
+import os
+import re
+
+import numpy as np
+import pytest
+
+import segmenter
+from conftest import ROOT
+from corpus_cache import iter_texts
+from script_classes import regex_class
+
+HAN_RUN = re.compile(f"[{regex_class('han')}]+")
+
+
+def make_segmenter(words, unknown_logp=-20.0):
+    """由 {词: 概率} 直接建立分词器（单字也要列出），各层的键与 build_segmenter 的约定相同"""
+    char_codes = np.array(sorted({ord(c) for word in words for c in word}), dtype=np.int64)
+    char_id = {chr(c): i for i, c in enumerate(char_codes.tolist())}
+    max_len = max(len(word) for word in words)
+    # 每层：前缀 -> 对数概率（只是前缀、本身不是词时为 -inf）
+    levels = [{} for _ in range(max_len)]
+    for word, p in words.items():
+        for k in range(1, len(word)):
+            levels[k - 1].setdefault(word[:k], -np.inf)
+        levels[len(word) - 1][word] = math.log(p)
+    keys, logp, node_of = [], [], {}
+    for k, level in enumerate(levels):
+        if k == 0:
+            level_keys = {word: char_id[word] for word in level}
+        else:
+            level_keys = {word: node_of[word[:-1]] * len(char_codes) + char_id[word[-1]] for word in level}
+        ordered = sorted(level, key=level_keys.get)
+        node_of.update({word: i for i, word in enumerate(ordered)})
+        keys.append(np.array([level_keys[word] for word in ordered], dtype=np.int64))
+        logp.append(np.array([level[word] for word in ordered]))
+    return segmenter.Segmenter(char_codes, keys, logp, unknown_logp)
+
+
+DICTIONARY = {
+    '中': 0.01, '国': 0.01, '人': 0.01, '民': 0.005, '银': 0.001, '行': 0.01, '发': 0.01, '展': 0.002,
+    '中国': 0.02, '人民': 0.02, '中国人': 0.001, '银行': 0.005, '发展': 0.01, '人民银行': 0.002,
+}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("中国人民", ['中国', '人民']),
+    ("中国人民银行", ['中国', '人民银行']),
+    ("中国人", ['中国人']),
+    # 标点和英文把汉字串隔开，切分不跨过它们
+    ("发展，中国 and 人民", ['发展', '中国', '人民']),
+    # 词典外的字按未登录字单独成词
+    ("中国好", ['中国', '好']),
+    ("", []),
+    ("no chinese here", []),
+])
+def test_known_segmentation(text, expected):
+    assert make_segmenter(DICTIONARY).segment(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [("中", ['中']), ("好", ['好']), ("a 中 b", ['中']), ("no chinese", [])])
+def test_texts_shorter_than_the_trie_depth(text, expected):
+    # 码点数组比前缀树的层数还短时也能切分（单字文档在逐文档分词时很常见）
+    assert make_segmenter(DICTIONARY).segment(text) == expected
+    seg = segmenter.build_segmenter([text], min_count=1)
+    assert seg.segment(text) == expected and seg.segment_texts([text, ""]) == [expected, []]
+
+
+def test_max_probability_path_beats_longest_match():
+    # 最长匹配会切出 中国人 + 民；两个双字词的概率乘积更大
+    seg = make_segmenter(dict(DICTIONARY, 中国人=0.0001))
+    assert seg.segment("中国人民") == ['中国', '人民']
+    assert make_segmenter(dict(DICTIONARY, 中国人=0.5)).segment("中国人民") == ['中国人', '民']
+
+
+@pytest.fixture(scope="module")
+def trained():
+    folder = os.path.join(ROOT, 'renminwang')
+    if not os.path.isdir(folder):
+        pytest.skip("语料文件夹不存在")
+    texts = [text for _, text, error in iter_texts(folder) if not error]
+    return segmenter.build_segmenter(texts[:300]), texts[300:500]
+
+
+def test_segmentation_round_trips_to_the_chinese_text(trained):
+    seg, texts = trained
+    batch = seg.segment_texts(texts)
+    for text, words in zip(texts, batch):
+        assert "".join(words) == "".join(HAN_RUN.findall(text))
+        assert all(words) and all(len(word) <= segmenter.MAX_WORD_LEN for word in words)
+        # 批量切分与逐个文档切分相同
+        assert seg.segment(text) == words
+
+
+def test_trained_dictionary_finds_common_words(trained):
+    seg, _ = trained
+    words = seg.segment("中国人民银行发布了新的政策，习近平总书记强调发展。")
+    for word in ('银行', '发布', '政策', '习近平', '总书记', '强调', '发展'):
+        assert word in words
+
+
+def test_saved_dictionary_segments_the_same(trained, tmp_path):
+    seg, texts = trained
+    path = str(tmp_path / "zh_dict.pkl")
+    segmenter.save_segmenter(seg, path)
+    loaded = segmenter.load_segmenter(path)
+    assert loaded.words() == seg.words()
+    assert loaded.segment_texts(texts[:50]) == seg.segment_texts(texts[:50])
+    assert segmenter.load_segmenter(str(tmp_path / "missing.pkl")) is None
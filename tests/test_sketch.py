@@ -0,0 +1,107 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from entropy_estimators import plugin_entropy
+from sketch import EntropySketch, HyperLogLog, SketchStats, sketch_prefix_entropies
+from topk import CountMinTopK, CountSketchTopK
+
+VOCAB = [f"w{i}" for i in range(5000)]
+
+
+def zipf_tokens(n, seed=0, k=len(VOCAB)):
+    p = 1 / np.arange(1, k + 1)
+    ids = np.random.default_rng(seed).choice(k, size=n, p=p / p.sum())
+    return [VOCAB[i] for i in ids.tolist()]
+
+
+@pytest.mark.parametrize("n", [100, 5000, 100000])
+def test_hyperloglog_within_its_standard_error(n):
+    hll = HyperLogLog()
+    tokens = [f"t{i}" for i in range(n)]
+    for start in range(0, n, 1000):
+        hll.update(tokens[start:start + 1000] * 2)
+    # p = 14：标准误差 1.04 / √16384 ≈ 0.8%，取三倍
+    assert hll.estimate() == pytest.approx(n, rel=3 * 1.04 / math.sqrt(1 << 14))
+
+
+def test_hyperloglog_merge_equals_union():
+    a, b, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a.update([f"t{i}" for i in range(0, 6000)])
+    b.update([f"t{i}" for i in range(4000, 10000)])
+    both.update([f"t{i}" for i in range(10000)])
+    assert np.array_equal((a + b).registers, both.registers)
+    with pytest.raises(ValueError):
+        a + HyperLogLog(p=10)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_entropy_sketch_within_its_expected_error(seed):
+    tokens = zipf_tokens(100000, seed)
+    sketch = EntropySketch(k=512, seed=seed)
+    sketch.update(tokens)
+    exact = plugin_entropy(np.array(list(Counter(tokens).values())))
+    # k = 512 时估计的标准差约 0.07 比特，取约四倍
+    assert sketch.entropy() == pytest.approx(exact, abs=0.3)
+
+
+def test_entropy_sketch_is_linear():
+    tokens = zipf_tokens(30000, 1)
+    whole = EntropySketch(k=128)
+    whole.update(tokens)
+    first, second = EntropySketch(k=128, buffer_size=100), EntropySketch(k=128)
+    first.update(tokens[:10000])
+    second.update(tokens[10000:])
+    merged = first + second
+    # entropy() 先把缓冲中的计数投影进 y
+    assert merged.entropy() == pytest.approx(whole.entropy(), abs=1e-9)
+    np.testing.assert_allclose(merged.y, whole.y, rtol=1e-9)
+
+
+def test_prefix_sketches_cut_files_at_the_scales():
+    files = [zipf_tokens(3000, seed) for seed in range(5)]
+    scales, entropies = sketch_prefix_entropies(files, [2000, 7000, 15000, 50000], k=64)
+    assert scales == [2000, 7000, 15000]
+    joined = [t for tokens in files for t in tokens]
+    for scale, h in zip(scales, entropies):
+        sketch = EntropySketch(k=64)
+        sketch.update(joined[:scale])
+        assert h == pytest.approx(sketch.entropy(), abs=1e-9)
+
+
+@pytest.mark.parametrize("counter", [CountMinTopK, CountSketchTopK])
+def test_counting_sketches_within_their_error_bounds(counter):
+    tokens = zipf_tokens(200000, 3)
+    exact = Counter(tokens)
+    topk = counter(capacity=100)
+    for start in range(0, len(tokens), 10000):
+        topk.update(tokens[start:start + 10000])
+    n = len(tokens)
+    if counter is CountMinTopK:
+        # 只会高估，误差不超过 e / 宽度 · N（失败概率 e^-深度）
+        bound = math.e / topk.width * n
+        for token in VOCAB[:200]:
+            assert exact[token] <= topk.estimate(token) <= exact[token] + bound
+    else:
+        # 误差约为 ‖f‖₂ / √宽度，取三倍
+        bound = 3 * math.sqrt(sum(c * c for c in exact.values()) / topk.width)
+        for token in VOCAB[:200]:
+            assert abs(topk.estimate(token) - exact[token]) <= bound
+    assert [t for t, _ in topk.most_common(10)] == [t for t, _ in exact.most_common(10)]
+
+
+def test_sketch_stats_merge_matches_one_pass():
+    a, b = zipf_tokens(20000, 4), zipf_tokens(20000, 5)
+    merged = SketchStats(k=64)
+    merged.update(a)
+    other = SketchStats(k=64)
+    other.update(b)
+    merged = merged + other
+    single = SketchStats(k=64)
+    single.update(a + b)
+    assert merged.total == single.total == 40000
+    assert merged.vocab_size() == single.vocab_size()
+    assert merged.entropy() == pytest.approx(single.entropy(), abs=1e-9)
+    assert merged.most_common(5) == single.most_common(5)
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import corpus_cache
+from script_classes import HAN_BLOCKS, parse_han_blocks
+from tokenizer import REFERENCE_TOKENIZERS, SCAN_VARIANTS, TOKENIZERS, count_tokens, pack, scan, tokenize_packed
+
+TEXTS = [
+    "",
+    "中国经济稳步增长，GDP增长5.2%。\r\n",
+    "Xi Jinping's visit; don't rock'n'roll — O'Neil 〇二四年 𠀀𠀁 ĸ",
+    "İstanbul and the Kelvin scale 温度",
+    "plain english words only\nsecond line",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_scan_matches_reference_tokenizers(text):
+    packed = scan(text, SCAN_VARIANTS)
+    for variant, single_char in SCAN_VARIANTS.items():
+        assert packed[variant] == pack(REFERENCE_TOKENIZERS[variant](text), single_char), variant
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_count_tokens_matches_scan(text):
+    packed = scan(text, ('cjk_chars', 'letters', 'words'))
+    words = packed['words']
+    assert count_tokens(text) == (len(packed['cjk_chars']), len(packed['letters']),
+                                  words.count("\n") + 1 if words else 0)
+
+
+def test_chinese_chars_is_an_alias_sharing_one_cache(tmp_path, monkeypatch):
+    assert TOKENIZERS['chinese_chars'] is TOKENIZERS['cjk_chars']
+    assert tokenize_packed(TEXTS[1], ['chinese_chars'])['chinese_chars'] == "中国经济稳步增长增长"
+    folder = tmp_path / "site"
+    folder.mkdir()
+    (folder / "site_1.txt").write_text(TEXTS[1], encoding="utf-8")
+    monkeypatch.setattr(corpus_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    loaded = corpus_cache.load_variants(str(folder), ['chinese_chars', 'cjk_chars'])
+    assert loaded['chinese_chars'] is loaded['cjk_chars'] and len(loaded['cjk_chars']) == 10
+    cache_files = os.listdir(tmp_path / "cache")
+    assert len(cache_files) == 1 and cache_files[0].endswith("_cjk_chars.pkl")
+
+
+def test_unknown_han_block_names_are_rejected():
+    assert parse_han_blocks("unified, ext_a,") == ['unified', 'ext_a']
+    with pytest.raises(ValueError, match="ext_z") as info:
+        parse_han_blocks("unified,ext_z")
+    assert all(name in str(info.value) for name in HAN_BLOCKS)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from zipf_fit import fit_log_binned, fit_zipf_mandelbrot, fit_zipf_mle, rank_frequencies, zipf_summary
+
+
+def zipf_counts(s, vocab=20000, tokens=2_000_000, q=0.0, seed=0):
+    p = (np.arange(1, vocab + 1) + q) ** -s
+    return np.random.default_rng(seed).multinomial(tokens, p / p.sum())
+
+
+def test_mle_recovers_exponent():
+    freqs = rank_frequencies(zipf_counts(1.1))
+    s, stderr = fit_zipf_mle(freqs)
+    assert abs(s - 1.1) < 0.01
+    assert 0 < stderr < 0.01
+    # 起点不影响收敛结果
+    assert abs(fit_zipf_mle(freqs, s0=2.0)[0] - s) < 1e-8
+
+
+def test_mandelbrot_recovers_shift_and_binned_slope_is_close():
+    freqs = rank_frequencies(zipf_counts(1.2, q=5.0))
+    s, q = fit_zipf_mandelbrot(freqs)
+    assert abs(s - 1.2) < 0.05
+    assert 3.0 < q < 8.0
+    slope, _ = fit_log_binned(rank_frequencies(zipf_counts(1.1)))
+    assert abs(slope + 1.1) < 0.1
+
+
+def test_bootstrap_is_opt_in():
+    counts = zipf_counts(1.0, vocab=5000, tokens=200_000)
+    summary = zipf_summary(counts)
+    assert 'mle_ci' not in summary
+    assert summary['vocab_size'] == np.count_nonzero(counts)
+    low, high = zipf_summary(counts, n_boot=30)['mle_ci']
+    assert low < summary['mle_s'] < high
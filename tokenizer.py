@@ -0,0 +1,211 @@
+import re
+import sys
+import time
+from script_classes import regex_class
+
+# 共用的分词：一次扫描文本同时得到所有请求的分词方式。
+# 一个预编译的正则一次 findall 找出所有连续汉字串和英文单词，按首字符分为两类，
+# 各分词方式再由这两个（比原文短得多的）结果派生：
+#   cjk_chars     汉字串直接连接（原 cal_ch.py 的 chinese_chars 只统计 \u4e00-\u9fa5，现在各脚本的汉字一致，
+#                 chinese_chars 只作为 cjk_chars 的别名保留，见 VARIANT_ALIASES）
+#   words         单词以换行连接
+#   lower_words   对连接后的单词串整体转小写（不再复制、转换整篇文本）
+#   letters       单词串去掉换行和撇号后转小写（英文字母都落在某个单词里）
+#   terms         按原顺序汉字逐个、单词转小写
+# 结果直接是 corpus_cache 缓存用的压缩格式：单字符符号直接连接，其他符号以换行分隔。
+# 汉字与英文字母的范围来自 script_classes.py 的文字类别表。
+
+_HAN = regex_class('han')
+_LATIN = regex_class('latin')
+_SCAN_RE = re.compile(f"[{_HAN}]+|[{_LATIN}]+(?:'[{_LATIN}]+)?")
+# 与 _SCAN_RE 匹配相同，分组标出汉字串（组 1）和单词内的撇号（组 2），供 count_tokens() 只计数用
+_COUNT_RE = re.compile(f"([{_HAN}]+)|[{_LATIN}]+(?:(')[{_LATIN}]+)?")
+# 转小写后会变成 ASCII 字母的非 ASCII 字符（U+0130 İ、U+212A 开尔文符号）：文本含有它们时，
+# lower_words 和 terms 按原来的方式在整篇转小写的文本上提取，保证结果不变
+_LOWER_SPECIAL = ('\u0130', '\u212a')
+
+# 原脚本中的提取方式（每种分词方式单独扫描一遍，字符范围同样来自文字类别表），
+# 用于 benchmark() 对比和校验
+_HAN_RE = re.compile(f"[{_HAN}]")
+_LETTER_RE = re.compile(f"[{_LATIN}]")
+_WORD_RE = re.compile(f"[{_LATIN}]+(?:'[{_LATIN}]+)?")
+_TERM_RE = re.compile(f"[{_HAN}]|[a-z]+(?:'[a-z]+)?")
+
+REFERENCE_TOKENIZERS = {
+    # cal_ch.py / ch_top10.py / cal_scale.py
+    'cjk_chars': _HAN_RE.findall,
+    # cal_en_letters.py：英文字母，逐个转为小写
+    'letters': lambda text: [c.lower() for c in _LETTER_RE.findall(text)],
+    # cal_en_words.py / cal_scale.py：保留大小写的英文单词
+    'words': _WORD_RE.findall,
+    # en_top10.py / zipf.py：先整体转小写再提取单词
+    'lower_words': lambda text: _WORD_RE.findall(text.lower()),
+    # inverted_index.py：汉字逐字、英文单词转小写
+    'terms': lambda text: _TERM_RE.findall(text.lower()),
+}
+
+# 可以由 scan() 一次扫描得到的分词方式，及其是否为单字符符号
+SCAN_VARIANTS = {
+    'cjk_chars': True,
+    'letters': True,
+    'words': False,
+    'lower_words': False,
+    'terms': False,
+}
+# 分词方式的别名 -> 实际的分词方式：结果完全相同，只计算、缓存一份
+VARIANT_ALIASES = {'chinese_chars': 'cjk_chars'}
+
+
+def canonical_variant(variant):
+    """别名对应的实际分词方式（不是别名时原样返回）"""
+    return VARIANT_ALIASES.get(variant, variant)
+
+
+def pack(tokens, single_char):
+    """把符号列表压成一个字符串存储，加载时比逐个反序列化快得多"""
+    return "".join(tokens) if single_char else "\n".join(tokens)
+
+
+def unpack(packed, single_char):
+    if single_char:
+        return list(packed)
+    return packed.split("\n") if packed else []
+
+
+def scan(text, variants):
+    """一次扫描得到 SCAN_VARIANTS 中各分词方式的压缩符号串：{分词方式: 压缩后的符号串}
+
+    结果与 REFERENCE_TOKENIZERS 逐个提取后 pack() 的结果完全相同。
+    """
+    matches = _SCAN_RE.findall(text)
+    result = {}
+    if 'cjk_chars' in variants:
+        # 匹配以汉字开头即为汉字串（字符串比较只需看首字符）
+        result['cjk_chars'] = "".join([m for m in matches if m >= "\x80"])
+    if 'words' in variants or 'lower_words' in variants or 'letters' in variants:
+        words = "\n".join([m for m in matches if m < "\x80"])
+        if 'words' in variants:
+            result['words'] = words
+        if 'lower_words' in variants:
+            result['lower_words'] = words.lower()
+        if 'letters' in variants:
+            result['letters'] = words.replace("\n", "").replace("'", "").lower()
+    if 'terms' in variants:
+        result['terms'] = "\n".join([m if m < "\x80" else "\n".join(m) for m in matches]).lower()
+    if ('lower_words' in variants or 'terms' in variants) and any(c in text for c in _LOWER_SPECIAL):
+        lowered = text.lower()
+        if 'lower_words' in variants:
+            result['lower_words'] = "\n".join(_WORD_RE.findall(lowered))
+        if 'terms' in variants:
+            result['terms'] = "\n".join(_TERM_RE.findall(lowered))
+    return result
+
+
+def count_tokens(text):
+    """只计数、不构造符号：返回 (汉字数, 英文字母数, 英文单词数)
+
+    逐个匹配累加（finditer），除当前匹配外不占额外内存，结果与 scan() 得到的
+    'cjk_chars' 长度、'letters' 长度、'words' 个数相同。
+    """
+    chinese_chars = english_letters = english_words = 0
+    for m in _COUNT_RE.finditer(text):
+        length = m.end() - m.start()
+        if m.lastindex == 1:
+            chinese_chars += length
+        else:
+            english_words += 1
+            english_letters += length - 1 if m.lastindex == 2 else length
+    return chinese_chars, english_letters, english_words
+
+
+def line_count(text):
+    return text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+
+
+def _segment_words(text):
+    # 延迟导入：只有用到 'zh_words' 时才加载（或建立）分词词典
+    import segmenter
+    return segmenter.segment(text)
+
+
+def _segment_batch(texts):
+    import segmenter
+    return segmenter.segment_texts(texts)
+
+
+def _prepare_segmenter():
+    import segmenter
+    segmenter.get_segmenter()
+
+
+# 分词函数可以带两个可选属性：batch(texts) 一次切分一批文档（比逐个调用快），
+# prepare() 在启动工作进程之前于主进程调用（工作进程直接继承已加载的词典）
+_segment_words.batch = _segment_batch
+_segment_words.prepare = _prepare_segmenter
+
+
+def _scanned(variant):
+    single_char = SCAN_VARIANTS[variant]
+
+    def tokenize(text):
+        return unpack(scan(text, (variant,))[variant], single_char)
+    return tokenize
+
+
+# 分词方式：名称 -> (分词函数, 是否为单字符符号)
+# 需要多种分词方式时用 tokenize_packed() 一次得到，不要逐个调用这里的函数
+TOKENIZERS = {variant: (_scanned(variant), single_char) for variant, single_char in SCAN_VARIANTS.items()}
+TOKENIZERS.update({alias: TOKENIZERS[variant] for alias, variant in VARIANT_ALIASES.items()})
+# cal_ch_words.py：汉字串按 segmenter.py 的语料词典切分成词（批量切分见 _segment_words.batch）
+TOKENIZERS['zh_words'] = (_segment_words, False)
+# 不是分词：每个文档的 [字节数, 行数]（与 cal_scale.py 的统计方式一致），
+# 借用同一套缓存，使规模统计也能与分词在同一次读取中完成
+TOKENIZERS['doc_stats'] = (lambda text: [str(len(text.encode("utf-8"))), str(line_count(text))], False)
+
+
+def tokenize_packed(text, variants):
+    """一个文档在各分词方式下的压缩符号串 {分词方式: 压缩后的符号串}
+
+    SCAN_VARIANTS 中的分词方式共用一次扫描，其余的分别调用 TOKENIZERS 中的函数；别名与其实际的分词方式共用结果。
+    """
+    result = scan(text, [canonical_variant(variant) for variant in variants
+                         if canonical_variant(variant) in SCAN_VARIANTS])
+    for variant in variants:
+        if variant not in result:
+            if canonical_variant(variant) in result:
+                result[variant] = result[canonical_variant(variant)]
+                continue
+            tokenize, single_char = TOKENIZERS[variant]
+            result[variant] = pack(tokenize(text), single_char)
+    return result
+
+
+def benchmark(folders=('en.people', 'english.news', 'renminwang', 'xinhuawang'),
+              variants=('cjk_chars', 'letters', 'words', 'lower_words')):
+    """对比原脚本的逐个分词方式提取与一次扫描的吞吐（MB/s，按 UTF-8 原文计），并校验结果一致"""
+    import corpus_cache
+    texts = [text for folder in folders for _, text, error in corpus_cache.iter_texts(folder) if not error]
+    mb = sum(len(t.encode("utf-8")) for t in texts) / (1 << 20)
+    print(f"{len(texts)} 个文档，{mb:.1f} MB，分词方式：{', '.join(variants)}")
+    timings = {}
+    start = time.perf_counter()
+    reference = [{variant: pack(REFERENCE_TOKENIZERS[variant](text), SCAN_VARIANTS[variant])
+                  for variant in variants} for text in texts]
+    timings['逐个分词方式提取'] = time.perf_counter() - start
+    for variant in variants:
+        start = time.perf_counter()
+        for text in texts:
+            REFERENCE_TOKENIZERS[variant](text)
+        timings[f'  其中 {variant}'] = time.perf_counter() - start
+    start = time.perf_counter()
+    scanned = [scan(text, variants) for text in texts]
+    timings['一次扫描'] = time.perf_counter() - start
+    for name, seconds in timings.items():
+        print(f"{name:<24} {seconds:7.3f} 秒  {mb / seconds:7.1f} MB/s")
+    mismatches = sum(1 for a, b in zip(reference, scanned) if a != b)
+    print("结果与逐个提取完全一致" if not mismatches else f"⚠️ {mismatches} 个文档的结果不一致")
+
+
+if __name__ == "__main__":
+    # 用法：python tokenizer.py [文件夹 ...]   测量分词吞吐并校验一次扫描的结果
+    benchmark(*([sys.argv[1:]] if len(sys.argv) > 1 else []))
@@ -0,0 +1,223 @@
+import heapq
+import zlib
+from collections import Counter
+import numpy as np
+from corpus_cache import iter_file_tokens
+from profiling import profiler
+
+# stream_counts 支持的近似统计方式
+APPROXIMATE_METHODS = ['space_saving', 'count_min', 'count_sketch']
+
+
+def stream_counts(folder_path, variant, approximate=None, capacity=1000):
+    """逐个文件读取并累加计数，不保留原始符号序列，内存只与词表（或 capacity）有关
+
+    approximate 为 None 时精确计数（返回 Counter）；
+    为 'space_saving'、'count_min' 或 'count_sketch' 时使用近似的高频项统计，只保留 capacity 个候选。
+    """
+    if approximate is None:
+        counts = Counter()
+    elif approximate == 'space_saving':
+        counts = SpaceSaving(capacity)
+    elif approximate == 'count_min':
+        counts = CountMinTopK(capacity)
+    elif approximate == 'count_sketch':
+        counts = CountSketchTopK(capacity)
+    else:
+        raise ValueError(f"未知的近似统计方式: {approximate}")
+    with profiler.stage("stream_count") as record:
+        for _, tokens in iter_file_tokens(folder_path, variant):
+            counts.update(tokens)
+            record['items'] += len(tokens)
+    return counts
+
+
+class _LazyMinHeap:
+    """维护 {符号: 计数} 中计数最小的项；计数变化时只压入新记录，弹出时丢弃过期记录"""
+
+    def __init__(self):
+        self._heap = []
+
+    def push(self, token, count):
+        heapq.heappush(self._heap, (count, token))
+
+    def pop_min(self, counts):
+        while True:
+            count, token = heapq.heappop(self._heap)
+            if counts.get(token) == count:
+                return token, count
+
+    def peek_min(self, counts):
+        while self._heap:
+            count, token = self._heap[0]
+            if counts.get(token) == count:
+                return count
+            heapq.heappop(self._heap)
+        return 0
+
+    def compact(self, counts):
+        """过期记录过多时按当前计数重建"""
+        if len(self._heap) > 4 * len(counts) + 64:
+            self._heap = [(c, t) for t, c in counts.items()]
+            heapq.heapify(self._heap)
+
+
+class SpaceSaving:
+    """Space-Saving 近似高频项统计：最多保留 capacity 个计数器
+
+    频次超过 N / capacity 的符号一定会被保留；每个计数的高估量不超过 errors 中记录的值。
+    两个统计结果可以用 + 合并，因此各语料可分别统计后再汇总。
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = _LazyMinHeap()
+
+    def update(self, tokens):
+        """加入一段符号序列（先在本段内精确计数，再按权重更新）"""
+        for token, k in Counter(tokens).items():
+            self.add(token, k)
+
+    def add(self, token, k=1):
+        counts = self.counts
+        self.total += k
+        if token in counts:
+            counts[token] += k
+        elif len(counts) < self.capacity:
+            counts[token] = k
+            self.errors[token] = 0
+        else:
+            # 替换当前计数最小的符号，新符号继承其计数作为误差上界
+            evicted, min_count = self._heap.pop_min(counts)
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[token] = min_count + k
+            self.errors[token] = min_count
+        self._heap.push(token, counts[token])
+        self._heap.compact(counts)
+
+    def min_count(self):
+        """未被保留的符号频次上界（计数器未满时为 0）"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return self._heap.peek_min(self.counts)
+
+    def __add__(self, other):
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        self_min, other_min = self.min_count(), other.min_count()
+        combined = {}
+        for token in list(self.counts) + [t for t in other.counts if t not in self.counts]:
+            # 某一侧没有保留该符号时，按该侧的最小计数估计（保证仍是上界）
+            count = self.counts.get(token, self_min) + other.counts.get(token, other_min)
+            error = (self.errors.get(token, self_min) + other.errors.get(token, other_min))
+            combined[token] = (count, error)
+        kept = sorted(combined.items(), key=lambda item: -item[1][0])[:merged.capacity]
+        for token, (count, error) in kept:
+            merged.counts[token] = count
+            merged.errors[token] = error
+            merged._heap.push(token, count)
+        merged.total = self.total + other.total
+        return merged
+
+    def most_common(self, n=None):
+        items = sorted(self.counts.items(), key=lambda item: -item[1])
+        return items if n is None else items[:n]
+
+
+class CountMinTopK:
+    """Count-Min Sketch 加候选堆的近似高频项统计
+
+    Sketch 的估计值只会高估；候选集合保留估计值最大的 capacity 个符号。
+    哈希使用带种子的 crc32，结果与进程无关，不同语料的 sketch 可以直接相加合并。
+    """
+
+    def __init__(self, capacity=1000, width=1 << 16, depth=4):
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.candidates = {}
+        self.total = 0
+        self._heap = _LazyMinHeap()
+
+    def _columns(self, token):
+        data = token.encode('utf-8')
+        return [zlib.crc32(data, seed) % self.width for seed in range(1, self.depth + 1)]
+
+    def _signs(self, tokens):
+        """各行写入 sketch 时乘的符号；Count-Min 不使用符号（返回 None）"""
+        return None
+
+    def _combine(self, cells, signs):
+        """由各行对应格子的值得到估计：Count-Min 取最小值"""
+        return cells.min(axis=0)
+
+    def estimate(self, token):
+        """返回符号频次的估计值（Count-Min 不小于真实值）"""
+        cols = np.array(self._columns(token), dtype=np.int64)[:, None]
+        cells = self.table[np.arange(self.depth)[:, None], cols]
+        return int(self._combine(cells, self._signs([token]))[0])
+
+    def update(self, tokens):
+        """加入一段符号序列（先在本段内精确计数，再对整批符号向量化更新 sketch）"""
+        batch = Counter(tokens)
+        if not batch:
+            return
+        keys = list(batch)
+        weights = np.fromiter(batch.values(), dtype=np.int64, count=len(keys))
+        cols = np.array([self._columns(token) for token in keys], dtype=np.int64).T
+        rows = np.arange(self.depth)[:, None]
+        signs = self._signs(keys)
+        # 同一批内不同符号可能落在同一格，用 add.at 保证逐个累加
+        np.add.at(self.table, (rows, cols), weights if signs is None else signs * weights)
+        self.total += int(weights.sum())
+        estimates = self._combine(self.table[rows, cols], signs)
+        for token, estimate in zip(keys, estimates.tolist()):
+            self._offer(token, estimate)
+
+    def _offer(self, token, estimate):
+        candidates = self.candidates
+        if token in candidates or len(candidates) < self.capacity:
+            candidates[token] = estimate
+            self._heap.push(token, estimate)
+        elif estimate > self._heap.peek_min(candidates):
+            evicted, _ = self._heap.pop_min(candidates)
+            del candidates[evicted]
+            candidates[token] = estimate
+            self._heap.push(token, estimate)
+        self._heap.compact(candidates)
+
+    def __add__(self, other):
+        if type(self) is not type(other) or (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("只能合并类型和尺寸都相同的 sketch")
+        merged = type(self)(max(self.capacity, other.capacity), self.width, self.depth)
+        merged.table = self.table + other.table
+        merged.total = self.total + other.total
+        # 候选取两侧并集，用合并后的 sketch 重新估计
+        for token in list(self.candidates) + [t for t in other.candidates if t not in self.candidates]:
+            merged._offer(token, merged.estimate(token))
+        return merged
+
+    def most_common(self, n=None):
+        items = sorted(self.candidates.items(), key=lambda item: -item[1])
+        return items if n is None else items[:n]
+
+
+class CountSketchTopK(CountMinTopK):
+    """Count-Sketch 加候选堆的近似高频项统计
+
+    每行按符号哈希决定 ±1 的符号再累加，估计取各行的中位数：结果无偏（可能偏高也可能偏低），
+    低频符号的碰撞相互抵消，比 Count-Min 更适合长尾分布。合并方式与 CountMinTopK 相同。
+    """
+
+    def _signs(self, tokens):
+        seeds = range(self.depth + 1, 2 * self.depth + 1)
+        bits = np.array([[zlib.crc32(token.encode('utf-8'), seed) & 1 for seed in seeds]
+                         for token in tokens], dtype=np.int64).T
+        return 2 * bits - 1
+
+    def _combine(self, cells, signs):
+        return np.maximum(np.median(cells * signs, axis=0), 0).astype(np.int64)
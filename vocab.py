@@ -0,0 +1,140 @@
+from collections import Counter
+import numpy as np
+from profiling import profiler
+
+
+class Vocabulary:
+    """符号表：符号与整数编号之间的双向映射，编号按首次出现的顺序分配"""
+
+    def __init__(self):
+        self.token_to_id = {}
+        self.id_to_token = []
+
+    def __len__(self):
+        return len(self.id_to_token)
+
+    def add(self, token):
+        """返回符号的编号，未出现过的符号分配新编号"""
+        token_id = self.token_to_id.get(token)
+        if token_id is None:
+            token_id = len(self.id_to_token)
+            self.token_to_id[token] = token_id
+            self.id_to_token.append(token)
+        return token_id
+
+    def copy(self):
+        """返回独立的副本，之后在副本中新增符号不影响原符号表"""
+        vocab = Vocabulary()
+        vocab.token_to_id = dict(self.token_to_id)
+        vocab.id_to_token = list(self.id_to_token)
+        return vocab
+
+    def encode(self, tokens):
+        """把符号序列编码为紧凑的整数数组"""
+        table = self.token_to_id
+        id_to_token = self.id_to_token
+        ids = []
+        for token in tokens:
+            token_id = table.get(token)
+            if token_id is None:
+                token_id = len(id_to_token)
+                table[token] = token_id
+                id_to_token.append(token)
+            ids.append(token_id)
+        return np.array(ids, dtype=_id_dtype(len(id_to_token)))
+
+    def encode_chars(self, text):
+        """把单字符组成的字符串整体编码，按码点向量化处理，不产生逐字符的 str 对象"""
+        codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        if codepoints.size == 0:
+            return np.zeros(0, dtype=_id_dtype(len(self)))
+        uniques, first_index, inverse = np.unique(
+            codepoints, return_index=True, return_inverse=True)
+        # 按首次出现的顺序登记新字符，使编号顺序与逐个 add 一致
+        table = np.empty(len(uniques), dtype=np.int64)
+        for i in np.argsort(first_index, kind="stable"):
+            table[i] = self.add(chr(uniques[i]))
+        return table[inverse].astype(_id_dtype(len(self)))
+
+    def decode(self, ids):
+        """把编号数组还原为符号列表"""
+        id_to_token = self.id_to_token
+        return [id_to_token[i] for i in ids.tolist()]
+
+
+def _id_dtype(vocab_size):
+    """根据符号表大小选择最省内存的整数类型"""
+    if vocab_size <= 1 << 8:
+        return np.uint8
+    if vocab_size <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+class CountVector:
+    """只保存每个编号出现次数的语料汇总（不保留符号顺序），提供与 Counter 相同格式的 Top-K"""
+
+    def __init__(self, counts, vocab):
+        self._counts = counts
+        self.vocab = vocab
+
+    def __len__(self):
+        return int(self._counts.sum())
+
+    def counts(self):
+        """返回每个编号的出现次数（长度等于符号表大小）"""
+        if len(self._counts) < len(self.vocab):
+            self._counts = np.concatenate(
+                [self._counts, np.zeros(len(self.vocab) - len(self._counts), dtype=self._counts.dtype)])
+        return self._counts
+
+    def most_common(self, n=None):
+        """与 Counter.most_common 相同的输出格式，次数相同时按编号（首次出现顺序）排列"""
+        counts = self.counts()
+        present = np.flatnonzero(counts)
+        order = present[np.argsort(-counts[present], kind="stable")]
+        if n is not None:
+            order = order[:n]
+        id_to_token = self.vocab.id_to_token
+        return [(id_to_token[i], int(counts[i])) for i in order]
+
+    def to_counter(self):
+        """转换为 Counter（按首次出现的顺序插入，与直接对符号序列计数的结果一致）"""
+        counts = self.counts()
+        id_to_token = self.vocab.id_to_token
+        return Counter({id_to_token[i]: int(counts[i]) for i in np.flatnonzero(counts)})
+
+
+class EncodedCorpus(CountVector):
+    """以整数编号数组表示的语料，计数、Top-K 与熵均基于 bincount 向量化完成"""
+
+    def __init__(self, ids, vocab):
+        self.ids = ids
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __add__(self, other):
+        """拼接两份语料；若符号表不同，则在本语料符号表的副本上合并两者，并把 other 重新映射过去
+        （两个操作数及与它们共用符号表的对象都不会被修改）"""
+        if other.vocab is not self.vocab:
+            vocab = self.vocab.copy()
+            remap = np.array([vocab.add(t) for t in other.vocab.id_to_token],
+                             dtype=np.int64)
+            other_ids = remap[other.ids] if len(remap) else other.ids
+        else:
+            vocab = self.vocab
+            other_ids = other.ids
+        dtype = _id_dtype(len(vocab))
+        ids = np.concatenate([self.ids.astype(dtype), other_ids.astype(dtype)])
+        return EncodedCorpus(ids, vocab)
+
+    def counts(self):
+        """返回每个编号的出现次数（长度等于符号表大小）"""
+        with profiler.stage("count", items=len(self.ids)):
+            return np.bincount(self.ids, minlength=len(self.vocab))
+
+    def tokens(self):
+        """还原为符号列表（仅在需要逐个符号处理时使用）"""
+        return self.vocab.decode(self.ids)